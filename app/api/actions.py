@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Optional, Dict, Any
-from datetime import datetime, UTC
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, UTC
 import json
 import time
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.core.security import get_current_active_user
 from app.core.dependencies import get_game_session, get_character
-from app.core import redis, llm_client
+from app.core.permissions import resolve_session_access, resolve_character_access
+from app.core import llm_client, job_queue, session_state, session_events
 from app.models.user import User
 from app.models.game_session import GameSession
 from app.models.character import Character
@@ -19,16 +22,21 @@ from app.schemas.action_log import (
     ActionLogCreate,
     ActionLog as ActionLogSchema,
     ActionRequest,
-    ActionResponse
+    ActionResponse,
+    ActionJob
 )
-from app.services.llm_service import generate_action_response
+from app.services.llm_service import generate_action_response, generate_action_response_stream
+from app.services import context_summarizer, action_archive, session_snapshots
+from app.utils.pagination import NEXT_CURSOR_HEADER, page_size, keyset_page, next_cursor, decode_cursor
 
 router = APIRouter(prefix="/actions", tags=["actions"])
 
 @router.get("/", response_model=List[ActionLogSchema])
 async def read_actions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     game_session_id: Optional[int] = None,
     character_id: Optional[int] = None,
     action_date: Optional[str] = None,
@@ -36,15 +44,17 @@ async def read_actions(
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Récupère les logs d'action avec filtres optionnels.
+    Récupère les logs d'action avec filtres optionnels, du plus récent au plus ancien.
+    Quand la page est complète, l'en-tête X-Next-Cursor contient le curseur à
+    passer en paramètre `cursor` pour obtenir la page suivante.
     """
     query = select(ActionLog)
+    archive_session_id = None
     
     # Appliquer les filtres
     if game_session_id:
         # Vérifier l'accès à la session
-        result = await db.execute(select(GameSession).filter(GameSession.id == game_session_id))
-        session = result.scalars().first()
+        session, role = await resolve_session_access(db, game_session_id, current_user)
         
         if not session:
             raise HTTPException(
@@ -52,29 +62,18 @@ async def read_actions(
                 detail=f"Session de jeu avec l'ID {game_session_id} non trouvée"
             )
         
-        # Vérifier si l'utilisateur est le maître de jeu ou un joueur de la session
-        is_game_master = session.game_master_id == current_user.id
-        
-        if not (is_game_master or current_user.is_superuser):
-            # Vérifier si l'utilisateur est un joueur dans cette session
-            result = await db.execute(
-                select(Character).filter(
-                    Character.game_session_id == game_session_id,
-                    Character.user_id == current_user.id
-                )
+        if role is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Accès non autorisé à cette session de jeu"
             )
-            if not result.scalars().first():
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Accès non autorisé à cette session de jeu"
-                )
         
         query = query.filter(ActionLog.game_session_id == game_session_id)
+        archive_session_id = game_session_id
     
     if character_id:
         # Vérifier l'accès au personnage
-        result = await db.execute(select(Character).filter(Character.id == character_id))
-        character = result.scalars().first()
+        character, allowed, _ = await resolve_character_access(db, character_id, current_user)
         
         if not character:
             raise HTTPException(
@@ -83,31 +82,55 @@ async def read_actions(
             )
         
         # Vérifier si l'utilisateur est le propriétaire du personnage ou le maître de jeu
-        is_owner = character.user_id == current_user.id
-        
-        result = await db.execute(
-            select(GameSession).filter(GameSession.id == character.game_session_id)
-        )
-        session = result.scalars().first()
-        is_game_master = session and session.game_master_id == current_user.id
-        
-        if not (is_owner or is_game_master or current_user.is_superuser):
+        if not allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Accès non autorisé à ce personnage"
             )
         
         query = query.filter(ActionLog.character_id == character_id)
+        archive_session_id = archive_session_id or character.game_session_id
     
     if action_date:
-        query = query.filter(ActionLog.action_date == action_date)
+        # Borner aussi action_timestamp pour ne parcourir que la partition du mois concerné
+        try:
+            day = datetime.strptime(action_date, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La date doit être au format AAAA-MM-JJ"
+            )
+        query = query.filter(
+            ActionLog.action_date == action_date,
+            ActionLog.action_timestamp >= day,
+            ActionLog.action_timestamp < day + timedelta(days=1)
+        )
     
-    # Appliquer pagination et tri par date
-    query = query.order_by(ActionLog.action_timestamp.desc()).offset(skip).limit(limit)
+    # Appliquer pagination et tri par date (du plus récent au plus ancien)
+    limit = page_size(limit)
+    if skip and not cursor:
+        query = query.offset(skip)
+    query = keyset_page(query, (ActionLog.action_timestamp, ActionLog.id), cursor, limit)
     
     result = await db.execute(query)
     actions = result.scalars().all()
     
+    # Compléter avec l'historique archivé (rangé par session, non paginable par offset)
+    if archive_session_id and not (skip and not cursor):
+        archived = await action_archive.read_archived_actions(
+            db,
+            archive_session_id,
+            limit,
+            character_id=character_id,
+            action_date=action_date,
+            after=decode_cursor(cursor, datetime, int) if cursor else None
+        )
+        actions = action_archive.merge_actions(actions, archived, limit)
+    
+    cursor = next_cursor(actions, limit, lambda action: (action.action_timestamp, action.id))
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    
     return actions
 
 @router.post("/", response_model=ActionResponse)
@@ -120,6 +143,239 @@ async def create_action(
     """
     Crée une nouvelle action et génère une réponse via le LLM.
     """
+    character, session, scene, action_log, llm_context = await prepare_action(
+        action_request, db, current_user
+    )
+    
+    # Générer la réponse via le LLM
+    start_time = time.time()
+    
+    response_data = await generate_action_response(
+        action_request.action_type,
+        action_request.description,
+        action_request.game_data or {},
+        llm_context
+    )
+    
+    end_time = time.time()
+    processing_time = end_time - start_time
+    
+    # Mettre à jour le log d'action et les statistiques de tokens
+    await save_action_result(
+        db, action_log.id, session.id, current_user.id, response_data, processing_time,
+        action_log.action_timestamp
+    )
+    
+    # Mettre à jour l'état du jeu en arrière-plan
+    background_tasks.add_task(
+        update_game_state,
+        session.id,
+        character.id,
+        action_log.id,
+        response_data
+    )
+    
+    # Résumer les actions anciennes si l'historique dépasse son budget
+    if context_summarizer.needs_summary(llm_context["context_window"]):
+        background_tasks.add_task(context_summarizer.summarize_session_context, session.id)
+    
+    action_response = build_action_response(action_log, response_data, processing_time)
+    await session_events.publish_event(session.id, "result", action_response.model_dump(mode="json"))
+    
+    return action_response
+
+@router.post("/stream")
+async def create_action_stream(
+    action_request: ActionRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Crée une nouvelle action et diffuse la réponse du LLM en Server-Sent Events.
+    
+    Événements émis :
+    - token : fragment de la narration générée ({"delta": "..."}), dès le début du champ narrative_response
+    - field : champ de la réponse structurée complet ({"name": "...", "value": ...}),
+      par exemple character_updates, scene_updates ou next_possible_actions
+    - result : réponse structurée finale (ActionResponse), une fois le log d'action enregistré
+    - error : erreur survenue pendant la génération
+    """
+    character, session, scene, action_log, llm_context = await prepare_action(
+        action_request, db, current_user
+    )
+    
+    session_id = session.id
+    character_id = character.id
+    user_id = current_user.id
+    
+    # Résumer les actions anciennes une fois la diffusion terminée
+    if context_summarizer.needs_summary(llm_context["context_window"]):
+        background_tasks.add_task(context_summarizer.summarize_session_context, session_id)
+    
+    async def event_stream():
+        start_time = time.time()
+        response_data = None
+        
+        try:
+            async for event, data in generate_action_response_stream(
+                action_request.action_type,
+                action_request.description,
+                action_request.game_data or {},
+                llm_context
+            ):
+                if event == "narrative":
+                    yield format_sse_event("token", {"delta": data})
+                elif event == "field":
+                    yield format_sse_event("field", data)
+                else:
+                    response_data = data
+        except Exception as e:
+            yield format_sse_event("error", {"detail": str(e)})
+            return
+        
+        processing_time = time.time() - start_time
+        
+        # La session de la requête est fermée avant la diffusion : utiliser une session dédiée
+        async with AsyncSessionLocal() as stream_db:
+            await save_action_result(
+                stream_db, action_log.id, session_id, user_id, response_data, processing_time,
+                action_log.action_timestamp
+            )
+        
+        action_response = build_action_response(action_log, response_data, processing_time)
+        yield format_sse_event("result", action_response.model_dump(mode="json"))
+        await session_events.publish_event(session_id, "result", action_response.model_dump(mode="json"))
+        
+        # Mettre à jour l'état du jeu une fois la réponse envoyée
+        await update_game_state(session_id, character_id, action_log.id, response_data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/jobs", response_model=ActionJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_action_job(
+    action_request: ActionRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Crée une nouvelle action et met sa génération en file d'attente.
+    
+    La génération est effectuée par un worker (app.workers.action_worker) :
+    la requête ne garde ni la connexion HTTP ni la session de base de données
+    ouvertes pendant l'appel au LLM. Le résultat est disponible via
+    GET /actions/jobs/{job_id}.
+    """
+    character, session, scene, action_log, llm_context = await prepare_action(
+        action_request, db, current_user
+    )
+    
+    job_id = await job_queue.enqueue_action_job({
+        "action_id": action_log.id,
+        "action_timestamp": action_log.action_timestamp.isoformat(),
+        "session_id": session.id,
+        "character_id": character.id,
+        "user_id": current_user.id,
+        "action_type": action_request.action_type,
+        "description": action_request.description,
+        "game_data": action_request.game_data or {},
+        "llm_context": llm_context
+    }, current_user.id)
+    
+    return ActionJob(job_id=job_id, action_id=action_log.id, status=job_queue.JobStatus.QUEUED)
+
+@router.get("/jobs/{job_id}", response_model=ActionJob)
+async def read_action_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Récupère l'état d'une tâche de génération et, une fois terminée, la réponse de l'action.
+    """
+    job = await job_queue.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tâche {job_id} non trouvée"
+        )
+    
+    if job["user_id"] != current_user.id and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès non autorisé à cette tâche"
+        )
+    
+    return ActionJob(**job)
+
+@router.get("/{action_id}", response_model=ActionLogSchema)
+async def read_action(
+    action_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Récupère un log d'action par son ID.
+    """
+    # Charger l'action avec le propriétaire du personnage et le maître de jeu de la session
+    result = await db.execute(
+        select(ActionLog, Character.user_id, GameSession.game_master_id)
+        .outerjoin(Character, Character.id == ActionLog.character_id)
+        .outerjoin(GameSession, GameSession.id == ActionLog.game_session_id)
+        .filter(ActionLog.id == action_id)
+    )
+    row = result.first()
+    
+    if not row:
+        # Chercher dans l'historique archivé
+        action = await action_archive.get_archived_action(db, action_id)
+        if action:
+            result = await db.execute(
+                select(Character.user_id, GameSession.game_master_id)
+                .select_from(GameSession)
+                .outerjoin(Character, Character.id == action.character_id)
+                .filter(GameSession.id == action.game_session_id)
+            )
+            row = result.first()
+            row = (action, *row) if row else (action, None, None)
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Action avec l'ID {action_id} non trouvée"
+        )
+    
+    # Vérifier l'accès à l'action
+    action, owner_id, game_master_id = row
+    is_owner = owner_id is not None and owner_id == current_user.id
+    is_game_master = game_master_id is not None and game_master_id == current_user.id
+    
+    if not (is_owner or is_game_master or current_user.is_superuser):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès non autorisé à cette action"
+        )
+    
+    return action
+
+# Fonctions utilitaires
+
+async def prepare_action(
+    action_request: ActionRequest,
+    db: AsyncSession,
+    current_user: User
+) -> Tuple[Character, GameSession, Optional[Scene], ActionLog, Dict[str, Any]]:
+    """
+    Vérifie les permissions, enregistre le log d'action, met à jour le contexte
+    de la session dans Redis et construit le contexte pour le LLM.
+    
+    Returns:
+        Tuple (personnage, session, scène, log d'action, contexte LLM)
+    """
     # Vérifier l'accès au personnage
     result = await db.execute(select(Character).filter(Character.id == action_request.character_id))
     character = result.scalars().first()
@@ -186,22 +442,14 @@ async def create_action(
     session.total_actions += 1
     await db.commit()
     
-    # Récupérer l'état de la session depuis Redis
-    session_state_json = await redis.redis_client.get(f"session:{session.id}")
+    # Restaurer le dernier instantané de l'état si celui-ci a expiré de Redis
+    if not await session_state.exists(session.id):
+        await session_snapshots.restore_session_state(db, session)
     
-    if not session_state_json:
-        # Initialiser l'état si non existant
-        from app.api.game_sessions import initialize_session_state_in_redis
-        await initialize_session_state_in_redis(session.id, session)
-        session_state_json = await redis.redis_client.get(f"session:{session.id}")
-    
-    session_state = json.loads(session_state_json)
-    
-    # Mettre à jour le contexte de la session
-    context_window = session_state.get("context_window", [])
-    
-    # Ajouter l'action au contexte
-    context_window.append({
+    # Ajouter l'action au contexte de la session dans Redis (en un seul aller-retour,
+    # l'état est créé s'il n'existe pas). Les actions anciennes sont résumées en
+    # arrière-plan ; le plafond de la fenêtre ne sert que si le résumé échoue
+    context_window, story_summary = await session_state.append_action(session, {
         "action_id": action_log.id,
         "character_name": character.name,
         "action_type": action_request.action_type,
@@ -209,123 +457,103 @@ async def create_action(
         "timestamp": action_timestamp.isoformat()
     })
     
-    # Limiter la taille du contexte (garder les 10 dernières actions)
-    if len(context_window) > 10:
-        context_window = context_window[-10:]
-    
-    session_state["context_window"] = context_window
-    session_state["last_action_id"] = action_log.id
-    session_state["last_activity_time"] = datetime.now().isoformat()
-    
-    # Mettre à jour l'état dans Redis
-    await redis.redis_client.set(
-        f"session:{session.id}",
-        json.dumps(session_state),
-        ex=86400  # 24 heures
-    )
-    
-    # Générer la réponse via le LLM
-    start_time = time.time()
-    
     # Construire le contexte pour le LLM
-    llm_context = await build_llm_context(db, session, character, scene, context_window)
-    
-    # Générer la réponse
-    response_data = await generate_action_response(
-        action_request.action_type,
-        action_request.description,
-        action_request.game_data or {},
-        llm_context
+    llm_context = await build_llm_context(
+        db, session, character, scene, context_window, story_summary
     )
     
-    end_time = time.time()
-    processing_time = end_time - start_time
-    
-    # Mettre à jour le log d'action avec la réponse
-    action_log.result = response_data["result"]
-    action_log.tokens_used = response_data["tokens_used"]
-    action_log.processing_time = processing_time
-    
-    await db.commit()
+    # Prévenir les joueurs connectés de la nouvelle action
+    await session_events.publish_event(session.id, "action", {
+        "action_id": action_log.id,
+        "character_id": character.id,
+        "character_name": character.name,
+        "action_type": action_request.action_type,
+        "description": action_request.description,
+        "timestamp": action_timestamp.isoformat()
+    })
     
-    # Mettre à jour les statistiques de tokens
-    session.total_tokens_used += response_data["tokens_used"]
-    current_user.total_tokens_used += response_data["tokens_used"]
+    return character, session, scene, action_log, llm_context
+
+async def save_action_result(
+    db: AsyncSession,
+    action_id: int,
+    session_id: int,
+    user_id: int,
+    response_data: Dict[str, Any],
+    processing_time: float,
+    action_timestamp: Optional[datetime] = None
+):
+    """
+    Enregistre la réponse du LLM dans le log d'action et met à jour les
+    statistiques de tokens de la session et de l'utilisateur.
+    L'horodatage de l'action, s'il est connu, limite la mise à jour à sa partition.
+    """
+    tokens_used = response_data["tokens_used"]
+    
+    action_filter = [ActionLog.id == action_id]
+    if action_timestamp is not None:
+        action_filter.append(ActionLog.action_timestamp == action_timestamp)
+    
+    await db.execute(
+        update(ActionLog)
+        .where(*action_filter)
+        .values(
+            result=response_data["result"],
+            tokens_used=tokens_used,
+            prompt_tokens=response_data.get("prompt_tokens", 0),
+            processing_time=processing_time
+        )
+    )
+    await db.execute(
+        update(GameSession)
+        .where(GameSession.id == session_id)
+        .values(total_tokens_used=GameSession.total_tokens_used + tokens_used)
+    )
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(total_tokens_used=User.total_tokens_used + tokens_used)
+    )
     
     # Mettre à jour le temps de jeu
     # Cette partie serait normalement plus complexe pour calculer le temps de jeu réel
     
     await db.commit()
-    
-    # Mettre à jour l'état du jeu en arrière-plan
-    background_tasks.add_task(
-        update_game_state,
-        session.id,
-        character.id,
-        action_log.id,
-        response_data
-    )
-    
-    # Construire la réponse
-    action_response = ActionResponse(
+
+def build_action_response(
+    action_log: ActionLog,
+    response_data: Dict[str, Any],
+    processing_time: float
+) -> ActionResponse:
+    """
+    Construit la réponse renvoyée au client à partir de la réponse du LLM.
+    """
+    return ActionResponse(
         action_id=action_log.id,
         result=response_data["result"],
         game_data=response_data.get("game_data", {}),
         tokens_used=response_data["tokens_used"],
         processing_time=processing_time,
-        timestamp=action_timestamp,
+        timestamp=action_log.action_timestamp,
         character_updates=response_data.get("character_updates"),
         scene_updates=response_data.get("scene_updates"),
         next_possible_actions=response_data.get("next_possible_actions", []),
         narrative_context=response_data.get("narrative_context")
     )
-    
-    return action_response
 
-@router.get("/{action_id}", response_model=ActionLogSchema)
-async def read_action(
-    action_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
     """
-    Récupère un log d'action par son ID.
+    Formate un événement Server-Sent Events.
     """
-    result = await db.execute(select(ActionLog).filter(ActionLog.id == action_id))
-    action = result.scalars().first()
-    
-    if not action:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Action avec l'ID {action_id} non trouvée"
-        )
-    
-    # Vérifier l'accès à l'action
-    result = await db.execute(select(Character).filter(Character.id == action.character_id))
-    character = result.scalars().first()
-    
-    result = await db.execute(select(GameSession).filter(GameSession.id == action.game_session_id))
-    session = result.scalars().first()
-    
-    is_owner = character and character.user_id == current_user.id
-    is_game_master = session and session.game_master_id == current_user.id
-    
-    if not (is_owner or is_game_master or current_user.is_superuser):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Accès non autorisé à cette action"
-        )
-    
-    return action
-
-# Fonctions utilitaires
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 async def build_llm_context(
     db: AsyncSession,
     session: GameSession,
     character: Character,
     scene: Optional[Scene],
-    context_window: List[Dict[str, Any]]
+    context_window: List[Dict[str, Any]],
+    story_summary: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Construit le contexte pour le LLM.
@@ -333,6 +561,7 @@ async def build_llm_context(
     # Récupérer les données du personnage
     character_data = {
         "id": character.id,
+        "user_id": character.user_id,
         "name": character.name,
         "class": character.character_class,
         "level": character.level,
@@ -395,6 +624,7 @@ async def build_llm_context(
         "other_characters": other_characters_data,
         "scene": scene_data,
         "context_window": context_window,
+        "story_summary": story_summary,
         "game_state": {}  # Sera rempli avec l'état du jeu depuis Redis
     }
     
@@ -409,38 +639,31 @@ async def update_game_state(
     """
     Met à jour l'état du jeu dans Redis et applique les mises à jour au personnage et à la scène.
     """
-    # Récupérer l'état de la session depuis Redis
-    session_state_json = await redis.redis_client.get(f"session:{session_id}")
-    
-    if not session_state_json:
-        return
-    
-    session_state = json.loads(session_state_json)
-    
-    # Mettre à jour l'état du jeu
-    game_state = session_state.get("game_state", {})
-    
     # Appliquer les mises à jour du personnage
     character_updates = response_data.get("character_updates")
     if character_updates:
         # Cette partie serait normalement implémentée pour mettre à jour le personnage
         # dans la base de données
-        pass
+        await session_events.publish_event(session_id, "character_update", {
+            "character_id": character_id,
+            "action_id": action_id,
+            "updates": character_updates
+        })
     
     # Appliquer les mises à jour de la scène
     scene_updates = response_data.get("scene_updates")
     if scene_updates:
         # Cette partie serait normalement implémentée pour mettre à jour la scène
         # dans la base de données
-        pass
-    
-    # Mettre à jour l'état du jeu
-    game_state.update(response_data.get("game_data", {}))
-    session_state["game_state"] = game_state
-    
-    # Mettre à jour l'état dans Redis
-    await redis.redis_client.set(
-        f"session:{session_id}",
-        json.dumps(session_state),
-        ex=86400  # 24 heures
-    )
\ No newline at end of file
+        await session_events.publish_event(session_id, "scene_update", {
+            "action_id": action_id,
+            "updates": scene_updates
+        })
+    
+    # Fusionner les données de jeu dans l'état de la session (atomique, sans relire l'état)
+    game_data = response_data.get("game_data") or {}
+    if game_data:
+        await session_state.merge_game_state(session_id, game_data)
+    
+    # Instantané périodique de l'état de la session
+    await session_snapshots.checkpoint_if_due(session_id)
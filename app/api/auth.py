@@ -9,7 +9,7 @@ from app.core.security import (
     authenticate_user,
     create_access_token,
     get_current_active_user,
-    get_password_hash,
+    get_password_hash_async,
 )
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserCreate, Token
@@ -44,7 +44,7 @@ async def login_for_access_token(
     
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user.username, "user_id": user.id},
+        data={"sub": user.username, "user_id": user.id, "ver": user.token_version},
         expires_delta=access_token_expires,
         scopes=scopes
     )
@@ -71,7 +71,7 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
         )
     
     # Créer le nouvel utilisateur
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -105,7 +105,7 @@ async def refresh_token(current_user: User = Depends(get_current_active_user)):
     
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": current_user.username, "user_id": current_user.id},
+        data={"sub": current_user.username, "user_id": current_user.id, "ver": current_user.token_version},
         expires_delta=access_token_expires,
         scopes=scopes
     )
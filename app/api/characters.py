@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from typing import List, Tuple
@@ -7,6 +8,7 @@ from typing import List, Tuple
 from app.core.database import get_db
 from app.core.security import get_current_active_user
 from app.core.dependencies import get_game_session, get_character
+from app.core.permissions import resolve_session_access, remember_player, forget_player
 from app.models.user import User
 from app.models.game_session import GameSession
 from app.models.character import Character, CharacterClass
@@ -43,8 +45,7 @@ async def read_characters(
     # Filtrer par session de jeu si fourni
     if game_session_id:
         # Vérifier si l'utilisateur a accès à cette session
-        result = await db.execute(select(GameSession).filter(GameSession.id == game_session_id))
-        session = result.scalars().first()
+        session, role = await resolve_session_access(db, game_session_id, current_user)
         
         if not session:
             raise HTTPException(
@@ -52,22 +53,11 @@ async def read_characters(
                 detail=f"Session de jeu avec l'ID {game_session_id} non trouvée"
             )
         
-        # Vérifier si l'utilisateur est le maître de jeu ou un joueur de la session
-        is_game_master = session.game_master_id == current_user.id
-        
-        if not (is_game_master or current_user.is_superuser):
-            # Vérifier si l'utilisateur est un joueur dans cette session
-            result = await db.execute(
-                select(Character).filter(
-                    Character.game_session_id == game_session_id,
-                    Character.user_id == current_user.id
-                )
+        if role is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Accès non autorisé à cette session de jeu"
             )
-            if not result.scalars().first():
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Accès non autorisé à cette session de jeu"
-                )
         
         query = query.filter(Character.game_session_id == game_session_id)
     
@@ -109,9 +99,14 @@ async def create_character(
     db.add(db_character)
     await db.commit()
     await db.refresh(db_character)
+    remember_player(db_character.game_session_id, db_character.user_id)
     
-    # Mettre à jour les statistiques de l'utilisateur
-    current_user.total_characters += 1
+    # Mettre à jour les statistiques de l'utilisateur (l'utilisateur courant peut venir du cache)
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(total_characters=User.total_characters + 1)
+    )
     await db.commit()
     
     return db_character
@@ -151,9 +146,14 @@ async def generate_character(
     db.add(db_character)
     await db.commit()
     await db.refresh(db_character)
+    remember_player(db_character.game_session_id, db_character.user_id)
     
-    # Mettre à jour les statistiques de l'utilisateur
-    current_user.total_characters += 1
+    # Mettre à jour les statistiques de l'utilisateur (l'utilisateur courant peut venir du cache)
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(total_characters=User.total_characters + 1)
+    )
     await db.commit()
     
     return db_character
@@ -247,6 +247,7 @@ async def delete_character(
     # Supprimer le personnage
     await db.delete(character)
     await db.commit()
+    forget_player(character.game_session_id, character.user_id)
     
     return None
 
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Response, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, update
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from typing import List, Optional, Dict, Any
 
-from app.core.database import get_db
-from app.core.security import get_current_active_user
+from app.core.config import settings
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.security import get_current_active_user, get_user_from_token
 from app.core.dependencies import get_game_session
+from app.core.permissions import resolve_session_access, is_player_clause
 from app.models.user import User
 from app.models.game_session import GameSession
 from app.models.character import Character
@@ -18,86 +25,86 @@ from app.schemas.game_session import (
     GameSession as GameSessionSchema,
     GameSessionUpdate,
     GameSessionWithDetails,
+    GameSessionListItem,
     GameSessionState
 )
 from app.schemas.user import User as UserSchema
 from app.schemas.action_log import ActionLog as ActionLogSchema
-from app.core import redis
+from app.core import session_state, session_events
+from app.services import action_archive, session_snapshots
+from app.utils.pagination import NEXT_CURSOR_HEADER, page_size, keyset_page, next_cursor, decode_cursor
 
 router = APIRouter(prefix="/game-sessions", tags=["game_sessions"])
 
-@router.get("/", response_model=List[GameSessionSchema])
+# Colonnes pouvant être demandées avec le paramètre fields
+LIST_COLUMNS = {name: getattr(GameSession, name) for name in GameSessionListItem.model_fields}
+
+def parse_list_fields(fields: Optional[str]) -> List[str]:
+    """Champs demandés pour la liste des sessions (tous par défaut, id toujours inclus)"""
+    if not fields:
+        return list(LIST_COLUMNS)
+    
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in LIST_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Champs inconnus: {', '.join(unknown)}. Champs disponibles: {', '.join(LIST_COLUMNS)}"
+        )
+    
+    return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+@router.get("/", response_model=List[GameSessionListItem], response_model_exclude_unset=True)
 async def read_game_sessions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     active_only: bool = False,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Récupère toutes les sessions de jeu de l'utilisateur.
     Si l'utilisateur est un administrateur, récupère toutes les sessions.
+    
+    Les sessions sont triées de la plus récemment modifiée à la plus ancienne.
+    Quand la page est complète, l'en-tête X-Next-Cursor contient le curseur à
+    passer en paramètre `cursor` pour obtenir la page suivante (`skip` reste
+    accepté sans curseur). Le paramètre `fields` (ex: fields=name,is_active)
+    limite les champs renvoyés, par exemple pour ne pas transférer context_data.
     """
-    # Sélectionner explicitement les colonnes pour éviter les problèmes avec les champs JSON
-    columns = [
-        GameSession.id, GameSession.name, GameSession.description,
-        GameSession.is_active, GameSession.game_master_id,
-        GameSession.total_tokens_used, GameSession.total_game_time,
-        GameSession.total_actions, GameSession.current_scenario_id,
-        GameSession.current_scene_id, GameSession.difficulty_level,
-        GameSession.created_at, GameSession.updated_at
-    ]
-    
-    query = select(*columns)
-    
-    # Filtrer par utilisateur si ce n'est pas un administrateur
+    selected = parse_list_fields(fields)
+    
+    # Une seule requête, projetée directement sur les champs de la réponse
+    query = select(*(LIST_COLUMNS[name] for name in selected), GameSession.updated_at.label("_cursor_updated_at"))
+    
+    # Sessions où l'utilisateur est le maître de jeu ou un joueur, sauf pour un administrateur
     if not current_user.is_superuser:
-        # Sessions où l'utilisateur est le maître de jeu
-        gm_query = query.filter(GameSession.game_master_id == current_user.id)
-        
-        # Sessions où l'utilisateur est un joueur
-        player_query = select(*columns).join(
-            Character,
-            (Character.game_session_id == GameSession.id) &
-            (Character.user_id == current_user.id)
-        )
-        
-        # Combiner les deux requêtes
-        query = gm_query.union(player_query)
+        query = query.filter(or_(
+            GameSession.game_master_id == current_user.id,
+            is_player_clause(current_user.id)
+        ))
     
     # Filtrer par sessions actives si demandé
     if active_only:
         query = query.filter(GameSession.is_active == True)
     
     # Appliquer pagination
-    query = query.offset(skip).limit(limit)
+    limit = page_size(limit)
+    if skip and not cursor:
+        query = query.offset(skip)
+    query = keyset_page(query, (GameSession.updated_at, GameSession.id), cursor, limit)
     
     result = await db.execute(query)
-    sessions = result.all()
-    
-    # Récupérer les champs JSON séparément pour chaque session
-    complete_sessions = []
-    for session_tuple in sessions:
-        # Convertir le tuple en dictionnaire
-        session_dict = {col.name: session_tuple[i]
-                        for i, col in enumerate(columns)}
-        
-        # Récupérer les champs JSON séparément
-        json_result = await db.execute(
-            select(GameSession.context_data, GameSession.game_rules)
-            .filter(GameSession.id == session_dict["id"])
-        )
-        json_data = json_result.first()
-        
-        if json_data:
-            session_dict["context_data"] = json_data[0]
-            session_dict["game_rules"] = json_data[1]
-        
-        # Créer un objet GameSession complet
-        complete_session = GameSession(**session_dict)
-        complete_sessions.append(complete_session)
+    rows = result.mappings().all()
     
-    return complete_sessions
+    cursor = next_cursor(rows, limit, lambda row: (row["_cursor_updated_at"], row["id"]))
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    
+    return [{name: row[name] for name in selected} for row in rows]
 
 @router.post("/", response_model=GameSessionSchema)
 async def create_game_session(
@@ -120,8 +127,12 @@ async def create_game_session(
     await db.commit()
     await db.refresh(db_session)
     
-    # Mettre à jour les statistiques de l'utilisateur
-    current_user.total_sessions += 1
+    # Mettre à jour les statistiques de l'utilisateur (l'utilisateur courant peut venir du cache)
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(total_sessions=User.total_sessions + 1)
+    )
     await db.commit()
     
     return db_session
@@ -253,6 +264,13 @@ async def update_game_session(
     if session.is_active:
         await update_session_state_in_redis(session_id, session)
     
+    # Prévenir les joueurs connectés d'un changement de scène
+    if "current_scene_id" in update_data or "current_scenario_id" in update_data:
+        await session_events.publish_event(session_id, "scene_change", {
+            "scenario_id": session.current_scenario_id,
+            "scene_id": session.current_scene_id
+        })
+    
     return session
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -270,7 +288,10 @@ async def delete_game_session(
         )
     
     # Supprimer l'état de la session dans Redis
-    await redis.redis_client.delete(f"session:{session_id}")
+    await session_state.delete(session_id)
+    
+    # Supprimer les archives de ses actions
+    await action_archive.delete_session_archives(db, session_id)
     
     # Supprimer la session
     await db.delete(session)
@@ -331,8 +352,16 @@ async def start_game_session(
     await db.commit()
     await db.refresh(session)
     
-    # Initialiser l'état de la session dans Redis
-    await initialize_session_state_in_redis(session_id, session)
+    # Reprendre l'état de la session : encore dans Redis, sinon le dernier instantané
+    if await session_state.exists(session_id):
+        await update_session_state_in_redis(session_id, session)
+    elif not await session_snapshots.restore_session_state(db, session):
+        await initialize_session_state_in_redis(session_id, session)
+    
+    await session_events.publish_event(session_id, "session_started", {
+        "scenario_id": session.current_scenario_id,
+        "scene_id": session.current_scene_id
+    })
     
     return session
 
@@ -367,11 +396,14 @@ async def stop_game_session(
     # Sauvegarder l'état de la session dans PostgreSQL et supprimer de Redis
     background_tasks.add_task(save_session_state_to_db, session_id)
     
+    await session_events.publish_event(session_id, "session_stopped", {})
+    
     return session
 
 @router.get("/{session_id}/state", response_model=GameSessionState)
 async def get_session_state(
     session_id: int,
+    db: AsyncSession = Depends(get_db),
     session: GameSession = Depends(get_game_session)
 ):
     """Récupère l'état actuel d'une session de jeu depuis Redis"""
@@ -383,103 +415,141 @@ async def get_session_state(
         )
     
     # Récupérer l'état de la session depuis Redis
-    session_state_json = await redis.redis_client.get(f"session:{session_id}")
+    state = await session_state.get_state(session_id)
     
-    if not session_state_json:
-        # Initialiser l'état si non existant
-        await initialize_session_state_in_redis(session_id, session)
-        session_state_json = await redis.redis_client.get(f"session:{session_id}")
-    
-    import json
-    session_state = json.loads(session_state_json)
+    if state is None:
+        # Restaurer le dernier instantané (état expiré), sinon initialiser l'état
+        if not await session_snapshots.restore_session_state(db, session):
+            await initialize_session_state_in_redis(session_id, session)
+        state = await session_state.get_state(session_id)
     
-    return GameSessionState(**session_state)
+    return GameSessionState(**state)
 
-# Fonctions utilitaires
-
-async def initialize_session_state_in_redis(session_id: int, session: GameSession):
-    """Initialise l'état d'une session dans Redis"""
-    from datetime import datetime, UTC
-    import json
-    
-    # Récupérer les personnages actifs
-    # Cette partie serait normalement implémentée pour récupérer les personnages
-    active_characters = []
-    
-    # Créer l'état initial
-    session_state = {
-        "session_id": session_id,
-        "name": session.name,
-        "active_characters": active_characters,
-        "current_scenario_id": session.current_scenario_id,
-        "current_scene_id": session.current_scene_id,
-        "last_action_id": None,
-        "context_window": [],
-        "session_start_time": datetime.now(UTC).isoformat(),
-        "last_activity_time": datetime.now(UTC).isoformat(),
-        "game_state": {}
-    }
-    
-    # Stocker dans Redis avec TTL de 24h
-    await redis.redis_client.set(
-        f"session:{session_id}",
-        json.dumps(session_state),
-        ex=86400  # 24 heures
-    )
-
-async def update_session_state_in_redis(session_id: int, session: GameSession):
-    """Met à jour l'état d'une session dans Redis"""
-    import json
+@router.websocket("/{session_id}/ws")
+async def session_events_websocket(
+    websocket: WebSocket,
+    session_id: int,
+    token: str,
+    last_event_id: Optional[str] = None
+):
+    """
+    Diffuse en temps réel les événements d'une session de jeu aux joueurs connectés.
     
-    # Récupérer l'état actuel
-    session_state_json = await redis.redis_client.get(f"session:{session_id}")
+    Le token JWT est passé en paramètre de requête (?token=...). Chaque message
+    est un objet JSON {"id": ..., "type": ..., "data": ...}, les types étant
+    action, result, scene_change, character_update, scene_update,
+    session_started et session_stopped.
     
-    if not session_state_json:
-        # Initialiser si non existant
-        await initialize_session_state_in_redis(session_id, session)
+    Après une déconnexion, le client se reconnecte avec ?last_event_id=<id du
+    dernier événement reçu> pour recevoir les événements manqués. Un client trop
+    lent est déconnecté (code 1013) et doit se reconnecter de la même façon.
+    """
+    # La session de base de données n'est ouverte que pour l'authentification
+    async with AsyncSessionLocal() as db:
+        user = await get_user_from_token(db, token)
+        role = None
+        if user is not None:
+            _, role = await resolve_session_access(db, session_id, user)
+    
+    if role is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
     
-    # Mettre à jour les champs pertinents
-    session_state = json.loads(session_state_json)
-    session_state["name"] = session.name
-    session_state["current_scenario_id"] = session.current_scenario_id
-    session_state["current_scene_id"] = session.current_scene_id
+    await websocket.accept()
     
-    from datetime import datetime, UTC
-    session_state["last_activity_time"] = datetime.now(UTC).isoformat()
+    # S'abonner avant de rattraper le retard pour ne manquer aucun événement
+    subscription = await session_events.hub.subscribe(session_id)
+    last_sent = None
     
-    # Stocker dans Redis avec TTL de 24h
-    await redis.redis_client.set(
-        f"session:{session_id}",
-        json.dumps(session_state),
-        ex=86400  # 24 heures
-    )
+    async def send_event(event: Dict[str, Any]):
+        nonlocal last_sent
+        await asyncio.wait_for(
+            websocket.send_text(json.dumps(event, ensure_ascii=False)),
+            timeout=settings.session_events_send_timeout
+        )
+        last_sent = session_events.event_id_key(event["id"])
+    
+    async def send_events():
+        if last_event_id:
+            for event in await session_events.read_events_since(session_id, last_event_id):
+                await send_event(event)
+        
+        while not subscription.overflowed:
+            event = await subscription.queue.get()
+            # Les événements déjà envoyés lors du rattrapage sont ignorés
+            if last_sent is not None and session_events.event_id_key(event["id"]) <= last_sent:
+                continue
+            await send_event(event)
+    
+    async def receive_messages():
+        # Les messages du client sont ignorés ; la lecture détecte la déconnexion
+        while True:
+            await websocket.receive_text()
+    
+    sender = asyncio.create_task(send_events())
+    receiver = asyncio.create_task(receive_messages())
+    
+    try:
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        # Récupérer les exceptions des deux tâches (la déconnexion du client en est une)
+        errors = {task: task.exception() for task in done}
+        
+        if sender in done:
+            error = errors[sender]
+            if error is None or isinstance(error, asyncio.TimeoutError):
+                # Client trop lent : il reprendra depuis son dernier événement reçu
+                await websocket.close(code=1013, reason="Retard trop important, reconnectez-vous avec last_event_id")
+            elif not isinstance(error, WebSocketDisconnect):
+                print(f"Erreur de diffusion des événements de la session {session_id}: {error}")
+                await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    except RuntimeError:
+        # Connexion déjà fermée
+        pass
+    finally:
+        await session_events.hub.unsubscribe(subscription)
+
+# Fonctions utilitaires
+
+async def initialize_session_state_in_redis(session_id: int, session: GameSession):
+    """Initialise l'état d'une session dans Redis (TTL de 24h)"""
+    await session_state.initialize(session_id, session)
+
+async def update_session_state_in_redis(session_id: int, session: GameSession):
+    """Met à jour l'état d'une session dans Redis (et l'initialise si non existant)"""
+    await session_state.update_metadata(session_id, session)
 
 async def save_session_state_to_db(session_id: int):
-    """Sauvegarde l'état d'une session de Redis vers PostgreSQL"""
-    # Cette fonction serait implémentée pour sauvegarder l'état complet
-    # de la session dans PostgreSQL avant de la supprimer de Redis
-    
-    # Récupérer l'état depuis Redis
-    session_state_json = await redis.redis_client.get(f"session:{session_id}")
+    """Sauvegarde l'état d'une session de Redis vers PostgreSQL puis le supprime de Redis"""
+    try:
+        await session_snapshots.checkpoint(session_id)
+    except Exception as e:
+        # Conserver l'état dans Redis (jusqu'à son expiration) plutôt que de le perdre
+        print(f"Erreur lors de la sauvegarde de l'état de la session {session_id}: {e}")
+        return
     
-    if session_state_json:
-        # Sauvegarder dans PostgreSQL (à implémenter)
-        # ...
-        
-        # Supprimer de Redis
-        await redis.redis_client.delete(f"session:{session_id}")
+    # Ne pas supprimer l'état d'une session redémarrée entre-temps
+    async with AsyncSessionLocal() as db:
+        is_active = await db.scalar(select(GameSession.is_active).filter(GameSession.id == session_id))
+    if not is_active:
+        await session_state.delete(session_id)
 
 @router.get("/{session_id}/actions", response_model=List[ActionLogSchema])
 async def read_session_actions(
     session_id: int,
+    response: Response,
     timestamp: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
     db: AsyncSession = Depends(get_db),
     session: GameSession = Depends(get_game_session)
 ):
     """
-    Récupère les actions d'une session de jeu.
+    Récupère les actions d'une session de jeu, dans l'ordre chronologique.
     Si un timestamp est fourni, ne récupère que les actions après ce timestamp.
+    Quand la page est complète, l'en-tête X-Next-Cursor contient le curseur à
+    passer en paramètre `cursor` pour obtenir la suite.
     """
     # Vérifier si l'utilisateur a accès à la session
     # Cette vérification est déjà faite par la dépendance get_game_session
@@ -487,17 +557,33 @@ async def read_session_actions(
     # Construire la requête pour récupérer les actions
     query = select(ActionLog).filter(ActionLog.game_session_id == session_id)
     
-    # Filtrer par timestamp si fourni
+    # Filtrer par timestamp si fourni (les horodatages sont stockés sans fuseau)
+    timestamp_date = None
     if timestamp:
-        from datetime import datetime, UTC
-        timestamp_date = datetime.fromtimestamp(timestamp, UTC)
+        timestamp_date = datetime.fromtimestamp(timestamp)
         query = query.filter(ActionLog.action_timestamp > timestamp_date)
     
-    # Trier par timestamp
-    query = query.order_by(ActionLog.action_timestamp)
+    # Trier par timestamp et paginer (index game_session_id, action_timestamp, id)
+    limit = page_size(limit)
+    query = keyset_page(query, (ActionLog.action_timestamp, ActionLog.id), cursor, limit, descending=False)
     
     # Exécuter la requête
     result = await db.execute(query)
     actions = result.scalars().all()
     
+    # Compléter avec l'historique archivé
+    archived = await action_archive.read_archived_actions(
+        db,
+        session_id,
+        limit,
+        since=timestamp_date,
+        after=decode_cursor(cursor, datetime, int) if cursor else None,
+        descending=False
+    )
+    actions = action_archive.merge_actions(actions, archived, limit, descending=False)
+    
+    cursor = next_cursor(actions, limit, lambda action: (action.action_timestamp, action.id))
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    
     return actions
\ No newline at end of file
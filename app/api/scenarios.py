@@ -1,3 +1,6 @@
+import asyncio
+import os
+
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -17,6 +20,7 @@ from app.schemas.scenario import (
     ScenarioWithDetails
 )
 from app.services.markdown_parser import markdown_parser
+from app.services import scenario_import
 
 router = APIRouter(prefix="/scenarios", tags=["scenarios"])
 
@@ -220,72 +224,20 @@ async def import_scenario_from_markdown(
             detail="Le fichier doit être au format markdown (.md ou .markdown)"
         )
     
-    # Lire le contenu du fichier
+    # Lire le contenu du fichier et le parser en mémoire (sans rendu HTML)
     content = await file.read()
     
-    # Sauvegarder temporairement le fichier
-    import tempfile
-    import os
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.md') as temp_file:
-        temp_file.write(content)
-        temp_file_path = temp_file.name
-    
     try:
-        # Parser le fichier markdown
-        scenario_data = markdown_parser.parse_scenario_file(temp_file_path)
-        
-        # Extraire les métadonnées
-        metadata = scenario_data.get("metadata", {})
-        
-        # Créer le scénario
-        scenario = Scenario(
-            title=metadata.get("title", os.path.splitext(file.filename)[0]),
-            description=metadata.get("description", ""),
-            introduction=metadata.get("introduction", ""),
-            conclusion=metadata.get("conclusion", ""),
-            recommended_level=metadata.get("level", 1),
-            difficulty=metadata.get("difficulty", "standard"),
-            tags=metadata.get("tags", []),
-            is_published=False,
-            creator_id=current_user.id,
-            context_data=metadata.get("context", {}),
-            resources=metadata.get("resources", {})
-        )
-        
-        db.add(scenario)
-        await db.commit()
-        await db.refresh(scenario)
-        
-        # Créer les scènes
-        sections = scenario_data.get("sections", [])
-        
-        for i, section in enumerate(sections):
-            scene = Scene(
-                title=section.get("title", f"Scène {i+1}"),
-                description=section.get("content", "")[:200] + "..." if len(section.get("content", "")) > 200 else section.get("content", ""),
-                scene_type="EXPLORATION",  # Type par défaut
-                order=i,
-                narrative_content=section.get("content", ""),
-                markdown_content=section.get("content", ""),
-                scenario_id=scenario.id
-            )
-            
-            db.add(scene)
-        
-        await db.commit()
-        
-        # Récupérer le scénario avec ses scènes
-        result = await db.execute(
-            select(Scenario)
-            .filter(Scenario.id == scenario.id)
-            .options(selectinload(Scenario.scenes))
+        scenario_data = await asyncio.to_thread(markdown_parser.parse_scenario_bytes, content)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Le fichier doit être encodé en UTF-8"
         )
-        
-        scenario_with_scenes = result.scalars().first()
-        
-        return scenario_with_scenes
     
-    finally:
-        # Supprimer le fichier temporaire
-        os.unlink(temp_file_path)
\ No newline at end of file
+    # Créer le scénario et ses scènes (la réponse ne contient pas les scènes)
+    scenario = await scenario_import.create_scenario(
+        db, scenario_data, current_user.id, os.path.splitext(file.filename)[0]
+    )
+    
+    return scenario
@@ -15,9 +15,11 @@ from app.schemas.scene import (
     Scene as SceneSchema,
     SceneUpdate,
     SceneWithDetails,
+    SceneHtml,
     SceneTransition
 )
 from app.services.llm_service import generate_scene_description
+from app.services import render_cache
 
 router = APIRouter(prefix="/scenes", tags=["scenes"])
 
@@ -105,6 +107,27 @@ async def read_scene(
     
     return scene_with_details
 
+@router.get("/{scene_id}/html", response_model=SceneHtml)
+async def read_scene_html(
+    scene_id: int,
+    as_player: bool = False,
+    scene_and_scenario: Tuple[Scene, Scenario] = Depends(get_scene),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Récupère le contenu markdown d'une scène rendu en HTML.
+    Le créateur du scénario reçoit la vue MJ (contenu secret compris), sauf si
+    as_player est True ; les autres utilisateurs reçoivent la vue joueurs.
+    """
+    scene, scenario = scene_and_scenario
+    
+    is_gm = scenario.creator_id == current_user.id or current_user.is_superuser
+    for_gm = is_gm and not as_player
+    
+    html_content = await render_cache.render_markdown(scene.markdown_content, for_gm)
+    
+    return SceneHtml(scene_id=scene.id, for_gm=for_gm, html_content=html_content)
+
 @router.put("/{scene_id}", response_model=SceneSchema)
 async def update_scene(
     scene_id: int,
@@ -125,6 +148,7 @@ async def update_scene(
     
     # Mettre à jour les champs
     update_data = scene_update.model_dump(exclude_unset=True)
+    previous_markdown = scene.markdown_content
     
     # Appliquer les mises à jour
     for key, value in update_data.items():
@@ -133,6 +157,10 @@ async def update_scene(
     await db.commit()
     await db.refresh(scene)
     
+    # Supprimer les rendus HTML de l'ancien contenu markdown
+    if scene.markdown_content != previous_markdown:
+        await render_cache.invalidate(previous_markdown)
+    
     return scene
 
 @router.delete("/{scene_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -152,7 +180,8 @@ async def delete_scene(
             detail="Seul le créateur du scénario peut supprimer les scènes"
         )
     
-    # Supprimer la scène
+    # Supprimer la scène et les rendus HTML de son contenu
+    await render_cache.invalidate(scene.markdown_content)
     await db.delete(scene)
     await db.commit()
     
@@ -175,10 +204,15 @@ async def delete_scene(
 @router.post("/{scene_id}/generate-description", response_model=SceneSchema)
 async def generate_description(
     scene_id: int,
+    bypass_cache: bool = False,
     db: AsyncSession = Depends(get_db),
     scene_and_scenario: Tuple[Scene, Scenario] = Depends(get_scene)
 ):
-    """Génère une description détaillée pour une scène en utilisant le LLM"""
+    """
+    Génère une description détaillée pour une scène en utilisant le LLM.
+    Si bypass_cache est True, une nouvelle description est générée même si une
+    description identique est en cache.
+    """
     scene, scenario = scene_and_scenario
     
     # Vérifier si l'utilisateur est le créateur du scénario
@@ -210,7 +244,7 @@ async def generate_description(
     }
     
     # Générer la description
-    narrative_content = await generate_scene_description(scene_data, context)
+    narrative_content = await generate_scene_description(scene_data, context, bypass_cache=bypass_cache)
     
     # Mettre à jour la scène
     scene.narrative_content = narrative_content
@@ -3,8 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
+from app.core import auth_cache
 from app.core.database import get_db
-from app.core.security import get_current_active_user, get_current_superuser, get_password_hash
+from app.core.security import get_current_active_user, get_current_superuser, get_password_hash_async
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate, UserWithStats
 
@@ -52,7 +53,7 @@ async def create_user(
         )
     
     # Créer le nouvel utilisateur
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -140,7 +141,7 @@ async def update_user(
     
     # Hacher le mot de passe si fourni
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
     
     # Vérifier si le nom d'utilisateur existe déjà
     if "username" in update_data and update_data["username"] != db_user.username:
@@ -160,12 +161,21 @@ async def update_user(
                 detail="Cet email est déjà utilisé"
             )
     
+    # Révoquer les tokens émis si l'utilisateur est désactivé ou change de droits
+    if any(
+        getattr(db_user, key) != value
+        for key, value in update_data.items()
+        if key in ("is_active", "is_superuser")
+    ):
+        db_user.token_version += 1
+    
     # Appliquer les mises à jour
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
     await db.commit()
     await db.refresh(db_user)
+    auth_cache.invalidate_user(user_id)
     
     return db_user
 
@@ -190,6 +200,7 @@ async def delete_user(
     
     await db.delete(db_user)
     await db.commit()
+    auth_cache.invalidate_user(user_id)
     
     return None
 
@@ -0,0 +1,109 @@
+"""
+Banc d'essai du rendu des tags personnalisés du markdown des scénarios.
+Compare l'analyse en une seule passe de MarkdownParser.render_tags à
+l'ancienne implémentation (une substitution re.sub par tag, soit sept copies
+du document) sur un scénario généré de grande taille, et signale les lignes
+dont le HTML diffère (l'analyse en une passe gère un niveau de parenthèses
+dans le texte des tags, l'ancienne implémentation non).
+
+Usage :
+    python -m app.benchmarks.markdown_tags [--sections N] [--repeat N] [--file scenario.md]
+"""
+
+import argparse
+import re
+import time
+from itertools import zip_longest
+from typing import Callable
+
+from app.services.markdown_parser import markdown_parser
+
+LEGACY_PATTERNS = [
+    (re.compile(r'@color\[(.*?)\]\((.*?)\)'), r'<span style="color: \1">\2</span>'),
+    (re.compile(r'@dice\[(.*?)\]'), r'<span class="dice">\1</span>'),
+    (re.compile(r'@stat\[(.*?)\]\((.*?)\)'), r'<span class="stat" data-stat="\1">\2</span>'),
+    (re.compile(r'@item\[(.*?)\]\((.*?)\)'), r'<span class="item" data-item="\1">\2</span>'),
+    (re.compile(r'@npc\[(.*?)\]\((.*?)\)'), r'<span class="npc" data-npc="\1">\2</span>'),
+    (re.compile(r'@monster\[(.*?)\]\((.*?)\)'), r'<span class="monster" data-monster="\1">\2</span>'),
+]
+LEGACY_SECRET_PATTERN = re.compile(r'@secret\[(.*?)\]\((.*?)\)')
+
+def legacy_render_tags(content: str, for_gm: bool = False) -> str:
+    """Ancienne implémentation : une passe re.sub par tag"""
+    for pattern, replacement in LEGACY_PATTERNS:
+        content = pattern.sub(replacement, content)
+    return LEGACY_SECRET_PATTERN.sub(r'<div class="gm-secret">\2</div>' if for_gm else '', content)
+
+def generate_scenario(sections: int) -> str:
+    """Génère un scénario markdown avec des tags dans chaque paragraphe"""
+    parts = ["# La crypte oubliée\n"]
+    for i in range(sections):
+        parts.append(f"## Salle {i}\n")
+        parts.append(
+            f"La porte s'ouvre sur une salle @color[darkred](sombre). Un @monster[goule-{i}](goule) "
+            f"garde le coffre (@dice[1d6] pièces d'or). Le personnage doit réussir un test de "
+            f"@stat[DEX](Dextérité) pour éviter le piège. @npc[ermite-{i}](L'ermite) murmure une "
+            f"énigme.\n\n"
+            f"@secret[mj](Le coffre contient @item[anneau-{i}](un anneau maudit).)\n"
+        )
+        parts.append(
+            f"### Trésor\n\n| Objet | Valeur |\n|---|---|\n| @item[epee-{i}](Épée courte) | @dice[2d10] po |\n\n"
+            "Texte d'ambiance sans tag, répété pour donner du corps à la section. " * 5 + "\n"
+        )
+    return "\n".join(parts)
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Meilleur temps d'exécution (en secondes) sur `repeat` essais"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def count_differences(content: str, for_gm: bool) -> int:
+    """Nombre de lignes dont le rendu en une passe diffère de l'ancienne implémentation"""
+    return sum(
+        legacy_line != line
+        for legacy_line, line in zip_longest(
+            legacy_render_tags(content, for_gm).splitlines(),
+            markdown_parser.render_tags(content, for_gm).splitlines()
+        )
+    )
+
+def run_benchmark(content: str, repeat: int):
+    """Mesure et affiche les temps des deux implémentations"""
+    for for_gm in (True, False):
+        differences = count_differences(content, for_gm)
+        if differences:
+            print(
+                f"Attention : {differences} ligne(s) diffère(nt) de l'ancienne implémentation "
+                f"(vue {'MJ' if for_gm else 'joueurs'}), par exemple des parenthèses dans le texte d'un tag"
+            )
+
+    legacy = best_time(lambda: legacy_render_tags(content, True), repeat)
+    single_pass = best_time(lambda: markdown_parser.render_tags(content, True), repeat)
+    markdown_total = best_time(lambda: markdown_parser.parse_markdown(content, True), max(1, repeat // 5))
+
+    print(f"Document : {len(content) / 1024:.0f} Kio, {content.count('@')} tags")
+    print(f"Tags, 7 passes re.sub    : {legacy * 1000:8.2f} ms")
+    print(f"Tags, une seule passe    : {single_pass * 1000:8.2f} ms ({legacy / single_pass:.1f}x)")
+    print(f"parse_markdown complet   : {markdown_total * 1000:8.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai du rendu des tags markdown")
+    parser.add_argument("--sections", type=int, default=2000, help="Nombre de sections du scénario généré")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--file", help="Scénario markdown à utiliser au lieu du scénario généré")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            content = f.read()
+    else:
+        content = generate_scenario(args.sections)
+
+    run_benchmark(content, args.repeat)
+
+if __name__ == "__main__":
+    main()
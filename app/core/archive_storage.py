@@ -0,0 +1,149 @@
+"""
+Stockage des archives (fichiers JSONL compressés).
+Les archives sont écrites sur le disque local (file://chemin) ou dans un
+stockage objet compatible S3 (s3://bucket/préfixe, nécessite boto3).
+Les méthodes sont synchrones : les appeler via asyncio.to_thread depuis le
+code asynchrone.
+"""
+
+import gzip
+import json
+import os
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Protocol
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+COMPRESSION_EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+
+class ArchiveStorage(Protocol):
+    """Emplacement de stockage des fichiers d'archive"""
+
+    def put(self, key: str, source: Path): ...
+
+    def get(self, key: str) -> bytes: ...
+
+    def delete(self, key: str): ...
+
+class LocalArchiveStorage:
+    """Archives sur le disque local"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, source: Path):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Écrire sous un nom temporaire puis renommer : un fichier visible est toujours complet
+        temporary = path.with_name(path.name + ".tmp")
+        shutil.copyfile(source, temporary)
+        os.replace(temporary, path)
+
+    def get(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+class S3ArchiveStorage:
+    """Archives dans un stockage objet compatible S3"""
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        import boto3
+
+        self.client = boto3.client("s3", endpoint_url=settings.action_archive_s3_endpoint or None)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, source: Path):
+        self.client.upload_file(str(source), self.bucket, self._key(key))
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+def load_archive_storage(url: str) -> ArchiveStorage:
+    """Crée le stockage correspondant à une URL (file://... ou s3://...)"""
+    parsed = urlparse(url)
+    if parsed.scheme == "s3":
+        return S3ArchiveStorage(parsed.netloc, parsed.path)
+    if parsed.scheme in ("", "file"):
+        return LocalArchiveStorage(parsed.netloc + parsed.path if parsed.scheme else url)
+    raise ValueError(f"Stockage d'archives non pris en charge: {url}")
+
+_storage = None
+
+def get_archive_storage() -> ArchiveStorage:
+    """Stockage configuré par action_archive_url"""
+    global _storage
+    if _storage is None:
+        _storage = load_archive_storage(settings.action_archive_url)
+    return _storage
+
+def set_archive_storage(storage: ArchiveStorage):
+    """Remplace le stockage utilisé (tests, configuration par programme)"""
+    global _storage
+    _storage = storage
+
+def archive_extension(compression: str) -> str:
+    """Extension des fichiers d'archive pour un format de compression"""
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Compression non prise en charge: {compression}")
+    return COMPRESSION_EXTENSIONS[compression]
+
+def json_default(value: Any) -> Any:
+    """Sérialisation des valeurs non JSON (horodatages au format ISO 8601)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+class JsonlWriter:
+    """Écriture au fil de l'eau de lignes JSON dans un fichier compressé"""
+
+    def __init__(self, path: Path, compression: str):
+        archive_extension(compression)
+        self.count = 0
+        self._raw = open(path, "wb")
+        if compression == "zstd":
+            import zstandard
+
+            compressor = zstandard.ZstdCompressor(level=settings.action_archive_zstd_level)
+            self._stream = compressor.stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb")
+
+    def write(self, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self._stream.write(json.dumps(dict(row), default=json_default, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.count += 1
+
+    def close(self):
+        self._stream.close()
+        self._raw.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_jsonl(data: bytes, key: str) -> List[Dict[str, Any]]:
+    """Décompresse et décode un fichier d'archive (format déduit de l'extension)"""
+    if key.endswith(COMPRESSION_EXTENSIONS["zstd"]):
+        import zstandard
+
+        content = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    else:
+        content = gzip.decompress(data)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
@@ -0,0 +1,79 @@
+"""
+Cache de l'authentification.
+Chaque requête authentifiée décodait le token JWT puis relisait l'utilisateur
+en base. Les claims décodés sont mémorisés jusqu'à l'expiration du token, et
+les utilisateurs sont conservés quelques secondes (auth_user_cache_ttl) dans un
+cache LRU en mémoire, indexé par l'ID de l'utilisateur et la version de ses
+tokens. Les modifications d'un utilisateur (PUT/DELETE /users/{id}) invalident
+son entrée ; dans les autres processus, l'entrée expire au plus tard après le TTL.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from jose import jwt
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.user import User
+
+claims_cache = TTLCache(settings.auth_claims_cache_max_entries)
+user_cache = TTLCache(settings.auth_user_cache_max_entries)
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Décode un token JWT, en mémorisant ses claims jusqu'à son expiration.
+
+    Raises:
+        jose.JWTError: Si le token est invalide ou expiré
+    """
+    claims = claims_cache.get(token)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+    expires_at = claims.get("exp")
+    if expires_at is not None:
+        claims_cache.set(token, claims, float(expires_at) - time.time())
+
+    return claims
+
+def token_version(claims: Dict[str, Any]) -> int:
+    """Version du token (0 pour les tokens émis avant l'ajout de la version)"""
+    return claims.get("ver", 0)
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    """Valeurs des colonnes d'un utilisateur"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+async def get_user(db: AsyncSession, user_id: int, version: int) -> Optional[User]:
+    """
+    Retourne l'utilisateur en cache, rattaché à la session sans requête SQL.
+
+    Returns:
+        L'utilisateur, ou None s'il n'est pas en cache pour cette version de token
+    """
+    values = user_cache.get(user_id)
+    if values is None or values["token_version"] != version:
+        return None
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+def set_user(user: User):
+    """Met en cache un utilisateur lu en base"""
+    user_cache.set(user.id, _snapshot(user), settings.auth_user_cache_ttl)
+
+def invalidate_user(user_id: int):
+    """Retire un utilisateur du cache (après sa modification ou sa suppression)"""
+    user_cache.pop(user_id)
+
+def clear():
+    """Vide les caches de l'authentification"""
+    claims_cache.clear()
+    user_cache.clear()
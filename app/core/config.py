@@ -1,4 +1,5 @@
 
+from typing import Optional
 from pydantic_settings import BaseSettings 
 class Settings(BaseSettings):
     env: str = "development"
@@ -6,6 +7,19 @@ class Settings(BaseSettings):
     OPENROUTER_API_KEY: str
     OPENAI_API_KEY: str
     algorithm: str 
+
+    # Hachage des mots de passe : coût bcrypt (log2 des itérations) et threads dédiés
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 4
+
+    # Cache de l'authentification (0 pour désactiver le cache des utilisateurs)
+    auth_user_cache_ttl: float = 30.0  # En secondes
+    auth_user_cache_max_entries: int = 10000
+    auth_claims_cache_max_entries: int = 10000
+
+    # Index en mémoire des joueurs de chaque session (vérification des permissions)
+    session_membership_cache_ttl: float = 60.0  # En secondes
+    session_membership_cache_max_entries: int = 50000
     postgres_host: str
     postgres_port: int
     postgres_user: str
@@ -15,6 +29,75 @@ class Settings(BaseSettings):
     redis_url: str
     llm_endpoint: str
 
+    # Pool de connexions HTTP vers le LLM
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0  # En secondes
+    llm_http2: bool = True
+    llm_timeout: float = 120.0  # En secondes
+    llm_connect_timeout: float = 5.0  # En secondes
+
+    # Nombre maximum d'appels simultanés au LLM par processus
+    llm_max_concurrency: int = 16
+
+    # Budget de tokens du prompt des actions et tokenizer utilisé pour le mesurer
+    # ("tiktoken:<encodage>", "hf:<modèle>" ; estimation rapide si vide)
+    llm_prompt_token_budget: int = 3000
+    llm_tokenizer: Optional[str] = None
+
+    # Combats : rounds résolus au maximum par rencontre et tokens de la narration
+    combat_max_rounds: int = 20
+    combat_narration_max_tokens: int = 250
+
+    # File de tâches des actions (POST /actions/jobs) et workers
+    action_job_ttl: int = 86400  # En secondes
+    action_jobs_stream_maxlen: int = 100000
+    action_job_claim_idle_ms: int = 300000  # Reprise des tâches non acquittées après 5 minutes
+    action_worker_concurrency: int = 8
+
+    # Événements temps réel des sessions (WebSocket)
+    session_events_maxlen: int = 1000  # Événements conservés par session pour la reprise
+    session_events_ttl: int = 86400  # En secondes
+    session_events_queue_size: int = 256  # Événements en attente par connexion avant déconnexion
+    session_events_send_timeout: float = 10.0  # En secondes
+
+    # Cache des réponses du LLM (descriptions de scènes, dialogues de PNJ)
+    llm_cache_ttl: int = 604800  # En secondes (7 jours)
+    llm_cache_max_entries: int = 10000
+
+    # Cache du rendu HTML du markdown des scènes
+    render_cache_ttl: int = 604800  # En secondes (7 jours)
+    markdown_render_workers: int = 0  # Processus de rendu markdown (0 : nombre de cœurs)
+
+    # Fenêtre de contexte des sessions : au-delà du budget, les actions anciennes sont résumées
+    context_window_token_budget: int = 1500
+    context_window_keep_recent: int = 6
+    context_window_max_entries: int = 50
+    story_summary_max_tokens: int = 400
+
+    # Partitions mensuelles de action_logs : mois créés à l'avance et mois conservés
+    action_logs_partitions_ahead: int = 3
+    action_logs_retention_months: int = 12
+
+    # Instantanés de l'état des sessions : intervalle (secondes) et nombre conservé par session
+    session_snapshot_interval: float = 300.0
+    session_snapshot_keep: int = 3
+    session_snapshot_compression_level: int = 6
+
+    # Archivage des logs d'action (file://chemin ou s3://bucket/préfixe)
+    action_archive_url: str = "file://./archives"
+    action_archive_s3_endpoint: Optional[str] = None
+    action_archive_compression: str = "zstd"
+    action_archive_zstd_level: int = 10
+    action_archive_after_days: int = 90
+    action_archive_stopped_after_days: int = 7
+    action_archive_batch_size: int = 1000
+    action_archive_cache_ttl: float = 300.0
+    action_archive_cache_entries: int = 32
+
+    # Taille maximale des pages des listes de l'API
+    api_max_page_size: int = 200
+
     api_host: str = "0.0.0.0"
     api_port: int = 8000
 
@@ -0,0 +1,141 @@
+"""
+File de tâches de génération des actions (Redis Streams).
+L'API enregistre l'action puis publie une tâche dans un stream Redis ; des
+workers indépendants (app.workers.action_worker) la consomment via un groupe
+de consommateurs, appellent le LLM et publient le résultat. L'état de chaque
+tâche est conservé dans Redis pour le polling, et chaque changement d'état est
+annoncé sur un canal pub/sub dédié.
+"""
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+
+from app.core import redis
+from app.core.config import settings
+
+ACTION_JOBS_STREAM = "action_jobs"
+ACTION_JOBS_GROUP = "action_workers"
+JOB_KEY_PREFIX = "action_job:"
+
+class JobStatus:
+    """États d'une tâche de génération"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+def job_key(job_id: str) -> str:
+    """Clé Redis de l'état d'une tâche"""
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+def job_channel(job_id: str) -> str:
+    """Canal pub/sub des changements d'état d'une tâche"""
+    return f"{JOB_KEY_PREFIX}{job_id}:events"
+
+async def ensure_consumer_group():
+    """Crée le stream et le groupe de consommateurs s'ils n'existent pas"""
+    try:
+        await redis.redis_client.xgroup_create(
+            ACTION_JOBS_STREAM, ACTION_JOBS_GROUP, id="0", mkstream=True
+        )
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+async def enqueue_action_job(payload: Dict[str, Any], user_id: int) -> str:
+    """
+    Publie une tâche de génération dans le stream.
+
+    Args:
+        payload: Données nécessaires au worker (action, contexte LLM, etc.)
+        user_id: Utilisateur propriétaire de la tâche
+
+    Returns:
+        Identifiant de la tâche
+    """
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "status": JobStatus.QUEUED,
+        "user_id": user_id,
+        "action_id": payload.get("action_id"),
+        "created_at": datetime.now().isoformat(),
+        "result": None,
+        "error": None
+    }
+
+    async with redis.redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(job_key(job_id), json.dumps(job), ex=settings.action_job_ttl)
+        pipe.xadd(
+            ACTION_JOBS_STREAM,
+            {"job_id": job_id, "payload": json.dumps(payload, default=str)},
+            maxlen=settings.action_jobs_stream_maxlen,
+            approximate=True
+        )
+        await pipe.execute()
+
+    return job_id
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Récupère l'état d'une tâche (None si inconnue ou expirée)"""
+    job_json = await redis.redis_client.get(job_key(job_id))
+    return json.loads(job_json) if job_json else None
+
+async def update_job(job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    """Met à jour l'état d'une tâche et annonce le changement sur son canal"""
+    job = await get_job(job_id)
+    if job is None:
+        return
+
+    job["status"] = status
+    job["result"] = result
+    job["error"] = error
+    job["updated_at"] = datetime.now().isoformat()
+
+    job_json = json.dumps(job, default=str)
+    async with redis.redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(job_key(job_id), job_json, ex=settings.action_job_ttl)
+        pipe.publish(job_channel(job_id), job_json)
+        await pipe.execute()
+
+async def read_jobs(consumer: str, count: int = 1, block: int = 5000) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Lit de nouvelles tâches pour un consommateur du groupe.
+
+    Returns:
+        Liste de tuples (identifiant du message, identifiant de la tâche, données)
+    """
+    response = await redis.redis_client.xreadgroup(
+        ACTION_JOBS_GROUP, consumer, {ACTION_JOBS_STREAM: ">"}, count=count, block=block
+    )
+    return [
+        (message_id, fields["job_id"], json.loads(fields["payload"]))
+        for _, messages in response or []
+        for message_id, fields in messages
+    ]
+
+async def claim_stale_jobs(consumer: str, min_idle_time: int, count: int = 10) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Récupère les tâches restées sans acquittement (worker arrêté pendant le traitement).
+
+    Args:
+        consumer: Consommateur qui reprend les tâches
+        min_idle_time: Délai minimum sans acquittement, en millisecondes
+        count: Nombre maximum de tâches reprises
+    """
+    _, messages, *_ = await redis.redis_client.xautoclaim(
+        ACTION_JOBS_STREAM, ACTION_JOBS_GROUP, consumer, min_idle_time, start_id="0-0", count=count
+    )
+    return [
+        (message_id, fields["job_id"], json.loads(fields["payload"]))
+        for message_id, fields in messages
+        if fields
+    ]
+
+async def ack_job(message_id: str):
+    """Acquitte une tâche traitée"""
+    await redis.redis_client.xack(ACTION_JOBS_STREAM, ACTION_JOBS_GROUP, message_id)
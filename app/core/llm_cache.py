@@ -0,0 +1,111 @@
+"""
+Cache des réponses du LLM.
+Les réponses sont indexées par une empreinte canonique du prompt rendu et des
+paramètres du modèle, et stockées dans Redis avec un TTL. Un index trié par
+date de dernier accès permet d'évincer les entrées les moins récemment utilisées.
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from app.core import llm_client, redis
+from app.core.config import settings
+
+CACHE_KEY_PREFIX = "llm_cache:"
+CACHE_INDEX_KEY = "llm_cache:index"
+
+def cache_key(messages: list, **params) -> str:
+    """
+    Calcule la clé de cache d'un appel au LLM.
+
+    Args:
+        messages: Messages au format OpenAI
+        **params: Paramètres du modèle (max_tokens, temperature, etc.)
+
+    Returns:
+        Clé Redis dérivée de l'empreinte SHA-256 de la requête canonique
+    """
+    canonical = json.dumps(
+        {"model": llm_client.LLM_MODEL, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return CACHE_KEY_PREFIX + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+async def get_cached_response(key: str) -> Optional[Dict[str, Any]]:
+    """Récupère une réponse en cache et met à jour sa date de dernier accès"""
+    try:
+        cached = await redis.redis_client.get(key)
+        if cached is None:
+            # Entrée expirée : la retirer de l'index
+            await redis.redis_client.zrem(CACHE_INDEX_KEY, key)
+            return None
+
+        async with redis.redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(CACHE_INDEX_KEY, {key: time.time()})
+            pipe.expire(key, settings.llm_cache_ttl)
+            await pipe.execute()
+
+        return json.loads(cached)
+    except (RedisError, ValueError):
+        # Le cache est facultatif : en cas d'erreur, appeler le LLM
+        return None
+
+async def set_cached_response(key: str, response: Dict[str, Any]):
+    """Stocke une réponse en cache et évince les entrées les moins récemment utilisées"""
+    try:
+        now = time.time()
+        async with redis.redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(key, json.dumps(response, ensure_ascii=False), ex=settings.llm_cache_ttl)
+            pipe.zadd(CACHE_INDEX_KEY, {key: now})
+            # Retirer de l'index les entrées non consultées depuis le TTL (expirées)
+            pipe.zremrangebyscore(CACHE_INDEX_KEY, "-inf", f"({now - settings.llm_cache_ttl}")
+            pipe.zcard(CACHE_INDEX_KEY)
+            results = await pipe.execute()
+
+        excess = results[-1] - settings.llm_cache_max_entries
+        if excess > 0:
+            evicted = await redis.redis_client.zpopmin(CACHE_INDEX_KEY, excess)
+            if evicted:
+                await redis.redis_client.delete(*[evicted_key for evicted_key, _ in evicted])
+    except RedisError:
+        pass
+
+async def cached_call_llm(
+    messages: list,
+    max_tokens=500,
+    temperature=0.7,
+    bypass_cache: bool = False,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Appelle le LLM en réutilisant une réponse en cache pour un prompt identique.
+
+    Args:
+        messages: Messages au format OpenAI
+        max_tokens: Nombre maximum de tokens à générer
+        temperature: Température d'échantillonnage
+        bypass_cache: Si True, ignore le cache et le rafraîchit avec une nouvelle génération
+        **kwargs: Options d'appel transmises à llm_client.call_llm (priorité, timeout, etc.)
+
+    Returns:
+        Réponse JSON du LLM
+    """
+    key = cache_key(messages, max_tokens=max_tokens, temperature=temperature)
+
+    if not bypass_cache:
+        cached = await get_cached_response(key)
+        if cached is not None:
+            return cached
+
+    response = await llm_client.call_llm(
+        messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+    )
+    await set_cached_response(key, response)
+
+    return response
@@ -1,14 +1,397 @@
+"""
+Client HTTP pour le modèle de langage (LLM).
+Un unique httpx.AsyncClient est partagé par tout le processus : il est créé au
+démarrage de l'application et fermé à l'arrêt, afin de réutiliser les
+connexions keep-alive vers le serveur d'inférence.
+Les appels passent par un ordonnanceur qui borne le nombre de requêtes
+simultanées et répartit équitablement les places entre sessions et utilisateurs.
+"""
+
+import asyncio
+import enum
+import json
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Hashable, Optional
+
 import httpx
+
 from app.core.config import settings
 
-async def call_llm(messages: list, max_tokens=500, temperature=0.7):
+LLM_MODEL = "shuyuej/Mistral-Nemo-Instruct-2407-GPTQ-INT8"
+
+# Client partagé (initialisé par init_llm_client au démarrage de l'application)
+_client: Optional[httpx.AsyncClient] = None
+
+# Compteurs d'utilisation du pool
+_stats = {
+    "http2": False,
+    "requests_total": 0,
+    "requests_failed": 0,
+    "requests_in_flight": 0,
+    "max_in_flight": 0,
+    "total_request_time": 0.0,
+}
+
+class LLMPriority(enum.IntEnum):
+    """Classes de priorité des appels au LLM (la plus petite valeur passe en premier)"""
+    INTERACTIVE = 0  # Actions des joueurs
+    BATCH = 1  # Génération de contenu (descriptions de scènes, etc.)
+
+class LLMScheduler:
+    """
+    Ordonnanceur des appels au LLM.
+    Limite le nombre d'appels simultanés et sert les appels en attente par
+    priorité stricte, puis à tour de rôle entre sessions et, au sein d'une
+    session, entre utilisateurs.
+    """
+    
+    def __init__(self, max_concurrency: int):
+        """Initialise l'ordonnanceur"""
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        # priorité -> session -> utilisateur -> file d'attente
+        self._queues: Dict[LLMPriority, "OrderedDict[Hashable, OrderedDict[Hashable, Deque[asyncio.Future]]]"] = {
+            priority: OrderedDict() for priority in LLMPriority
+        }
+        self._waiting = {priority: 0 for priority in LLMPriority}
+        self._wait_stats = {
+            priority: {"acquired": 0, "total_wait_time": 0.0, "max_wait_time": 0.0}
+            for priority in LLMPriority
+        }
+    
+    async def acquire(
+        self,
+        priority: LLMPriority = LLMPriority.INTERACTIVE,
+        session_id: Optional[Hashable] = None,
+        user_id: Optional[Hashable] = None
+    ):
+        """Attend qu'une place soit disponible pour un appel au LLM"""
+        start_time = time.perf_counter()
+        
+        if self.active < self.max_concurrency and not any(self._waiting.values()):
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            users = self._queues[priority].setdefault(session_id, OrderedDict())
+            users.setdefault(user_id, deque()).append(future)
+            self._waiting[priority] += 1
+            
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # La place a été attribuée juste avant l'annulation : la rendre
+                    self.release()
+                else:
+                    self._remove(priority, session_id, user_id, future)
+                raise
+        
+        wait_time = time.perf_counter() - start_time
+        stats = self._wait_stats[priority]
+        stats["acquired"] += 1
+        stats["total_wait_time"] += wait_time
+        stats["max_wait_time"] = max(stats["max_wait_time"], wait_time)
+    
+    def release(self):
+        """Libère une place et la transmet au prochain appel en attente"""
+        self.active -= 1
+        
+        while self.active < self.max_concurrency:
+            future = self._next_waiter()
+            if future is None:
+                return
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+    
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: LLMPriority = LLMPriority.INTERACTIVE,
+        session_id: Optional[Hashable] = None,
+        user_id: Optional[Hashable] = None
+    ):
+        """Réserve une place pour la durée d'un appel au LLM"""
+        await self.acquire(priority, session_id, user_id)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """Retire le prochain appel à servir (priorité, puis tourniquet session/utilisateur)"""
+        for priority in LLMPriority:
+            sessions = self._queues[priority]
+            if not sessions:
+                continue
+            
+            session_id, users = next(iter(sessions.items()))
+            user_id, waiters = next(iter(users.items()))
+            future = waiters.popleft()
+            self._waiting[priority] -= 1
+            
+            # Passer la main à l'utilisateur et à la session suivants
+            if waiters:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            if users:
+                sessions.move_to_end(session_id)
+            else:
+                del sessions[session_id]
+            
+            return future
+        return None
+    
+    def _remove(self, priority: LLMPriority, session_id, user_id, future: asyncio.Future):
+        """Retire un appel annulé de sa file d'attente"""
+        users = self._queues[priority].get(session_id)
+        waiters = users.get(user_id) if users is not None else None
+        if waiters is None or future not in waiters:
+            return
+        
+        waiters.remove(future)
+        self._waiting[priority] -= 1
+        if not waiters:
+            del users[user_id]
+        if not users:
+            del self._queues[priority][session_id]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Retourne les métriques de l'ordonnanceur (profondeur des files, temps d'attente)"""
+        by_priority = {}
+        for priority in LLMPriority:
+            stats = self._wait_stats[priority]
+            by_priority[priority.name.lower()] = {
+                "queue_depth": self._waiting[priority],
+                "waiting_sessions": len(self._queues[priority]),
+                "acquired": stats["acquired"],
+                "average_wait_time": (
+                    stats["total_wait_time"] / stats["acquired"] if stats["acquired"] else 0.0
+                ),
+                "max_wait_time": stats["max_wait_time"],
+            }
+        
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "queue_depth": sum(self._waiting.values()),
+            "priorities": by_priority,
+        }
+
+# Ordonnanceur partagé par tous les appels du processus
+scheduler = LLMScheduler(settings.llm_max_concurrency)
+
+def _http2_available() -> bool:
+    """Vérifie si le support HTTP/2 (paquet h2) est installé"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _build_client() -> httpx.AsyncClient:
+    """Construit le client HTTP partagé à partir de la configuration"""
+    limits = httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout)
+    _stats["http2"] = settings.llm_http2 and _http2_available()
+    return httpx.AsyncClient(
+        base_url=settings.llm_endpoint,
+        limits=limits,
+        timeout=timeout,
+        http2=_stats["http2"],
+    )
+
+async def init_llm_client() -> httpx.AsyncClient:
+    """Crée le client HTTP partagé (appelé au démarrage de l'application)"""
+    return get_llm_client()
+
+async def close_llm_client():
+    """Ferme le client HTTP partagé (appelé à l'arrêt de l'application)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_llm_client() -> httpx.AsyncClient:
+    """
+    Retourne le client HTTP partagé.
+    Le client est créé à la demande s'il n'a pas été initialisé (scripts, tâches hors application).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Retourne les métriques d'utilisation du pool de connexions vers le LLM"""
+    connections = []
+    if _client is not None and not _client.is_closed:
+        # httpx n'expose pas le pool publiquement : lecture défensive de httpcore
+        pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+
+    idle = sum(1 for conn in connections if conn.is_idle())
+    requests_total = _stats["requests_total"]
+
+    return {
+        "client_open": _client is not None and not _client.is_closed,
+        "http2": _stats["http2"],
+        "max_connections": settings.llm_max_connections,
+        "max_keepalive_connections": settings.llm_max_keepalive_connections,
+        "connections_open": len(connections),
+        "connections_idle": idle,
+        "connections_active": len(connections) - idle,
+        "requests_total": requests_total,
+        "requests_failed": _stats["requests_failed"],
+        "requests_in_flight": _stats["requests_in_flight"],
+        "max_in_flight": _stats["max_in_flight"],
+        "average_request_time": (
+            _stats["total_request_time"] / requests_total if requests_total else 0.0
+        ),
+        "scheduler": scheduler.stats(),
+    }
+
+@contextmanager
+def _track_request():
+    """Met à jour les compteurs d'utilisation autour d'une requête vers le LLM"""
+    _stats["requests_total"] += 1
+    _stats["requests_in_flight"] += 1
+    _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["requests_in_flight"])
+    start_time = time.perf_counter()
+    try:
+        yield
+    except (GeneratorExit, asyncio.CancelledError):
+        # Flux abandonné par l'appelant : ce n'est pas un échec de la requête
+        raise
+    except BaseException:
+        _stats["requests_failed"] += 1
+        raise
+    finally:
+        _stats["requests_in_flight"] -= 1
+        _stats["total_request_time"] += time.perf_counter() - start_time
+
+def _request_kwargs(timeout: Optional[float]) -> Dict[str, Any]:
+    """Construit les options de requête (timeout spécifique à l'appel)"""
+    if timeout is None:
+        return {}
+    return {"timeout": httpx.Timeout(timeout, connect=settings.llm_connect_timeout)}
+
+async def call_llm(
+    messages: list,
+    max_tokens=500,
+    temperature=0.7,
+    timeout: Optional[float] = None,
+    priority: LLMPriority = LLMPriority.INTERACTIVE,
+    session_id: Optional[int] = None,
+    user_id: Optional[int] = None
+):
+    """
+    Appelle l'endpoint chat/completions du LLM via le client partagé.
+
+    Args:
+        messages: Messages au format OpenAI
+        max_tokens: Nombre maximum de tokens à générer
+        temperature: Température d'échantillonnage
+        timeout: Timeout spécifique à cet appel (en secondes), sinon celui de la configuration
+        priority: Classe de priorité de l'appel
+        session_id: Session de jeu à l'origine de l'appel (répartition équitable)
+        user_id: Utilisateur à l'origine de l'appel (répartition équitable)
+
+    Returns:
+        Réponse JSON du LLM
+    """
     payload = {
-        "model": "shuyuej/Mistral-Nemo-Instruct-2407-GPTQ-INT8",
+        "model": LLM_MODEL,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{settings.llm_endpoint}/chat/completions", json=payload)
-        response.raise_for_status()
-        return response.json()
+    client = get_llm_client()
+
+    async with scheduler.slot(priority, session_id, user_id):
+        with _track_request():
+            response = await client.post("/chat/completions", json=payload, **_request_kwargs(timeout))
+            response.raise_for_status()
+            return response.json()
+
+async def stream_llm(
+    messages: list,
+    max_tokens=500,
+    temperature=0.7,
+    timeout: Optional[float] = None,
+    priority: LLMPriority = LLMPriority.INTERACTIVE,
+    session_id: Optional[int] = None,
+    user_id: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Appelle l'endpoint chat/completions du LLM en mode streaming (stream=true).
+    La place dans l'ordonnanceur est libérée dès la fin de la réponse du LLM,
+    les fragments non encore consommés restant en mémoire.
+
+    Args:
+        messages: Messages au format OpenAI
+        max_tokens: Nombre maximum de tokens à générer
+        temperature: Température d'échantillonnage
+        timeout: Timeout spécifique à cet appel (en secondes), sinon celui de la configuration
+        priority: Classe de priorité de l'appel
+        session_id: Session de jeu à l'origine de l'appel (répartition équitable)
+        user_id: Utilisateur à l'origine de l'appel (répartition équitable)
+
+    Yields:
+        Fragments JSON (chunks) de la réponse, le dernier portant l'usage en tokens
+    """
+    payload = {
+        "model": LLM_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+        "stream_options": {"include_usage": True}
+    }
+    client = get_llm_client()
+
+    # La réponse amont est lue par une tâche qui ne garde sa place dans
+    # l'ordonnanceur que jusqu'à la fin de la réponse du LLM : un appelant lent
+    # (ex. un client SSE) n'occupe pas une place pendant qu'il consomme les fragments
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    async def read_upstream():
+        try:
+            async with scheduler.slot(priority, session_id, user_id):
+                with _track_request():
+                    async with client.stream(
+                        "POST", "/chat/completions", json=payload, **_request_kwargs(timeout)
+                    ) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            # Format Server-Sent Events : "data: {...}" puis "data: [DONE]"
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+                            chunks.put_nowait(json.loads(data))
+        except Exception as e:
+            chunks.put_nowait(e)
+        else:
+            chunks.put_nowait(None)
+
+    reader = asyncio.create_task(read_upstream())
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        # Flux abandonné par l'appelant : interrompre la lecture amont
+        reader.cancel()
@@ -0,0 +1,210 @@
+"""
+Partitionnement mensuel de la table action_logs (PostgreSQL).
+La table est partitionnée par intervalle sur action_timestamp : une partition
+par mois (action_logs_AAAA_MM) et une partition par défaut qui recueille les
+lignes hors des mois créés. Les requêtes filtrant ou paginant sur
+action_timestamp ne parcourent que les partitions concernées, et les mois
+anciens sont détachés d'un bloc au lieu d'être supprimés ligne par ligne
+(ni VACUUM ni gonflement des index sur la table active).
+
+Les fonctions prennent une connexion asynchrone ouverte dans une transaction
+et ne font rien sur les autres bases (SQLite des tests).
+"""
+
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.models.action_log import ActionLog
+
+TABLE_NAME = ActionLog.__tablename__
+DEFAULT_PARTITION = f"{TABLE_NAME}_default"
+
+def month_start(day: date) -> date:
+    """Premier jour du mois"""
+    return date(day.year, day.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    """Premier jour du mois décalé de `months` mois"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    """Nom de la partition d'un mois"""
+    return f"{TABLE_NAME}_{month.year:04d}_{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    """Mois d'une partition d'après son nom (None pour la partition par défaut)"""
+    suffix = name[len(TABLE_NAME) + 1:]
+    try:
+        year, month = suffix.split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+def is_postgresql(conn: AsyncConnection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    """Vrai si action_logs est une table partitionnée"""
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": TABLE_NAME}
+    )
+    return result.scalar() == "p"
+
+async def list_partitions(conn: AsyncConnection) -> List[str]:
+    """Noms des partitions attachées à action_logs"""
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table) ORDER BY child.relname"
+        ),
+        {"table": TABLE_NAME}
+    )
+    return list(result.scalars())
+
+async def create_month_partition(conn: AsyncConnection, month: date) -> bool:
+    """
+    Crée la partition d'un mois si elle n'existe pas.
+    Les lignes de ce mois déjà arrivées dans la partition par défaut y sont
+    déplacées avant l'attachement (sinon PostgreSQL refuse de l'attacher).
+
+    Returns:
+        True si la partition a été créée
+    """
+    name = partition_name(month)
+    result = await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})
+    if result.scalar() is not None:
+        return False
+
+    # Les bornes proviennent d'objets date : pas d'injection possible
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE_NAME} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await conn.execute(text(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE action_timestamp >= '{start}' AND action_timestamp < '{end}' "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+    ))
+    await conn.execute(text(
+        f"ALTER TABLE {TABLE_NAME} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+    return True
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    months_ahead: Optional[int] = None,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Crée la partition par défaut et les partitions du mois courant et des mois à venir.
+
+    Returns:
+        Noms des partitions créées
+    """
+    if not is_postgresql(conn) or not await is_partitioned(conn):
+        return []
+
+    if months_ahead is None:
+        months_ahead = settings.action_logs_partitions_ahead
+    current = month_start(today or date.today())
+
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE_NAME} DEFAULT"))
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if await create_month_partition(conn, month):
+            created.append(partition_name(month))
+    return created
+
+async def detach_expired_partitions(
+    conn: AsyncConnection,
+    retention_months: Optional[int] = None,
+    drop: bool = False,
+    today: Optional[date] = None
+) -> List[Tuple[str, date]]:
+    """
+    Détache les partitions des mois antérieurs à la période de rétention.
+    Une partition détachée devient une table indépendante, prête à être
+    archivée ; elle est supprimée si `drop` est vrai.
+
+    Returns:
+        Liste (nom de la partition, mois) des partitions détachées
+    """
+    if not is_postgresql(conn) or not await is_partitioned(conn):
+        return []
+
+    if retention_months is None:
+        retention_months = settings.action_logs_retention_months
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+
+    detached = []
+    for name in await list_partitions(conn):
+        month = partition_month(name)
+        if month is None or month >= cutoff:
+            continue
+
+        await conn.execute(text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {name}"))
+        if drop:
+            await conn.execute(text(f"DROP TABLE {name}"))
+        detached.append((name, month))
+    return detached
+
+async def convert_to_partitioned(conn: AsyncConnection) -> bool:
+    """
+    Convertit une table action_logs ordinaire (bases créées avant le
+    partitionnement) en table partitionnée, en conservant les IDs.
+    L'ancienne table est renommée le temps de la copie puis supprimée.
+
+    Returns:
+        True si la table a été convertie
+    """
+    if not is_postgresql(conn) or await is_partitioned(conn):
+        return False
+
+    legacy = f"{TABLE_NAME}_legacy"
+
+    # Libérer les noms de la table, de ses index et de sa séquence
+    await conn.execute(text(f"ALTER TABLE {TABLE_NAME} RENAME TO {legacy}"))
+    result = await conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table"),
+        {"table": legacy}
+    )
+    for index_name in result.scalars().all():
+        await conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"'))
+    await conn.execute(text(f"ALTER SEQUENCE IF EXISTS {TABLE_NAME}_id_seq RENAME TO {legacy}_id_seq"))
+
+    await conn.run_sync(lambda sync_conn: ActionLog.__table__.create(sync_conn))
+
+    # Créer les partitions couvrant les lignes existantes, puis copier
+    result = await conn.execute(text(
+        f"SELECT min(COALESCE(action_timestamp, created_at)), max(COALESCE(action_timestamp, created_at)) FROM {legacy}"
+    ))
+    oldest, newest = result.first()
+    await ensure_partitions(conn)
+    if oldest is not None:
+        month, last = month_start(oldest), month_start(max(newest, datetime.now()))
+        while month <= last:
+            await create_month_partition(conn, month)
+            month = add_months(month, 1)
+
+    names = [column.name for column in ActionLog.__table__.columns]
+    values = [
+        "COALESCE(action_timestamp, created_at)" if name == "action_timestamp" else name
+        for name in names
+    ]
+    await conn.execute(text(
+        f"INSERT INTO {TABLE_NAME} ({', '.join(names)}) SELECT {', '.join(values)} FROM {legacy}"
+    ))
+    await conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE_NAME}', 'id'), "
+        f"COALESCE((SELECT max(id) FROM {TABLE_NAME}), 0) + 1, false)"
+    ))
+    await conn.execute(text(f"DROP TABLE {legacy}"))
+    return True
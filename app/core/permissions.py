@@ -0,0 +1,154 @@
+"""
+Résolution des permissions sur les sessions de jeu, personnages et scènes.
+Chaque vérification charge l'objet demandé et tout ce qui décide de l'accès
+(maître de jeu de la session, appartenance de l'utilisateur à la session,
+scénario parent) en une seule requête jointe.
+Les appartenances connues (l'utilisateur a un personnage dans la session) sont
+conservées dans un index en mémoire ; il est mis à jour à la création et à la
+suppression des personnages, et ses entrées expirent après
+session_membership_cache_ttl (les autres processus ne sont pas notifiés).
+"""
+
+import enum
+from typing import Optional, Tuple
+
+from sqlalchemy import exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.character import Character
+from app.models.game_session import GameSession
+from app.models.scenario import Scenario
+from app.models.scene import Scene
+from app.models.user import User
+
+class SessionRole(str, enum.Enum):
+    """Rôle d'un utilisateur dans une session de jeu"""
+    ADMIN = "admin"
+    GAME_MASTER = "game_master"
+    PLAYER = "player"
+
+# Index des appartenances connues : (session_id, user_id) -> True
+membership_cache = TTLCache(settings.session_membership_cache_max_entries)
+
+def remember_player(session_id: int, user_id: int):
+    """Enregistre qu'un utilisateur a un personnage dans une session"""
+    membership_cache.set((session_id, user_id), True, settings.session_membership_cache_ttl)
+
+def forget_player(session_id: int, user_id: int):
+    """Invalide l'appartenance d'un utilisateur à une session (suppression d'un personnage)"""
+    membership_cache.pop((session_id, user_id))
+
+def is_player_clause(user_id: int, session_id=GameSession.id):
+    """Condition SQL : l'utilisateur a un personnage dans la session"""
+    return exists().where(
+        Character.game_session_id == session_id,
+        Character.user_id == user_id
+    )
+
+def session_role(session: GameSession, user: User, is_player: bool) -> Optional[SessionRole]:
+    """Rôle de l'utilisateur dans la session (None s'il n'y a pas accès)"""
+    if user.is_superuser:
+        return SessionRole.ADMIN
+    if session.game_master_id == user.id:
+        return SessionRole.GAME_MASTER
+    if is_player:
+        return SessionRole.PLAYER
+    return None
+
+def _known_access(session_id: int, user: User) -> bool:
+    """Vrai si l'accès est acquis sans vérifier l'appartenance en base"""
+    return user.is_superuser or membership_cache.get((session_id, user.id)) is not None
+
+async def resolve_session_access(
+    db: AsyncSession,
+    session_id: int,
+    user: User
+) -> Tuple[Optional[GameSession], Optional[SessionRole]]:
+    """
+    Charge une session de jeu et le rôle de l'utilisateur en une requête.
+
+    Returns:
+        Tuple (session ou None si elle n'existe pas, rôle ou None si accès refusé)
+    """
+    if _known_access(session_id, user):
+        result = await db.execute(select(GameSession).filter(GameSession.id == session_id))
+        session = result.scalars().first()
+        return session, session and session_role(session, user, True)
+
+    result = await db.execute(
+        select(GameSession, is_player_clause(user.id).label("is_player"))
+        .filter(GameSession.id == session_id)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+
+    session, is_player = row
+    if is_player:
+        remember_player(session_id, user.id)
+    return session, session_role(session, user, is_player)
+
+async def get_session_role(db: AsyncSession, session: GameSession, user: User) -> Optional[SessionRole]:
+    """Rôle de l'utilisateur dans une session déjà chargée"""
+    if _known_access(session.id, user) or session.game_master_id == user.id:
+        return session_role(session, user, True)
+
+    result = await db.execute(select(is_player_clause(user.id, session.id)))
+    is_player = bool(result.scalar())
+    if is_player:
+        remember_player(session.id, user.id)
+    return session_role(session, user, is_player)
+
+async def resolve_character_access(
+    db: AsyncSession,
+    character_id: int,
+    user: User
+) -> Tuple[Optional[Character], bool, bool]:
+    """
+    Charge un personnage et le maître de jeu de sa session en une requête.
+
+    Returns:
+        Tuple (personnage ou None, accès autorisé, utilisateur maître de jeu de la session)
+    """
+    result = await db.execute(
+        select(Character, GameSession.game_master_id)
+        .outerjoin(GameSession, GameSession.id == Character.game_session_id)
+        .filter(Character.id == character_id)
+    )
+    row = result.first()
+    if row is None:
+        return None, False, False
+
+    character, game_master_id = row
+    is_game_master = game_master_id is not None and game_master_id == user.id
+    allowed = character.user_id == user.id or is_game_master or user.is_superuser
+    return character, allowed, is_game_master
+
+async def resolve_scene_access(
+    db: AsyncSession,
+    scene_id: int,
+    user: User
+) -> Tuple[Optional[Scene], Optional[Scenario], bool]:
+    """
+    Charge une scène et son scénario en une requête.
+
+    Returns:
+        Tuple (scène ou None, scénario ou None, accès autorisé)
+    """
+    result = await db.execute(
+        select(Scene, Scenario)
+        .outerjoin(Scenario, Scenario.id == Scene.scenario_id)
+        .filter(Scene.id == scene_id)
+    )
+    row = result.first()
+    if row is None:
+        return None, None, False
+
+    scene, scenario = row
+    allowed = scenario is not None and (
+        scenario.creator_id == user.id or scenario.is_published or user.is_superuser
+    )
+    return scene, scenario, allowed
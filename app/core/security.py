@@ -1,5 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,14 +9,30 @@ from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import auth_cache
 from app.core.config import settings
 from app.core.database import get_db
 from app.schemas.user import TokenData
 from app.models.user import User
 from sqlalchemy.future import select
 
-# Configuration du hachage de mot de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuration du hachage de mot de passe : les hachages dont le coût diffère
+# de password_hash_rounds sont recalculés à la connexion suivante
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.password_hash_rounds,
+    bcrypt__min_rounds=settings.password_hash_rounds,
+    bcrypt__max_rounds=settings.password_hash_rounds,
+)
+
+# bcrypt bloque le thread appelant pendant des dizaines de millisecondes :
+# les hachages sont exécutés par un pool de threads dédié et borné pour ne pas
+# bloquer la boucle d'événements
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
 
 # Configuration de l'authentification OAuth2
 oauth2_scheme = OAuth2PasswordBearer(
@@ -34,6 +52,23 @@ def get_password_hash(password: str) -> str:
     """Génère un hash pour le mot de passe"""
     return pwd_context.hash(password)
 
+async def get_password_hash_async(password: str) -> str:
+    """Génère un hash pour le mot de passe sans bloquer la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifie un mot de passe sans bloquer la boucle d'événements.
+    
+    Returns:
+        Tuple (mot de passe valide, nouveau hash si le hash actuel utilise un coût obsolète)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authentifie un utilisateur par son nom d'utilisateur et son mot de passe"""
     result = await db.execute(select(User).filter(User.username == username))
@@ -41,8 +76,16 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> O
     
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
+    
+    # Recalculer le hash avec le coût actuel
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     return user
 
 def create_access_token(
@@ -62,6 +105,25 @@ def create_access_token(
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+async def get_token_user(db: AsyncSession, user_id: int, version: int) -> Optional[User]:
+    """
+    Récupère l'utilisateur d'un token, depuis le cache si possible.
+    Retourne None si l'utilisateur n'existe pas ou si ses tokens ont été révoqués
+    (version du token différente de celle de l'utilisateur).
+    """
+    user = await auth_cache.get_user(db, user_id, version)
+    if user is not None:
+        return user
+    
+    result = await db.execute(select(User).filter(User.id == user_id))
+    user = result.scalars().first()
+    
+    if user is None or user.token_version != version:
+        return None
+    
+    auth_cache.set_user(user)
+    return user
+
 async def get_current_user(
     security_scopes: SecurityScopes,
     token: str = Depends(oauth2_scheme),
@@ -80,7 +142,7 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = auth_cache.decode_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -91,8 +153,7 @@ async def get_current_user(
     except (JWTError, ValidationError):
         raise credentials_exception
     
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalars().first()
+    user = await get_token_user(db, user_id, auth_cache.token_version(payload))
     
     if user is None:
         raise credentials_exception
@@ -108,6 +169,27 @@ async def get_current_user(
     
     return user
 
+async def get_user_from_token(db: AsyncSession, token: str) -> Optional[User]:
+    """
+    Récupère l'utilisateur actif correspondant à un token JWT.
+    Utilisé pour les WebSockets, où l'en-tête Authorization n'est pas disponible.
+    """
+    try:
+        payload = auth_cache.decode_token(token)
+    except JWTError:
+        return None
+    
+    user_id = payload.get("user_id")
+    if payload.get("sub") is None or user_id is None:
+        return None
+    
+    user = await get_token_user(db, user_id, auth_cache.token_version(payload))
+    
+    if user is None or not user.is_active:
+        return None
+    
+    return user
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -0,0 +1,185 @@
+"""
+Événements temps réel des sessions de jeu.
+Chaque événement (action, résultat, changement de scène, mise à jour de
+personnage...) est ajouté au stream Redis de la session, qui conserve les
+derniers événements pour la reprise après déconnexion, et publié une seule
+fois sur le canal pub/sub de la session. Dans chaque worker de l'API, un hub
+unique s'abonne aux canaux des sessions ayant des joueurs connectés et
+distribue les événements aux WebSockets locales.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set
+
+from redis.exceptions import RedisError
+
+from app.core import redis
+from app.core.config import settings
+
+# Ajoute l'événement au stream de la session puis le publie avec son identifiant
+PUBLISH_EVENT_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'type', ARGV[2], 'data', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('PUBLISH', KEYS[2], '{"id":' .. cjson.encode(id) .. ',"type":' .. cjson.encode(ARGV[2]) .. ',"data":' .. ARGV[3] .. '}')
+return id
+"""
+
+EVENTS_CHANNEL_PREFIX = "session_events:"
+
+def events_stream_key(session_id: int) -> str:
+    """Clé du stream des événements d'une session"""
+    return f"session:{session_id}:events"
+
+def events_channel(session_id: int) -> str:
+    """Canal pub/sub des événements d'une session"""
+    return f"{EVENTS_CHANNEL_PREFIX}{session_id}"
+
+def event_id_key(event_id: str) -> tuple:
+    """Clé de tri d'un identifiant d'événement ("<millisecondes>-<séquence>")"""
+    milliseconds, _, sequence = event_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+async def publish_event(session_id: int, event_type: str, data: Dict[str, Any]) -> Optional[str]:
+    """
+    Publie un événement aux joueurs d'une session (en un seul aller-retour).
+
+    Args:
+        session_id: Session de jeu
+        event_type: Type d'événement (action, result, scene_change, character_update, etc.)
+        data: Données de l'événement
+
+    Returns:
+        Identifiant de l'événement, ou None si la publication a échoué
+    """
+    try:
+        script = redis.redis_client.register_script(PUBLISH_EVENT_SCRIPT)
+        return await script(
+            keys=[events_stream_key(session_id), events_channel(session_id)],
+            args=[
+                settings.session_events_maxlen,
+                event_type,
+                json.dumps(data, default=str, ensure_ascii=False),
+                settings.session_events_ttl
+            ]
+        )
+    except RedisError as e:
+        # Les événements temps réel sont un complément : ne pas faire échouer la requête
+        print(f"Erreur lors de la publication d'un événement de la session {session_id}: {e}")
+        return None
+
+async def read_events_since(session_id: int, last_event_id: str) -> List[Dict[str, Any]]:
+    """Retourne les événements conservés postérieurs à `last_event_id`"""
+    entries = await redis.redis_client.xrange(
+        events_stream_key(session_id), min=f"({last_event_id}", max="+",
+        count=settings.session_events_maxlen
+    )
+    return [
+        {"id": event_id, "type": fields["type"], "data": json.loads(fields["data"])}
+        for event_id, fields in entries
+    ]
+
+class Subscription:
+    """Abonnement d'une connexion aux événements d'une session"""
+
+    def __init__(self, session_id: int, queue_size: int):
+        self.session_id = session_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Positionné quand la connexion ne suit plus le rythme des événements
+        self.overflowed = False
+
+class SessionEventHub:
+    """
+    Distribue les événements publiés sur Redis aux connexions locales.
+    Une seule connexion pub/sub par processus, quel que soit le nombre de joueurs.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, session_id: int) -> Subscription:
+        """Abonne une connexion aux événements d'une session"""
+        subscription = Subscription(session_id, self.queue_size)
+
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = redis.redis_client.pubsub()
+            if session_id not in self._subscriptions:
+                self._subscriptions[session_id] = set()
+                await self._pubsub.subscribe(events_channel(session_id))
+            self._subscriptions[session_id].add(subscription)
+
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        """Désabonne une connexion ; le canal est quitté quand plus personne ne l'écoute"""
+        async with self._lock:
+            subscriptions = self._subscriptions.get(subscription.session_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.session_id]
+                try:
+                    await self._pubsub.unsubscribe(events_channel(subscription.session_id))
+                except RedisError as e:
+                    print(f"Erreur lors du désabonnement de la session {subscription.session_id}: {e}")
+
+    def dispatch(self, session_id: int, event: Dict[str, Any]):
+        """
+        Transmet un événement aux connexions abonnées.
+        Une connexion dont la file est pleine est marquée en débordement : elle
+        sera fermée et le client reprendra depuis son dernier événement reçu.
+        """
+        for subscription in list(self._subscriptions.get(session_id, ())):
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+
+    async def _read_loop(self):
+        """Lit les messages pub/sub et les distribue tant qu'il reste des abonnés"""
+        while self._subscriptions:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except RedisError as e:
+                print(f"Erreur de lecture des événements de session: {e}")
+                await asyncio.sleep(1)
+                await self._resubscribe()
+                continue
+
+            if not message or message["type"] != "message":
+                continue
+
+            session_id = int(message["channel"][len(EVENTS_CHANNEL_PREFIX):])
+            self.dispatch(session_id, json.loads(message["data"]))
+
+    async def _resubscribe(self):
+        """Rétablit les abonnements après une perte de connexion à Redis"""
+        async with self._lock:
+            try:
+                if self._subscriptions:
+                    await self._pubsub.subscribe(*(events_channel(session_id) for session_id in self._subscriptions))
+            except RedisError:
+                pass
+
+    async def close(self):
+        """Arrête la lecture et ferme la connexion pub/sub (arrêt de l'application)"""
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._subscriptions.clear()
+
+hub = SessionEventHub(settings.session_events_queue_size)
@@ -0,0 +1,283 @@
+"""
+État temps réel des sessions de jeu dans Redis.
+L'état d'une session est réparti en trois clés :
+- session:{id} : hash des champs de la session (valeurs encodées en JSON)
+- session:{id}:context : liste des dernières actions (fenêtre de contexte du LLM)
+- session:{id}:game_state : hash de l'état du jeu (valeurs encodées en JSON)
+Chaque mise à jour (ajout d'une action, fusion de l'état du jeu, compactage du
+contexte après résumé) est une transaction ou un script Lua exécuté en un seul
+aller-retour, sans relire ni réécrire l'état complet : les mises à jour
+concurrentes des joueurs d'une même session ne s'écrasent plus.
+"""
+
+import json
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core import redis
+from app.core.config import settings
+
+SESSION_STATE_TTL = 86400  # 24 heures
+
+# Fusionne des champs dans l'état du jeu si la session existe encore
+MERGE_GAME_STATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[3], ARGV[i], ARGV[i + 1])
+end
+redis.call('HSET', KEYS[1], 'last_activity_time', ARGV[1])
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[2])
+end
+return 1
+"""
+
+# Retire du début de la fenêtre de contexte les actions résumées et enregistre le résumé
+COMPACT_CONTEXT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local summarized = {}
+for i = 2, #ARGV do
+    summarized[ARGV[i]] = true
+end
+local removed = 0
+while true do
+    local entry = redis.call('LINDEX', KEYS[2], 0)
+    if not entry then
+        break
+    end
+    local action_id = cjson.decode(entry)['action_id']
+    if action_id == nil or not summarized[tostring(action_id)] then
+        break
+    end
+    redis.call('LPOP', KEYS[2])
+    removed = removed + 1
+end
+redis.call('HSET', KEYS[1], 'story_summary', ARGV[1])
+return removed
+"""
+
+# Restaure un état sauvegardé si la session n'a pas (ou plus) d'état
+RESTORE_STATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+for field, value in pairs(cjson.decode(ARGV[2])) do
+    redis.call('HSET', KEYS[1], field, value)
+end
+for _, entry in ipairs(cjson.decode(ARGV[3])) do
+    redis.call('RPUSH', KEYS[2], entry)
+end
+for field, value in pairs(cjson.decode(ARGV[4])) do
+    redis.call('HSET', KEYS[3], field, value)
+end
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[1])
+end
+return 1
+"""
+
+def state_key(session_id: int) -> str:
+    """Clé du hash des champs de la session"""
+    return f"session:{session_id}"
+
+def context_key(session_id: int) -> str:
+    """Clé de la liste de la fenêtre de contexte"""
+    return f"session:{session_id}:context"
+
+def game_state_key(session_id: int) -> str:
+    """Clé du hash de l'état du jeu"""
+    return f"session:{session_id}:game_state"
+
+def checkpoint_key(session_id: int) -> str:
+    """Clé marquant un instantané récent de l'état (expire après l'intervalle des instantanés)"""
+    return f"session:{session_id}:checkpoint"
+
+def session_keys(session_id: int) -> List[str]:
+    """Toutes les clés de l'état d'une session"""
+    return [state_key(session_id), context_key(session_id), game_state_key(session_id)]
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+def _encode(values: Dict[str, Any]) -> Dict[str, str]:
+    return {field: json.dumps(value, default=str) for field, value in values.items()}
+
+def _decode(values: Dict[str, str]) -> Dict[str, Any]:
+    return {field: json.loads(value) for field, value in values.items()}
+
+def _session_fields(session) -> Dict[str, Any]:
+    """Champs de l'état provenant de la session en base"""
+    return {
+        "session_id": session.id,
+        "name": session.name,
+        "current_scenario_id": session.current_scenario_id,
+        "current_scene_id": session.current_scene_id
+    }
+
+def _default_fields() -> Dict[str, Any]:
+    """Champs d'un état nouvellement créé"""
+    return {
+        "active_characters": [],
+        "last_action_id": None,
+        "story_summary": None,
+        "session_start_time": _now()
+    }
+
+def _set_defaults(pipe, session_id: int, session):
+    """Ajoute à une transaction l'initialisation des champs absents de l'état"""
+    for field, value in _encode({**_session_fields(session), **_default_fields()}).items():
+        pipe.hsetnx(state_key(session_id), field, value)
+
+def _expire(pipe, session_id: int):
+    for key in session_keys(session_id):
+        pipe.expire(key, SESSION_STATE_TTL)
+
+async def initialize(session_id: int, session):
+    """Crée (ou réinitialise) l'état d'une session"""
+    fields = {**_session_fields(session), **_default_fields(), "last_activity_time": _now()}
+
+    async with redis.redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(*session_keys(session_id))
+        pipe.hset(state_key(session_id), mapping=_encode(fields))
+        pipe.expire(state_key(session_id), SESSION_STATE_TTL)
+        await pipe.execute()
+
+async def update_metadata(session_id: int, session):
+    """Met à jour les champs provenant de la session en base (et crée l'état si absent)"""
+    async with redis.redis_client.pipeline(transaction=True) as pipe:
+        _set_defaults(pipe, session_id, session)
+        pipe.hset(state_key(session_id), mapping=_encode({
+            **_session_fields(session),
+            "last_activity_time": _now()
+        }))
+        _expire(pipe, session_id)
+        await pipe.execute()
+
+async def append_action(session, entry: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Ajoute une action à la fenêtre de contexte d'une session.
+    L'état est créé s'il n'existe pas ; la fenêtre est plafonnée à
+    context_window_max_entries (filet de sécurité si le résumé échoue).
+
+    Args:
+        session: Session de jeu
+        entry: Action à ajouter (action_id, character_name, description, etc.)
+
+    Returns:
+        Tuple (fenêtre de contexte après ajout, résumé de l'histoire)
+    """
+    session_id = session.id
+
+    async with redis.redis_client.pipeline(transaction=True) as pipe:
+        _set_defaults(pipe, session_id, session)
+        pipe.hset(state_key(session_id), mapping=_encode({
+            "last_action_id": entry.get("action_id"),
+            "last_activity_time": _now()
+        }))
+        pipe.rpush(context_key(session_id), json.dumps(entry, default=str))
+        pipe.ltrim(context_key(session_id), -settings.context_window_max_entries, -1)
+        pipe.lrange(context_key(session_id), 0, -1)
+        pipe.hget(state_key(session_id), "story_summary")
+        _expire(pipe, session_id)
+        results = await pipe.execute()
+
+    context_entries, story_summary = results[-5], results[-4]
+    return [json.loads(item) for item in context_entries], json.loads(story_summary) if story_summary else None
+
+async def get_context(session_id: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Retourne la fenêtre de contexte et le résumé de l'histoire d'une session"""
+    async with redis.redis_client.pipeline(transaction=True) as pipe:
+        pipe.lrange(context_key(session_id), 0, -1)
+        pipe.hget(state_key(session_id), "story_summary")
+        context_entries, story_summary = await pipe.execute()
+
+    return [json.loads(item) for item in context_entries], json.loads(story_summary) if story_summary else None
+
+async def get_state(session_id: int) -> Optional[Dict[str, Any]]:
+    """Retourne l'état complet d'une session (None si absent)"""
+    async with redis.redis_client.pipeline(transaction=True) as pipe:
+        pipe.hgetall(state_key(session_id))
+        pipe.lrange(context_key(session_id), 0, -1)
+        pipe.hgetall(game_state_key(session_id))
+        fields, context_entries, game_state = await pipe.execute()
+
+    if not fields:
+        return None
+
+    return {
+        **_decode(fields),
+        "context_window": [json.loads(item) for item in context_entries],
+        "game_state": _decode(game_state)
+    }
+
+async def exists(session_id: int) -> bool:
+    """Indique si l'état d'une session est présent dans Redis"""
+    return bool(await redis.redis_client.exists(state_key(session_id)))
+
+async def restore(session_id: int, session, state: Dict[str, Any]) -> bool:
+    """
+    Recrée l'état d'une session à partir d'un état sauvegardé, sauf s'il a été
+    recréé entre-temps (une action concurrente est prioritaire). Les champs
+    provenant de la session en base remplacent ceux de la sauvegarde.
+
+    Returns:
+        True si l'état a été restauré
+    """
+    fields = {
+        field: value for field, value in state.items()
+        if field not in ("context_window", "game_state")
+    }
+    fields.update({**_session_fields(session), "last_activity_time": _now()})
+    for field, value in _default_fields().items():
+        fields.setdefault(field, value)
+
+    script = redis.redis_client.register_script(RESTORE_STATE_SCRIPT)
+    return bool(await script(keys=session_keys(session_id), args=[
+        SESSION_STATE_TTL,
+        json.dumps(_encode(fields)),
+        json.dumps([json.dumps(entry, default=str) for entry in state.get("context_window") or []]),
+        json.dumps(_encode(state.get("game_state") or {}))
+    ]))
+
+async def checkpoint_due(session_id: int, interval: float) -> bool:
+    """
+    Indique si un instantané de l'état doit être pris, au plus une fois par
+    intervalle (en secondes) quel que soit le nombre de workers.
+    """
+    return bool(await redis.redis_client.set(checkpoint_key(session_id), "1", nx=True, ex=max(1, int(interval))))
+
+async def merge_game_state(session_id: int, updates: Dict[str, Any]) -> bool:
+    """
+    Fusionne des champs dans l'état du jeu d'une session existante.
+
+    Returns:
+        False si l'état de la session n'existe pas (expiré ou supprimé)
+    """
+    args = [json.dumps(_now()), SESSION_STATE_TTL]
+    for field, value in _encode(updates).items():
+        args.extend([field, value])
+
+    script = redis.redis_client.register_script(MERGE_GAME_STATE_SCRIPT)
+    return bool(await script(keys=session_keys(session_id), args=args))
+
+async def compact_context(session_id: int, summarized_ids: List[int], summary: str) -> int:
+    """
+    Retire du début de la fenêtre de contexte les actions résumées et enregistre le résumé.
+    Les actions ajoutées pendant la génération du résumé sont conservées.
+
+    Returns:
+        Nombre d'actions retirées (-1 si l'état de la session n'existe plus)
+    """
+    script = redis.redis_client.register_script(COMPACT_CONTEXT_SCRIPT)
+    return await script(
+        keys=[state_key(session_id), context_key(session_id)],
+        args=[json.dumps(summary)] + [str(action_id) for action_id in summarized_ids]
+    )
+
+async def delete(session_id: int):
+    """Supprime l'état d'une session"""
+    await redis.redis_client.delete(*session_keys(session_id))
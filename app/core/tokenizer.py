@@ -0,0 +1,120 @@
+"""
+Comptage local des tokens des prompts.
+Le tokenizer est configurable (LLM_TOKENIZER) :
+- "tiktoken:<encodage>" : encodage tiktoken (ex. tiktoken:cl100k_base)
+- "hf:<modèle>" : tokenizer Hugging Face (ex. hf:mistralai/Mistral-7B-Instruct-v0.2)
+Sans configuration, ou si le paquet correspondant n'est pas installé, une
+estimation rapide basée sur le nombre de caractères est utilisée.
+Un autre tokenizer peut être branché avec set_tokenizer().
+"""
+
+from typing import Dict, List, Optional, Protocol
+
+from app.core.config import settings
+
+# Tokens ajoutés par le gabarit de conversation pour chaque message (rôle, délimiteurs)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+class Tokenizer(Protocol):
+    """Interface d'un tokenizer : compte les tokens d'un texte"""
+
+    name: str
+
+    def count(self, text: str) -> int:
+        ...
+
+class HeuristicTokenizer:
+    """Estimation rapide du nombre de tokens à partir du nombre de caractères"""
+
+    def __init__(self, chars_per_token: float = 3.5):
+        # Le français produit plus de tokens par caractère que l'anglais
+        self.chars_per_token = chars_per_token
+        self.name = f"heuristic:{chars_per_token}"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return int(len(text) / self.chars_per_token) + 1
+
+class TiktokenTokenizer:
+    """Tokenizer tiktoken (paquet tiktoken)"""
+
+    def __init__(self, encoding_name: str):
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(encoding_name)
+        self.name = f"tiktoken:{encoding_name}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+class HuggingFaceTokenizer:
+    """Tokenizer Hugging Face (paquet tokenizers)"""
+
+    def __init__(self, model_name: str):
+        from tokenizers import Tokenizer as HFTokenizer
+
+        self._tokenizer = HFTokenizer.from_pretrained(model_name)
+        self.name = f"hf:{model_name}"
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+_TOKENIZER_TYPES = {
+    "tiktoken": TiktokenTokenizer,
+    "hf": HuggingFaceTokenizer,
+}
+
+_tokenizer: Optional[Tokenizer] = None
+
+def load_tokenizer(spec: Optional[str]) -> Tokenizer:
+    """
+    Charge le tokenizer décrit par une spécification "type:nom".
+
+    Args:
+        spec: Spécification du tokenizer (None pour l'estimation rapide)
+
+    Returns:
+        Tokenizer chargé, ou l'estimation rapide si le chargement échoue
+    """
+    if not spec:
+        return HeuristicTokenizer()
+
+    kind, _, name = spec.partition(":")
+    tokenizer_type = _TOKENIZER_TYPES.get(kind)
+
+    if tokenizer_type is None or not name:
+        print(f"Tokenizer inconnu '{spec}', utilisation de l'estimation rapide")
+        return HeuristicTokenizer()
+
+    try:
+        return tokenizer_type(name)
+    except Exception as e:
+        print(f"Impossible de charger le tokenizer '{spec}' ({e}), utilisation de l'estimation rapide")
+        return HeuristicTokenizer()
+
+def get_tokenizer() -> Tokenizer:
+    """Retourne le tokenizer configuré (chargé au premier appel)"""
+    global _tokenizer
+
+    if _tokenizer is None:
+        _tokenizer = load_tokenizer(settings.llm_tokenizer)
+
+    return _tokenizer
+
+def set_tokenizer(tokenizer: Optional[Tokenizer]):
+    """Remplace le tokenizer utilisé (None pour revenir à la configuration)"""
+    global _tokenizer
+    _tokenizer = tokenizer
+
+def count_tokens(text: str) -> int:
+    """Compte les tokens d'un texte"""
+    return get_tokenizer().count(text)
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Compte les tokens d'une liste de messages au format OpenAI"""
+    tokenizer = get_tokenizer()
+    return sum(
+        tokenizer.count(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
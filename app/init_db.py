@@ -7,6 +7,7 @@ import logging
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.sql import text
 
+from app.core import partitions
 from app.core.config import settings
 from app.models.base import Base
 from app.core.security import get_password_hash
@@ -14,6 +15,8 @@ from app.models.user import User
 from app.models.game_session import GameSession
 from app.models.character import Character, CharacterClass
 from app.models.action_log import ActionLog
+from app.models.action_archive import ActionArchive
+from app.models.session_snapshot import SessionSnapshot
 from app.models.scenario import Scenario
 from app.models.scene import Scene, SceneType
 
@@ -39,6 +42,9 @@ async def create_tables():
         
         # Créer toutes les tables
         await conn.run_sync(Base.metadata.create_all)
+        
+        # Créer les partitions de action_logs (mois courant et mois à venir)
+        await partitions.ensure_partitions(conn)
     
     logger.info("Tables créées avec succès")
 
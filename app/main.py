@@ -1,16 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
-from app.core import config, redis, llm_client
+from app.core import config, redis, llm_client, session_events
 from app.core.database import get_db
+from app.services import render_pool
 from app.api import auth, users, game_sessions, characters, actions, scenarios, scenes, game
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialise les ressources partagées au démarrage et les libère à l'arrêt"""
+    await llm_client.init_llm_client()
+    yield
+    await session_events.hub.close()
+    await llm_client.close_llm_client()
+    render_pool.shutdown()
+
 app = FastAPI(
     title="RPG-IA API",
     description="API pour un système de jeu de rôle en ligne multi-joueurs avec IA comme maître de jeu",
     version="1.0.0",
-    root_path="/api/v1"
+    root_path="/api/v1",
+    lifespan=lifespan
 )
 
 # Configuration CORS
@@ -45,6 +57,11 @@ async def health_check(db=Depends(get_db)):
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
+@app.get("/metrics/llm", tags=["status"])
+async def llm_metrics():
+    """Métriques d'utilisation du pool de connexions vers le LLM"""
+    return llm_client.get_pool_stats()
+
 # Inclusion des routes API
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Index
+from app.models.base import BaseModel
+
+class ActionArchive(BaseModel):
+    """
+    Manifeste d'un fichier d'archive de logs d'action.
+    Un fichier contient les actions d'une session pour une date (action_date) ;
+    le chemin est relatif au stockage des archives (action_archive_url).
+    """
+    __tablename__ = "action_archives"
+    __table_args__ = (
+        Index("ix_action_archives_session_timestamp", "game_session_id", "first_timestamp"),
+        Index("ix_action_archives_action_ids", "min_action_id", "max_action_id"),
+    )
+    
+    # Pas de clé étrangère : les archives survivent aux lignes qu'elles remplacent
+    game_session_id = Column(Integer, nullable=False)
+    action_date = Column(String, nullable=False)  # Format YYYY-MM-DD
+    path = Column(String, nullable=False, unique=True)
+    
+    # Contenu du fichier, pour ne lire que les archives utiles
+    row_count = Column(Integer, nullable=False)
+    min_action_id = Column(Integer, nullable=False)
+    max_action_id = Column(Integer, nullable=False)
+    first_timestamp = Column(DateTime, nullable=False)
+    last_timestamp = Column(DateTime, nullable=False)
+    character_ids = Column(JSON, default=list)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, JSON, Text, DateTime, Enum
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, JSON, Text, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime, UTC
@@ -22,6 +22,17 @@ class ActionType(str, enum.Enum):
 class ActionLog(BaseModel):
     """Modèle pour l'historique des actions des joueurs"""
     __tablename__ = "action_logs"
+    __table_args__ = (
+        # Pagination par clé sur (action_timestamp, id), globale, par session et par personnage
+        Index("ix_action_logs_timestamp_id", "action_timestamp", "id"),
+        Index("ix_action_logs_session_timestamp_id", "game_session_id", "action_timestamp", "id"),
+        Index("ix_action_logs_character_timestamp_id", "character_id", "action_timestamp", "id"),
+        {
+            # Table partitionnée par mois sur PostgreSQL (voir app/core/partitions.py)
+            "postgresql_partition_by": "RANGE (action_timestamp)",
+            "info": {"partition_key": ["action_timestamp"]},
+        },
+    )
     
     # Type d'action
     action_type = Column(Enum(ActionType), nullable=False)
@@ -34,15 +45,17 @@ class ActionLog(BaseModel):
     
     # Données techniques
     tokens_used = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)  # Mesurés localement avant l'appel au LLM
     processing_time = Column(Float, default=0.0)  # En secondes
     
     # Données de jeu
     game_data = Column(JSON, default=dict)  # Données spécifiques à l'action (dés, modificateurs, etc.)
     
     # Horodatage spécifique à l'action
-    action_timestamp = Column(DateTime, default=utc_now)
+    # Clé de partitionnement de la table (partitions mensuelles)
+    action_timestamp = Column(DateTime, default=utc_now, nullable=False)
     
-    # Partition par date (pour optimisation des requêtes)
+    # Date de l'action, pour les filtres par jour
     action_date = Column(String, index=True)  # Format YYYY-MM-DD
     
     # Relations
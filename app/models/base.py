@@ -1,8 +1,24 @@
-from sqlalchemy import Column, Integer, DateTime, func
+from sqlalchemy import Column, Integer, DateTime, PrimaryKeyConstraint, func
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+@compiles(PrimaryKeyConstraint, "postgresql")
+def compile_primary_key(constraint, compiler, **kw):
+    """
+    Sur PostgreSQL, la clé primaire d'une table partitionnée doit contenir la clé
+    de partitionnement (info["partition_key"] de la table). Le mapper ORM continue
+    d'identifier les lignes par leur seul ID.
+    """
+    partition_key = constraint.table.info.get("partition_key")
+    if not partition_key:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    
+    names = [column.name for column in constraint.columns]
+    names += [name for name in partition_key if name not in names]
+    return "PRIMARY KEY (%s)" % ", ".join(compiler.preparer.quote(name) for name in names)
+
 class BaseModel(Base):
     """Classe de base pour tous les modèles SQLAlchemy"""
     __abstract__ = True
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, String, Boolean, Integer, Float, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Boolean, Integer, Float, ForeignKey, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class GameSession(BaseModel):
     """Modèle pour les sessions de jeu"""
     __tablename__ = "game_sessions"
+    __table_args__ = (
+        # Pagination par clé des listes de sessions (de la plus récemment modifiée à la plus ancienne)
+        Index("ix_game_sessions_updated_at_id", "updated_at", "id"),
+    )
     
     name = Column(String, nullable=False)
     description = Column(Text)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, LargeBinary, UniqueConstraint
+from app.models.base import BaseModel
+
+class SessionSnapshot(BaseModel):
+    """
+    Instantané de l'état temps réel d'une session (champs, fenêtre de contexte
+    et état du jeu), enregistré depuis Redis pour survivre à l'arrêt de la
+    session et à l'expiration des clés.
+    """
+    __tablename__ = "session_snapshots"
+    __table_args__ = (
+        UniqueConstraint("game_session_id", "version", name="uq_session_snapshots_session_version"),
+    )
+
+    game_session_id = Column(Integer, ForeignKey("game_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    version = Column(Integer, nullable=False)  # Croissant pour une session
+    format_version = Column(Integer, nullable=False)  # Version du format de l'état
+    last_action_id = Column(Integer, nullable=True)
+
+    # État encodé en JSON puis compressé (zlib) et son empreinte
+    checksum = Column(String(64), nullable=False)
+    state = Column(LargeBinary, nullable=False)
@@ -10,6 +10,8 @@ class User(BaseModel):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # Incrémentée pour révoquer les tokens émis (désactivation, changement de droits)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     
     # Métriques d'utilisation
     total_tokens_used = Column(Integer, default=0)
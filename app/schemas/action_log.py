@@ -26,12 +26,14 @@ class ActionLogUpdate(BaseModel):
     """Schéma pour la mise à jour de logs d'action"""
     result: Optional[str] = None
     tokens_used: Optional[int] = None
+    prompt_tokens: Optional[int] = None
     processing_time: Optional[float] = None
 
 class ActionLogInDB(ActionLogBase, BaseSchema):
     """Schéma pour les logs d'action en base de données"""
     result: Optional[str] = None
     tokens_used: int = 0
+    prompt_tokens: int = 0
     processing_time: float = 0.0
     game_data: Dict[str, Any] = Field(default_factory=dict)
     action_timestamp: datetime = Field(default_factory=lambda: datetime.now())
@@ -70,4 +72,12 @@ class ActionResponse(BaseModel):
     
     # Métadonnées pour le client
     next_possible_actions: List[Dict[str, Any]] = Field(default_factory=list)
-    narrative_context: Optional[str] = None
\ No newline at end of file
+    narrative_context: Optional[str] = None
+
+class ActionJob(BaseModel):
+    """Schéma pour les tâches de génération d'action (mode file de tâches)"""
+    job_id: str
+    action_id: Optional[int] = None
+    status: str  # queued, running, done, failed
+    result: Optional[ActionResponse] = None
+    error: Optional[str] = None
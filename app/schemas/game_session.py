@@ -74,6 +74,27 @@ class GameSession(GameSessionInDB):
     """Schéma pour les sessions de jeu renvoyées par l'API"""
     pass
 
+class GameSessionListItem(BaseModel):
+    """
+    Schéma des sessions de jeu dans les listes.
+    Tous les champs sont facultatifs : seuls les champs demandés (paramètre fields) sont renvoyés.
+    """
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    is_active: Optional[bool] = None
+    game_master_id: Optional[int] = None
+    game_rules: Optional[str] = None
+    difficulty_level: Optional[str] = None
+    total_tokens_used: Optional[int] = None
+    total_game_time: Optional[float] = None
+    total_actions: Optional[int] = None
+    current_scenario_id: Optional[int] = None
+    current_scene_id: Optional[int] = None
+    context_data: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class GameSessionWithDetails(GameSession):
     """Schéma pour les sessions de jeu avec détails supplémentaires"""
     characters: List[Dict[str, Any]] = []
@@ -90,6 +111,7 @@ class GameSessionState(BaseModel):
     current_scene_id: Optional[int] = None
     last_action_id: Optional[int] = None
     context_window: List[Dict[str, Any]] = []  # Historique récent pour le contexte LLM
+    story_summary: Optional[str] = None  # Résumé des actions plus anciennes que context_window
     session_start_time: datetime = Field(default_factory=datetime.utcnow)
     last_activity_time: datetime = Field(default_factory=datetime.utcnow)
     game_state: Dict[str, Any] = Field(default_factory=dict)  # État du jeu (position, inventaire, etc.)
\ No newline at end of file
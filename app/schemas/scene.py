@@ -75,6 +75,12 @@ class SceneWithDetails(Scene):
         if hasattr(self, 'action_logs'):
             self.action_count = len(self.action_logs)
 
+class SceneHtml(BaseModel):
+    """Schéma pour le rendu HTML du contenu markdown d'une scène"""
+    scene_id: int
+    for_gm: bool
+    html_content: str
+
 class SceneTransition(BaseModel):
     """Schéma pour les transitions entre scènes"""
     from_scene_id: int
@@ -0,0 +1,269 @@
+"""
+Archivage des logs d'action.
+Les actions anciennes (plus de action_archive_after_days jours) et celles des
+sessions arrêtées depuis action_archive_stopped_after_days jours sont écrites
+au fil de l'eau dans des fichiers JSONL compressés, un par session et par
+date (action_logs/action_date=AAAA-MM-JJ/session=ID/...), puis supprimées de
+PostgreSQL. Chaque fichier est décrit par une ligne de action_archives, qui
+permet aux API de lire l'historique archivé comme s'il était encore en base.
+"""
+
+import asyncio
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import archive_storage
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.action_archive import ActionArchive
+from app.models.action_log import ActionLog
+from app.models.game_session import GameSession
+
+DATETIME_COLUMNS = ("action_timestamp", "created_at", "updated_at")
+
+# Fichiers d'archive décodés récemment (les archives ne sont jamais modifiées)
+archive_cache = TTLCache(settings.action_archive_cache_entries)
+
+def archive_key(session_id: int, action_date: str, compression: str) -> str:
+    """Chemin d'un nouveau fichier d'archive, partitionné par date puis par session"""
+    return (
+        f"action_logs/action_date={action_date}/session={session_id}/"
+        f"{uuid.uuid4().hex}{archive_storage.archive_extension(compression)}"
+    )
+
+def archivable_condition(
+    older_than_days: Optional[int] = None,
+    stopped_after_days: Optional[int] = None,
+    now: Optional[datetime] = None
+):
+    """Condition SQL des actions à archiver : anciennes ou d'une session arrêtée"""
+    if older_than_days is None:
+        older_than_days = settings.action_archive_after_days
+    if stopped_after_days is None:
+        stopped_after_days = settings.action_archive_stopped_after_days
+    now = now or datetime.now()
+
+    stopped_sessions = select(GameSession.id).filter(
+        GameSession.is_active == False,
+        GameSession.updated_at < now - timedelta(days=stopped_after_days)
+    )
+    return or_(
+        ActionLog.action_timestamp < now - timedelta(days=older_than_days),
+        ActionLog.game_session_id.in_(stopped_sessions)
+    )
+
+async def find_archive_groups(db: AsyncSession, condition) -> List[Tuple[int, Optional[str]]]:
+    """Couples (session, date) ayant des actions à archiver"""
+    result = await db.execute(
+        select(ActionLog.game_session_id, ActionLog.action_date)
+        .filter(condition)
+        .group_by(ActionLog.game_session_id, ActionLog.action_date)
+        .order_by(ActionLog.action_date, ActionLog.game_session_id)
+    )
+    return [tuple(row) for row in result.all()]
+
+async def archive_group(
+    db: AsyncSession,
+    session_id: int,
+    action_date: Optional[str],
+    condition,
+    compression: Optional[str] = None
+) -> int:
+    """
+    Archive les actions d'une session pour une date puis les supprime de la base.
+    Le fichier est écrit avant la transaction qui enregistre le manifeste et
+    supprime les lignes : en cas d'échec, la base reste intacte.
+
+    Returns:
+        Nombre d'actions archivées
+    """
+    compression = compression or settings.action_archive_compression
+    storage = archive_storage.get_archive_storage()
+    group_condition = and_(
+        condition,
+        ActionLog.game_session_id == session_id,
+        ActionLog.action_date == action_date
+    )
+    query = (
+        select(ActionLog.__table__)
+        .filter(group_condition)
+        .order_by(ActionLog.action_timestamp, ActionLog.id)
+        .execution_options(yield_per=settings.action_archive_batch_size)
+    )
+
+    action_ids: List[int] = []
+    character_ids = set()
+    first_timestamp = last_timestamp = None
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "archive"
+        with archive_storage.JsonlWriter(path, compression) as writer:
+            result = await db.stream(query)
+            async for rows in result.mappings().partitions():
+                writer.write(rows)
+                for row in rows:
+                    action_ids.append(row["id"])
+                    character_ids.add(row["character_id"])
+                    first_timestamp = first_timestamp or row["action_timestamp"]
+                    last_timestamp = row["action_timestamp"]
+
+        if not action_ids:
+            return 0
+
+        action_date = action_date or first_timestamp.strftime("%Y-%m-%d")
+        key = archive_key(session_id, action_date, compression)
+        await asyncio.to_thread(storage.put, key, path)
+
+    db.add(ActionArchive(
+        game_session_id=session_id,
+        action_date=action_date,
+        path=key,
+        row_count=len(action_ids),
+        min_action_id=min(action_ids),
+        max_action_id=max(action_ids),
+        first_timestamp=first_timestamp,
+        last_timestamp=last_timestamp,
+        character_ids=sorted(character_ids)
+    ))
+
+    # Supprimer par lots, en bornant l'horodatage pour ne toucher que la partition concernée
+    batch_size = settings.action_archive_batch_size
+    for start in range(0, len(action_ids), batch_size):
+        await db.execute(
+            delete(ActionLog)
+            .where(
+                ActionLog.id.in_(action_ids[start:start + batch_size]),
+                ActionLog.action_timestamp.between(first_timestamp, last_timestamp)
+            )
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+
+    return len(action_ids)
+
+def to_action_log(row: Dict[str, Any]) -> ActionLog:
+    """Reconstruit un log d'action (non rattaché à la session) à partir d'une ligne archivée"""
+    values = dict(row)
+    for column in DATETIME_COLUMNS:
+        if isinstance(values.get(column), str):
+            values[column] = datetime.fromisoformat(values[column])
+    return ActionLog(**values)
+
+async def load_archive(archive: ActionArchive) -> List[ActionLog]:
+    """Lit un fichier d'archive (via le cache des archives décodées)"""
+    actions = archive_cache.get(archive.path)
+    if actions is None:
+        storage = archive_storage.get_archive_storage()
+        data = await asyncio.to_thread(storage.get, archive.path)
+        rows = await asyncio.to_thread(archive_storage.read_jsonl, data, archive.path)
+        actions = [to_action_log(row) for row in rows]
+        archive_cache.set(archive.path, actions, settings.action_archive_cache_ttl)
+    return actions
+
+def sort_key(action: ActionLog) -> Tuple[datetime, int]:
+    return action.action_timestamp, action.id
+
+def is_after(action: ActionLog, after: Sequence[Any], descending: bool) -> bool:
+    """Vrai si l'action se situe après la clé `after` dans l'ordre de tri"""
+    return sort_key(action) < tuple(after) if descending else sort_key(action) > tuple(after)
+
+async def read_archived_actions(
+    db: AsyncSession,
+    game_session_id: int,
+    limit: int,
+    character_id: Optional[int] = None,
+    action_date: Optional[str] = None,
+    since: Optional[datetime] = None,
+    after: Optional[Sequence[Any]] = None,
+    descending: bool = True
+) -> List[ActionLog]:
+    """
+    Lit une page d'actions archivées d'une session, avec les mêmes filtres et
+    la même pagination par clé (action_timestamp, id) que les actions en base.
+    Seules les archives pouvant contenir des actions de la page sont lues.
+    """
+    query = select(ActionArchive).filter(ActionArchive.game_session_id == game_session_id)
+    if action_date:
+        query = query.filter(ActionArchive.action_date == action_date)
+    if since:
+        query = query.filter(ActionArchive.last_timestamp > since)
+    if after:
+        if descending:
+            query = query.filter(ActionArchive.first_timestamp <= after[0])
+        else:
+            query = query.filter(ActionArchive.last_timestamp >= after[0])
+    query = query.order_by(
+        ActionArchive.last_timestamp.desc() if descending else ActionArchive.first_timestamp
+    )
+
+    result = await db.execute(query)
+    archives = result.scalars().all()
+
+    actions: List[ActionLog] = []
+    for archive in archives:
+        if character_id is not None and character_id not in (archive.character_ids or []):
+            continue
+
+        # Les archives suivantes ne peuvent plus contenir d'actions de la page
+        if len(actions) >= limit:
+            boundary = actions[limit - 1].action_timestamp
+            if (archive.last_timestamp < boundary) if descending else (archive.first_timestamp > boundary):
+                break
+
+        for action in await load_archive(archive):
+            if character_id is not None and action.character_id != character_id:
+                continue
+            if since and action.action_timestamp <= since:
+                continue
+            if after and not is_after(action, after, descending):
+                continue
+            actions.append(action)
+
+        actions.sort(key=sort_key, reverse=descending)
+
+    return actions[:limit]
+
+def merge_actions(
+    actions: Sequence[ActionLog],
+    archived: Sequence[ActionLog],
+    limit: int,
+    descending: bool = True
+) -> List[ActionLog]:
+    """Fusionne une page d'actions en base et une page d'actions archivées"""
+    if not archived:
+        return list(actions)
+    return sorted([*actions, *archived], key=sort_key, reverse=descending)[:limit]
+
+async def get_archived_action(db: AsyncSession, action_id: int) -> Optional[ActionLog]:
+    """Retrouve une action archivée par son ID"""
+    result = await db.execute(
+        select(ActionArchive).filter(
+            ActionArchive.min_action_id <= action_id,
+            ActionArchive.max_action_id >= action_id
+        )
+    )
+    for archive in result.scalars().all():
+        for action in await load_archive(archive):
+            if action.id == action_id:
+                return action
+    return None
+
+async def delete_session_archives(db: AsyncSession, session_id: int):
+    """Supprime les archives d'une session (fichiers et manifestes)"""
+    result = await db.execute(select(ActionArchive).filter(ActionArchive.game_session_id == session_id))
+    storage = archive_storage.get_archive_storage()
+
+    for archive in result.scalars().all():
+        try:
+            await asyncio.to_thread(storage.delete, archive.path)
+        except Exception as e:
+            print(f"Erreur lors de la suppression de l'archive {archive.path}: {e}")
+        archive_cache.pop(archive.path)
+        await db.delete(archive)
@@ -0,0 +1,109 @@
+"""
+Service de résumé de l'historique des sessions de jeu.
+Lorsque la fenêtre de contexte d'une session dépasse son budget de tokens, les
+actions les plus anciennes sont condensées par le LLM dans un résumé
+"l'histoire jusqu'ici" stocké avec l'état de la session. Le prompt contient
+ensuite ce résumé et les actions récentes, ce qui borne sa taille sans perdre
+la continuité de l'histoire.
+"""
+
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.core import llm_client, redis, session_state, tokenizer
+from app.core.config import settings
+from app.services import prompt_templates
+
+SUMMARY_LOCK_TTL = 120  # En secondes
+
+# Libère le verrou seulement s'il appartient encore à ce worker (il a pu
+# expirer puis être pris par un autre worker pendant un résumé trop long)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def format_entry(entry: Dict[str, Any]) -> str:
+    """Formate une entrée de la fenêtre de contexte pour le prompt"""
+    return f"- {entry.get('character_name', 'Inconnu')}: {entry.get('description', '')}"
+
+def context_window_tokens(context_window: List[Dict[str, Any]]) -> int:
+    """Compte les tokens occupés par la fenêtre de contexte dans le prompt"""
+    return sum(tokenizer.count_tokens(format_entry(entry)) for entry in context_window)
+
+def needs_summary(context_window: List[Dict[str, Any]]) -> bool:
+    """Indique si la fenêtre de contexte dépasse son budget et doit être résumée"""
+    return (
+        len(context_window) > settings.context_window_keep_recent
+        and context_window_tokens(context_window) > settings.context_window_token_budget
+    )
+
+async def summarize_entries(
+    summary: Optional[str],
+    entries: List[Dict[str, Any]],
+    session_id: Optional[int] = None
+) -> str:
+    """
+    Intègre des actions au résumé de l'histoire via le LLM.
+
+    Args:
+        summary: Résumé actuel (None si aucun)
+        entries: Actions à intégrer au résumé
+        session_id: Session de jeu (répartition équitable des appels au LLM)
+
+    Returns:
+        Résumé mis à jour
+    """
+    messages = [
+        {"role": "system", "content": prompt_templates.STORY_SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt_templates.STORY_SUMMARY_UPDATE_TEMPLATE.render(
+            summary=summary or "Aucun (début de la session)",
+            entries="\n".join(format_entry(entry) for entry in entries)
+        )}
+    ]
+
+    response = await llm_client.call_llm(
+        messages,
+        max_tokens=settings.story_summary_max_tokens,
+        temperature=0.3,
+        priority=llm_client.LLMPriority.BATCH,
+        session_id=session_id
+    )
+
+    return response["choices"][0]["message"]["content"].strip()
+
+async def summarize_session_context(session_id: int):
+    """
+    Condense les actions les plus anciennes de la fenêtre de contexte d'une session.
+    Exécuté en arrière-plan après une action ; un verrou Redis évite les résumés concurrents.
+    """
+    lock_key = f"session:{session_id}:summary_lock"
+    lock_token = uuid.uuid4().hex
+    if not await redis.redis_client.set(lock_key, lock_token, nx=True, ex=SUMMARY_LOCK_TTL):
+        return
+
+    try:
+        context_window, story_summary = await session_state.get_context(session_id)
+
+        if not needs_summary(context_window):
+            return
+
+        # Conserver les actions récentes telles quelles et résumer les précédentes
+        older = context_window[:-settings.context_window_keep_recent]
+
+        try:
+            summary = await summarize_entries(story_summary, older, session_id)
+        except Exception as e:
+            print(f"Erreur lors du résumé de la session {session_id}: {e}")
+            return
+
+        # Des actions ont pu être ajoutées pendant la génération : seules les
+        # actions résumées sont retirées du début de la fenêtre
+        await session_state.compact_context(
+            session_id, [entry.get("action_id") for entry in older], summary
+        )
+    finally:
+        script = redis.redis_client.register_script(RELEASE_LOCK_SCRIPT)
+        await script(keys=[lock_key], args=[lock_token])
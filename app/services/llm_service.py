@@ -4,9 +4,29 @@ Ce service gère la génération de réponses aux actions des joueurs.
 """
 
 import json
-from typing import Dict, Any, List
-from app.core import llm_client
+from typing import Dict, Any, List, AsyncIterator, Tuple
+from app.core import llm_client, llm_cache, tokenizer
+from app.core.config import settings
 from app.models.action_log import ActionType
+from app.services import context_summarizer, prompt_templates
+from app.services.prompt_assembler import PromptSection, assemble_prompt
+from app.utils.ose.encounter import Combatant, ENEMIES, PARTY, resolve_combat
+from app.services.response_stream_parser import ActionResponseStreamParser
+
+def scheduling_keys(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extrait du contexte de jeu les clés de répartition équitable des appels au LLM.
+    
+    Args:
+        context: Contexte du jeu (session, personnage, etc.)
+    
+    Returns:
+        Arguments session_id et user_id pour llm_client
+    """
+    return {
+        "session_id": (context.get("session") or {}).get("id"),
+        "user_id": (context.get("character") or {}).get("user_id")
+    }
 
 async def generate_action_response(
     action_type: ActionType,
@@ -28,14 +48,87 @@ async def generate_action_response(
     """
     # Construire le prompt pour le LLM
     prompt = build_prompt(action_type, description, game_data, context)
+    prompt_tokens = tokenizer.count_message_tokens(prompt)
     
     # Appeler le LLM
-    response = await llm_client.call_llm(prompt, max_tokens=1000, temperature=0.7)
+    response = await llm_client.call_llm(
+        prompt, max_tokens=1000, temperature=0.7, **scheduling_keys(context)
+    )
     
     # Extraire la réponse
     result = response["choices"][0]["message"]["content"]
     tokens_used = response["usage"]["total_tokens"]
     
+    response_data = parse_action_response(result, tokens_used)
+    response_data["prompt_tokens"] = prompt_tokens
+    
+    return response_data
+
+async def generate_action_response_stream(
+    action_type: ActionType,
+    description: str,
+    game_data: Dict[str, Any],
+    context: Dict[str, Any]
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Génère une réponse à une action de joueur en streaming.
+    
+    Args:
+        action_type: Type d'action
+        description: Description de l'action
+        game_data: Données de jeu associées à l'action
+        context: Contexte du jeu (session, personnage, scène, etc.)
+    
+    Yields:
+        Tuples (événement, données) : ("narrative", texte) dès que la narration
+        est générée, ("field", {"name": ..., "value": ...}) dès qu'un champ de la
+        réponse structurée est complet, puis ("result", réponse structurée) à la
+        fin de la génération
+    """
+    # Construire le prompt pour le LLM
+    prompt = build_prompt(action_type, description, game_data, context)
+    prompt_tokens = tokenizer.count_message_tokens(prompt)
+    
+    parser = ActionResponseStreamParser()
+    chunks = []
+    tokens_used = 0
+    
+    # Extraire la narration et les champs au fur et à mesure de leur génération
+    async for chunk in llm_client.stream_llm(
+        prompt, max_tokens=1000, temperature=0.7, **scheduling_keys(context)
+    ):
+        usage = chunk.get("usage")
+        if usage:
+            tokens_used = usage.get("total_tokens", tokens_used)
+        
+        for choice in chunk.get("choices", []):
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                chunks.append(delta)
+                for event in parser.feed(delta):
+                    yield event
+    
+    result = "".join(chunks)
+    
+    if parser.complete:
+        response_data = build_structured_response(parser.fields, result, tokens_used)
+    else:
+        response_data = parse_action_response(result, tokens_used)
+    response_data["prompt_tokens"] = prompt_tokens
+    
+    yield "result", response_data
+
+def parse_action_response(result: str, tokens_used: int) -> Dict[str, Any]:
+    """
+    Extrait la réponse structurée (bloc JSON) de la réponse du LLM.
+    
+    Args:
+        result: Texte complet généré par le LLM
+        tokens_used: Nombre de tokens consommés
+    
+    Returns:
+        Dictionnaire contenant la réponse générée et les métadonnées
+    """
     # Essayer de parser la réponse structurée
     try:
         # Vérifier si la réponse contient une structure JSON
@@ -43,16 +136,7 @@ async def generate_action_response(
             json_str = result.split("```json")[1].split("```")[0].strip()
             structured_data = json.loads(json_str)
             
-            # Extraire les différentes parties de la réponse
-            return {
-                "result": structured_data.get("narrative_response", result),
-                "game_data": structured_data.get("game_data", {}),
-                "character_updates": structured_data.get("character_updates"),
-                "scene_updates": structured_data.get("scene_updates"),
-                "next_possible_actions": structured_data.get("next_possible_actions", []),
-                "narrative_context": structured_data.get("narrative_context"),
-                "tokens_used": tokens_used
-            }
+            return build_structured_response(structured_data, result, tokens_used)
     except Exception as e:
         # En cas d'erreur de parsing, retourner la réponse brute
         print(f"Erreur de parsing de la réponse structurée: {e}")
@@ -64,6 +148,33 @@ async def generate_action_response(
         "tokens_used": tokens_used
     }
 
+def build_structured_response(
+    structured_data: Dict[str, Any],
+    result: str,
+    tokens_used: int
+) -> Dict[str, Any]:
+    """
+    Construit la réponse à partir des champs structurés générés par le LLM.
+    
+    Args:
+        structured_data: Champs de la réponse JSON
+        result: Texte complet généré par le LLM
+        tokens_used: Nombre de tokens consommés
+    
+    Returns:
+        Dictionnaire contenant la réponse générée et les métadonnées
+    """
+    # Extraire les différentes parties de la réponse
+    return {
+        "result": structured_data.get("narrative_response", result),
+        "game_data": structured_data.get("game_data") or {},
+        "character_updates": structured_data.get("character_updates"),
+        "scene_updates": structured_data.get("scene_updates"),
+        "next_possible_actions": structured_data.get("next_possible_actions") or [],
+        "narrative_context": structured_data.get("narrative_context"),
+        "tokens_used": tokens_used
+    }
+
 def build_prompt(
     action_type: ActionType,
     description: str,
@@ -71,7 +182,10 @@ def build_prompt(
     context: Dict[str, Any]
 ) -> List[Dict[str, str]]:
     """
-    Construit le prompt pour le LLM.
+    Construit le prompt pour le LLM dans le budget de tokens configuré.
+    Si le prompt dépasse le budget, les sections sont réduites dans l'ordre :
+    autres personnages, contenu narratif de la scène, résumé de l'histoire,
+    puis actions les plus anciennes de l'historique.
     
     Args:
         action_type: Type d'action
@@ -88,173 +202,135 @@ def build_prompt(
     other_characters = context.get("other_characters", [])
     scene = context.get("scene", {})
     context_window = context.get("context_window", [])
+    story_summary = context.get("story_summary")
+    
+    def render_scene(words: List[str], total: int) -> str:
+        narrative_content = " ".join(words)
+        if len(words) < total:
+            narrative_content += " […]"
+        return prompt_templates.SCENE_TEMPLATE.render(
+            title=scene.get("title", "Aucune scène"),
+            description=scene.get("description", ""),
+            narrative_content=narrative_content
+        )
+    
+    def render_other_characters(names: List[str], total: int) -> str:
+        if not total:
+            return prompt_templates.OTHER_CHARACTERS_TEMPLATE.render(characters="Aucun")
+        characters = ", ".join(names)
+        if len(names) < total:
+            characters += f"{', ' if names else ''}{total - len(names)} autre(s)"
+        return prompt_templates.OTHER_CHARACTERS_TEMPLATE.render(characters=characters)
+    
+    def render_story_summary(summaries: List[str], total: int) -> str:
+        if not summaries:
+            return ""
+        return prompt_templates.STORY_SUMMARY_TEMPLATE.render(summary=summaries[0])
+    
+    def render_history(entries: List[str], total: int) -> str:
+        if not entries:
+            return ""
+        return prompt_templates.HISTORY_TEMPLATE.render(entries="\n".join(entries))
+    
+    # Sections du message, de la plus stable à la plus volatile
+    sections = [
+        PromptSection.fixed("session", prompt_templates.SESSION_TEMPLATE.render(
+            name=session.get("name", "Session sans nom"),
+            description=session.get("description", ""),
+            difficulty_level=session.get("difficulty_level", "standard")
+        )),
+        PromptSection(
+            "scene", render_scene,
+            items=(scene.get("narrative_content") or "").split(),
+            priority=1
+        ),
+        PromptSection(
+            "other_characters", render_other_characters,
+            items=[f"{c.get('name', 'Inconnu')} ({c.get('class', 'Inconnu')} niv.{c.get('level', 1)})" for c in other_characters],
+            priority=0
+        ),
+        PromptSection.fixed("character", prompt_templates.CHARACTER_TEMPLATE.render(
+            name=character.get("name", "Inconnu"),
+            character_class=character.get("class", "Inconnu"),
+            level=character.get("level", 1),
+            current_hp=character.get("current_hp", 0),
+            max_hp=character.get("max_hp", 0),
+            armor_class=character.get("armor_class", 10),
+            strength=character.get("strength", 10),
+            intelligence=character.get("intelligence", 10),
+            wisdom=character.get("wisdom", 10),
+            dexterity=character.get("dexterity", 10),
+            constitution=character.get("constitution", 10),
+            charisma=character.get("charisma", 10)
+        )),
+        # Contexte historique : résumé des actions anciennes puis actions récentes
+        PromptSection(
+            "story_summary", render_story_summary,
+            items=[story_summary] if story_summary else [],
+            priority=2
+        ),
+        PromptSection(
+            "history", render_history,
+            items=[context_summarizer.format_entry(entry) for entry in context_window],
+            priority=3,
+            keep_last=True
+        ),
+        PromptSection.fixed("action", prompt_templates.ACTION_TEMPLATE.render(
+            action_type=action_type,
+            description=description,
+            game_data=json.dumps(game_data, ensure_ascii=False) if game_data else "Aucune"
+        ))
+    ]
     
-    # Construire le système prompt
-    system_prompt = """
-Tu es un Maître de Jeu (MJ) pour un jeu de rôle Old-School Essentials (OSE).
-Ta mission est de narrer l'aventure, décrire les scènes, interpréter les PNJ, et résoudre les actions des joueurs.
-
-RÈGLES DU JEU:
-- Utilise les règles OSE pour résoudre les actions (jets de dés, combats, sauvegardes, etc.)
-- Niveau de difficulté: {0}
-- Sois cohérent avec l'univers et l'ambiance du jeu
-
-INFORMATIONS SUR LA SESSION:
-- Nom: {1}
-- Description: {2}
-
-INFORMATIONS SUR LE PERSONNAGE:
-- Nom: {3}
-- Classe: {4}
-- Niveau: {5}
-- PV: {6}/{7}
-- CA: {8}
-- FOR: {9} | INT: {10} | SAG: {11}
-- DEX: {12} | CON: {13} | CHA: {14}
-
-AUTRES PERSONNAGES PRÉSENTS:
-{15}
-
-SCÈNE ACTUELLE:
-- Titre: {16}
-- Description: {17}
-- Contenu narratif: {18}
-
-INSTRUCTIONS:
-1. Réponds en tant que MJ à l'action du joueur de manière immersive et narrative
-2. Décris les conséquences de l'action, les réactions des PNJ, et l'évolution de la scène
-3. Utilise les règles OSE pour résoudre les actions (jets de dés, combats, etc.)
-4. Fournis une réponse structurée au format JSON avec les champs suivants:
-   - narrative_response: La réponse narrative au joueur
-   - game_data: Données techniques du jeu (résultats des jets de dés, etc.)
-   - character_updates: Modifications à appliquer au personnage (PV, inventaire, etc.)
-   - scene_updates: Modifications à appliquer à la scène
-   - next_possible_actions: Suggestions d'actions possibles pour le joueur
-   - narrative_context: Contexte narratif pour les prochaines actions
-
-FORMAT DE RÉPONSE:
-```json
-{{
-  "narrative_response": "Description narrative des résultats de l'action",
-  "game_data": {{
-    "dice_rolls": [],
-    "combat_results": {{}},
-    "other_data": {{}}
-  }},
-  "character_updates": {{
-    "current_hp": 0,
-    "inventory": [],
-    "other_updates": {{}}
-  }},
-  "scene_updates": {{
-    "description_updates": "",
-    "npc_updates": [],
-    "monster_updates": [],
-    "item_updates": []
-  }},
-  "next_possible_actions": [
-    {{"type": "DIALOGUE", "description": "Parler à..."}},
-    {{"type": "COMBAT", "description": "Attaquer..."}},
-    {{"type": "MOUVEMENT", "description": "Aller vers..."}}
-  ],
-  "narrative_context": "Contexte narratif pour les prochaines actions"
-}}
-```
-""".format(
-        session.get("difficulty_level", "standard"),
-        session.get("name", "Session sans nom"),
-        session.get("description", ""),
-        character.get("name", "Inconnu"),
-        character.get("class", "Inconnu"),
-        character.get("level", 1),
-        character.get("current_hp", 0),
-        character.get("max_hp", 0),
-        character.get("armor_class", 10),
-        character.get("strength", 10),
-        character.get("intelligence", 10),
-        character.get("wisdom", 10),
-        character.get("dexterity", 10),
-        character.get("constitution", 10),
-        character.get("charisma", 10),
-        ", ".join([f"{c.get('name', 'Inconnu')} ({c.get('class', 'Inconnu')} niv.{c.get('level', 1)})" for c in other_characters]) if other_characters else "Aucun",
-        scene.get("title", "Aucune scène"),
-        scene.get("description", ""),
-        scene.get("narrative_content", "")
+    # Le prompt système est invariant : seules les données du message changent
+    messages, _ = assemble_prompt(
+        prompt_templates.GAME_MASTER_SYSTEM_PROMPT,
+        sections,
+        settings.llm_prompt_token_budget
     )
     
-    # Construire le contexte historique
-    history = ""
-    if context_window:
-        history = "HISTORIQUE RÉCENT:\n"
-        for entry in context_window:
-            history += f"- {entry.get('character_name', 'Inconnu')}: {entry.get('description', '')}\n"
-    
-    # Construire le message utilisateur
-    user_message = f"""
-ACTION DU JOUEUR:
-Type: {action_type}
-Description: {description}
-
-{history if history else ""}
-
-Données de jeu: {json.dumps(game_data, ensure_ascii=False) if game_data else "Aucune"}
-
-Réponds en tant que Maître de Jeu à cette action.
-"""
-    
-    # Construire la liste de messages
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_message}
-    ]
-    
     return messages
 
-async def generate_scene_description(scene_data: Dict[str, Any], context: Dict[str, Any]) -> str:
+async def generate_scene_description(
+    scene_data: Dict[str, Any],
+    context: Dict[str, Any],
+    bypass_cache: bool = False
+) -> str:
     """
     Génère une description détaillée d'une scène en utilisant le LLM.
     
     Args:
         scene_data: Données de la scène
         context: Contexte du jeu
+        bypass_cache: Si True, force une nouvelle génération au lieu de la réponse en cache
     
     Returns:
         Description générée de la scène
     """
     # Construire le prompt pour le LLM
-    system_prompt = """
-Tu es un Maître de Jeu (MJ) pour un jeu de rôle Old-School Essentials (OSE).
-Ta mission est de créer des descriptions de scènes immersives et évocatrices.
-
-INSTRUCTIONS:
-1. Crée une description détaillée et atmosphérique de la scène
-2. Inclus des détails sensoriels (vue, ouïe, odorat, toucher)
-3. Mentionne les éléments importants de l'environnement
-4. Décris l'ambiance générale et l'atmosphère
-5. Suggère subtilement des points d'intérêt ou d'interaction possibles
-"""
-    
-    user_message = f"""
-INFORMATIONS SUR LA SCÈNE:
-- Titre: {scene_data.get("title", "Sans titre")}
-- Type: {scene_data.get("scene_type", "EXPLORATION")}
-- Description de base: {scene_data.get("description", "")}
-
-ÉLÉMENTS PRÉSENTS:
-- PNJ: {", ".join([pnj.get("name", "Inconnu") for pnj in scene_data.get("npcs", [])])}
-- Monstres: {", ".join([monster.get("name", "Inconnu") for monster in scene_data.get("monsters", [])])}
-- Objets: {", ".join([item.get("name", "Inconnu") for item in scene_data.get("items", [])])}
-
-Génère une description immersive et détaillée de cette scène pour les joueurs.
-"""
+    user_message = prompt_templates.SCENE_DESCRIPTION_TEMPLATE.render(
+        title=scene_data.get("title", "Sans titre"),
+        scene_type=scene_data.get("scene_type", "EXPLORATION"),
+        description=scene_data.get("description", ""),
+        npcs=", ".join([pnj.get("name", "Inconnu") for pnj in scene_data.get("npcs", [])]),
+        monsters=", ".join([monster.get("name", "Inconnu") for monster in scene_data.get("monsters", [])]),
+        items=", ".join([item.get("name", "Inconnu") for item in scene_data.get("items", [])])
+    )
     
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": prompt_templates.SCENE_DESCRIPTION_SYSTEM_PROMPT},
         {"role": "user", "content": user_message}
     ]
     
-    # Appeler le LLM
-    response = await llm_client.call_llm(messages, max_tokens=500, temperature=0.7)
+    # Appeler le LLM (génération de contenu : passe après les actions des joueurs)
+    # La description ne dépend que du prompt : réutiliser une génération identique en cache
+    response = await llm_cache.cached_call_llm(
+        messages,
+        max_tokens=500,
+        temperature=0.7,
+        bypass_cache=bypass_cache,
+        priority=llm_client.LLMPriority.BATCH
+    )
     
     # Extraire la réponse
     result = response["choices"][0]["message"]["content"]
@@ -264,7 +340,8 @@ Génère une description immersive et détaillée de cette scène pour les joueu
 async def generate_npc_dialogue(
     npc_data: Dict[str, Any],
     player_input: str,
-    context: Dict[str, Any]
+    context: Dict[str, Any],
+    bypass_cache: bool = False
 ) -> str:
     """
     Génère un dialogue de PNJ en réponse à l'input du joueur.
@@ -273,47 +350,36 @@ async def generate_npc_dialogue(
         npc_data: Données du PNJ
         player_input: Input du joueur
         context: Contexte du jeu
+        bypass_cache: Si True, force une nouvelle génération au lieu de la réponse en cache
     
     Returns:
         Dialogue généré du PNJ
     """
-    # Construire le prompt pour le LLM
-    system_prompt = f"""
-Tu es un Maître de Jeu (MJ) pour un jeu de rôle Old-School Essentials (OSE).
-Ta mission est d'interpréter les PNJ et de générer leurs dialogues.
-
-INFORMATIONS SUR LE PNJ:
-- Nom: {npc_data.get("name", "Inconnu")}
-- Description: {npc_data.get("description", "")}
-- Personnalité: {npc_data.get("personality", "")}
-- Objectifs: {npc_data.get("goals", "")}
-- Connaissances: {npc_data.get("knowledge", "")}
-
-INSTRUCTIONS:
-1. Réponds en tant que ce PNJ au joueur
-2. Respecte la personnalité et les objectifs du PNJ
-3. Adapte le ton, le vocabulaire et le style de parole à ce personnage
-4. Ne révèle que les informations que le PNJ connaît et accepterait de partager
-5. Réagis de manière cohérente avec l'attitude du PNJ envers le personnage du joueur
-"""
-    
-    user_message = f"""
-Le joueur dit au PNJ: "{player_input}"
-
-Contexte de la conversation:
-- Scène: {context.get("scene", {}).get("title", "Inconnue")}
-- Relation avec le joueur: {npc_data.get("relation_to_player", "Neutre")}
-
-Génère la réponse du PNJ.
-"""
+    # Construire le prompt pour le LLM (les données du PNJ restent hors du prompt système)
+    user_message = prompt_templates.NPC_DIALOGUE_TEMPLATE.render(
+        name=npc_data.get("name", "Inconnu"),
+        description=npc_data.get("description", ""),
+        personality=npc_data.get("personality", ""),
+        goals=npc_data.get("goals", ""),
+        knowledge=npc_data.get("knowledge", ""),
+        scene=context.get("scene", {}).get("title", "Inconnue"),
+        relation=npc_data.get("relation_to_player", "Neutre"),
+        player_input=player_input
+    )
     
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": prompt_templates.NPC_DIALOGUE_SYSTEM_PROMPT},
         {"role": "user", "content": user_message}
     ]
     
-    # Appeler le LLM
-    response = await llm_client.call_llm(messages, max_tokens=300, temperature=0.7)
+    # Appeler le LLM (réutiliser une réplique en cache pour un prompt identique)
+    response = await llm_cache.cached_call_llm(
+        messages,
+        max_tokens=300,
+        temperature=0.7,
+        bypass_cache=bypass_cache,
+        **scheduling_keys(context)
+    )
     
     # Extraire la réponse
     result = response["choices"][0]["message"]["content"]
@@ -325,92 +391,132 @@ async def generate_combat_results(
     context: Dict[str, Any]
 ) -> Dict[str, Any]:
     """
-    Génère les résultats d'un combat en utilisant le LLM.
+    Résout un combat avec les règles OSE puis le fait narrer par le LLM.
+    Initiative, attaques, dégâts, sauvegardes et moral sont calculés côté
+    serveur ; le LLM ne reçoit que le déroulement à narrer.
     
     Args:
-        combat_data: Données du combat
+        combat_data: Données du combat (arme, cible ou liste "enemies",
+            nombre de rounds "rounds", "until_end" pour résoudre toute la rencontre)
         context: Contexte du jeu
     
     Returns:
         Résultats du combat
     """
-    # Construire le prompt pour le LLM
-    system_prompt = """
-Tu es un Maître de Jeu (MJ) pour un jeu de rôle Old-School Essentials (OSE).
-Ta mission est de résoudre les combats selon les règles OSE et de narrer leur déroulement.
-
-RÈGLES DE COMBAT OSE:
-1. Initiative: 1d6 par camp, le plus haut agit en premier
-2. Attaque: Jet d'attaque (d20) + bonus vs CA de la cible
-3. Dégâts: Selon l'arme utilisée + modificateurs
-4. Morale: Les monstres peuvent fuir si la situation tourne mal
-
-INSTRUCTIONS:
-1. Résous le combat en utilisant les règles OSE
-2. Narre le déroulement du combat de manière immersive
-3. Décris les actions, attaques, défenses et leurs conséquences
-4. Fournis les résultats techniques (jets de dés, dégâts, etc.)
-5. Indique l'état final des participants (PV restants, conditions, etc.)
-6. Fournis une réponse structurée au format JSON
-"""
-    
-    # Extraire les informations du personnage et des ennemis
     character = context.get("character", {})
     
-    user_message = f"""
-INFORMATIONS DE COMBAT:
-- Attaquant: {character.get("name", "Inconnu")} ({character.get("class", "Inconnu")} niv.{character.get("level", 1)})
-- Arme: {combat_data.get("weapon", "Inconnue")}
-- Cible: {combat_data.get("target", "Inconnue")}
-- Action spécifique: {combat_data.get("action", "Attaque standard")}
-- Tactique: {combat_data.get("tactics", "Standard")}
-
-STATISTIQUES DU PERSONNAGE:
-- PV: {character.get("current_hp", 0)}/{character.get("max_hp", 0)}
-- CA: {character.get("armor_class", 10)}
-- FOR: {character.get("strength", 10)} | DEX: {character.get("dexterity", 10)}
-- Bonus d'attaque: {combat_data.get("attack_bonus", 0)}
-
-STATISTIQUES DE LA CIBLE:
-- Type: {combat_data.get("target_type", "Monstre")}
-- PV: {combat_data.get("target_hp", "Inconnu")}
-- CA: {combat_data.get("target_ac", "Inconnu")}
-- Attaque: {combat_data.get("target_attack", "Inconnue")}
-- Dégâts: {combat_data.get("target_damage", "Inconnus")}
-
-Résous ce combat et fournis une narration immersive ainsi que les résultats techniques.
-"""
+    hero = Combatant.from_character(character, combat_data)
+    enemies = [Combatant.from_monster(enemy) for enemy in combat_enemies(combat_data)]
     
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_message}
-    ]
+    combat = resolve_combat([hero] + enemies, max_rounds=combat_rounds(combat_data))
     
-    # Appeler le LLM
-    response = await llm_client.call_llm(messages, max_tokens=800, temperature=0.7)
+    attacks = [attack for combat_round in combat["rounds"] for attack in combat_round["attacks"]]
+    log = format_combat_log(combat)
+    outcome = format_combat_outcome(combat)
     
-    # Extraire la réponse
-    result = response["choices"][0]["message"]["content"]
+    messages = [
+        {"role": "system", "content": prompt_templates.COMBAT_NARRATION_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt_templates.COMBAT_NARRATION_TEMPLATE.render(
+            character=f"{hero.name} ({character.get('class', 'Inconnu')} niv.{hero.level})",
+            action=combat_data.get("action", "Attaque standard"),
+            tactics=combat_data.get("tactics", "Standard"),
+            log=log,
+            outcome=outcome
+        )}
+    ]
     
-    # Essayer de parser la réponse structurée
+    # Les résultats ne dépendent pas de la narration : le déroulement sert de repli
     try:
-        if "```json" in result and "```" in result:
-            json_str = result.split("```json")[1].split("```")[0].strip()
-            return json.loads(json_str)
+        response = await llm_client.call_llm(
+            messages,
+            max_tokens=settings.combat_narration_max_tokens,
+            temperature=0.7,
+            **scheduling_keys(context)
+        )
+        narrative = response["choices"][0]["message"]["content"].strip()
+        tokens_used = response["usage"]["total_tokens"]
     except Exception as e:
-        print(f"Erreur de parsing des résultats de combat: {e}")
+        print(f"Erreur lors de la narration du combat: {e}")
+        narrative = f"{log}\n\n{outcome}"
+        tokens_used = 0
     
-    # Retourner un format par défaut si le parsing a échoué
     return {
-        "narrative": result,
+        "narrative": narrative,
         "technical_results": {
-            "initiative": {},
-            "attacks": [],
-            "damage_dealt": 0,
-            "damage_received": 0
+            "initiative": combat["rounds"][0]["initiative"] if combat["rounds"] else {},
+            "rounds": combat["rounds"],
+            "attacks": attacks,
+            "damage_dealt": sum(a["damage"] for a in attacks if a["attacker"] == hero.name),
+            "damage_received": sum(a["damage"] for a in attacks if a["target"] == hero.name)
         },
         "final_state": {
-            "character_hp": character.get("current_hp", 0),
-            "enemies_state": "Inconnu"
-        }
-    }
\ No newline at end of file
+            "character_hp": hero.hp,
+            "combat_finished": combat["finished"],
+            "winner": combat["winner"],
+            "enemies_state": [state for state in combat["combatants"] if state["side"] == ENEMIES]
+        },
+        "tokens_used": tokens_used
+    }
+
+def as_int(value, default=None):
+    """Convertit une valeur des données de combat en entier (default si invalide)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def combat_rounds(combat_data: Dict[str, Any]) -> int:
+    """Nombre de rounds à résoudre, borné par combat_max_rounds"""
+    if combat_data.get("until_end"):
+        return settings.combat_max_rounds
+    return max(1, min(as_int(combat_data.get("rounds"), 1), settings.combat_max_rounds))
+
+def combat_enemies(combat_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extrait les statistiques des adversaires des données de combat.
+    Accepte une liste "enemies" ou les champs target_* d'une cible unique.
+    """
+    if combat_data.get("enemies"):
+        return combat_data["enemies"]
+    
+    return [{
+        "name": combat_data.get("target", "Adversaire"),
+        "hp": as_int(combat_data.get("target_hp")),
+        "armor_class": as_int(combat_data.get("target_ac"), 9),
+        "hit_dice": combat_data.get("target_hit_dice", 1),
+        "damage": combat_data.get("target_damage") or "1d6",
+        "morale": as_int(combat_data.get("target_morale"))
+    }]
+
+def format_combat_log(combat: Dict[str, Any]) -> str:
+    """Formate le déroulement d'un combat pour la narration"""
+    lines = []
+    for combat_round in combat["rounds"]:
+        initiative = combat_round["initiative"]
+        lines.append(f"Round {combat_round['round']} (initiative : groupe {initiative[PARTY]}, adversaires {initiative[ENEMIES]})")
+        for attack in combat_round["attacks"]:
+            if attack["hit"]:
+                line = f"- {attack['attacker']} touche {attack['target']} ({attack['total']} pour {attack['needed']}) : {attack['damage']} dégâts, {attack['target_hp']} PV restants"
+            else:
+                line = f"- {attack['attacker']} rate {attack['target']} ({attack['total']} pour {attack['needed']})"
+            save = attack.get("save")
+            if save:
+                line += ", sauvegarde réussie" if save["success"] else ", sauvegarde ratée"
+            lines.append(line)
+        for check in combat_round["morale"]:
+            if check["fled"]:
+                lines.append("- Les adversaires prennent la fuite" if check["side"] == ENEMIES else "- Le groupe prend la fuite")
+    return "\n".join(lines)
+
+def format_combat_outcome(combat: Dict[str, Any]) -> str:
+    """Décrit l'issue d'un combat pour la narration"""
+    states = ", ".join(
+        f"{state['name']} ({state['status']}, {state['hp']} PV)" for state in combat["combatants"]
+    )
+    if combat["winner"] == PARTY:
+        return f"Le groupe l'emporte. {states}"
+    if combat["winner"] == ENEMIES:
+        return f"Les adversaires l'emportent. {states}"
+    if combat["finished"]:
+        return f"Plus personne n'est en état de combattre. {states}"
+    return f"Le combat continue. {states}"
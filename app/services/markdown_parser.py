@@ -5,20 +5,33 @@ Ce service permet de convertir des fichiers markdown en HTML avec support pour l
 
 import re
 import markdown
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+
+# Version du rendu HTML : à incrémenter quand le HTML produit change (invalide les rendus en cache)
+PARSER_VERSION = 2
+
+# Titres des sections (niveau 2) et sous-sections (niveau 3) des scénarios
+SECTION_PATTERN = re.compile(r'^##\s+(.+?)$', re.MULTILINE)
+SUBSECTION_PATTERN = re.compile(r'^###\s+(.+?)$', re.MULTILINE)
+
+# Rendu d'un tag : (argument, texte, for_gm) -> HTML
+TagRenderer = Callable[[str, Optional[str], bool], str]
 
 class MarkdownParser:
     """Classe pour parser les fichiers markdown avec codes couleur"""
     
     def __init__(self):
         """Initialise le parser markdown"""
-        self.color_pattern = re.compile(r'@color\[(.*?)\]\((.*?)\)')
-        self.dice_pattern = re.compile(r'@dice\[(.*?)\]')
-        self.stat_pattern = re.compile(r'@stat\[(.*?)\]\((.*?)\)')
-        self.item_pattern = re.compile(r'@item\[(.*?)\]\((.*?)\)')
-        self.npc_pattern = re.compile(r'@npc\[(.*?)\]\((.*?)\)')
-        self.monster_pattern = re.compile(r'@monster\[(.*?)\]\((.*?)\)')
-        self.secret_pattern = re.compile(r'@secret\[(.*?)\]\((.*?)\)')
+        # Tags personnalisés @nom[argument](texte), reconnus en une seule passe
+        self.tag_renderers: Dict[str, TagRenderer] = {}
+        self.bare_tags: Set[str] = set()
+        self.tag_pattern = None
+        
+        self.register_tag("color", lambda argument, text, for_gm: f'<span style="color: {argument}">{text}</span>')
+        self.register_tag("dice", lambda argument, text, for_gm: f'<span class="dice">{argument}</span>', with_text=False)
+        for name in ("stat", "item", "npc", "monster"):
+            self.register_tag(name, self._entity_renderer(name))
+        self.register_tag("secret", lambda argument, text, for_gm: f'<div class="gm-secret">{text}</div>' if for_gm else '')
         
         # Extensions markdown à utiliser
         self.markdown_extensions = [
@@ -29,6 +42,74 @@ class MarkdownParser:
             'markdown.extensions.toc'
         ]
     
+    @staticmethod
+    def _entity_renderer(name: str) -> TagRenderer:
+        """Rendu des tags d'entités (@stat, @item, @npc, @monster)"""
+        return lambda argument, text, for_gm: f'<span class="{name}" data-{name}="{argument}">{text}</span>'
+    
+    def register_tag(self, name: str, renderer: TagRenderer, with_text: bool = True):
+        """
+        Ajoute (ou remplace) un tag personnalisé.
+        
+        Args:
+            name: Nom du tag (@nom[...])
+            renderer: Fonction (argument, texte, for_gm) -> HTML ; le texte est
+                déjà rendu (tags imbriqués) et vaut None pour un tag sans texte
+            with_text: Si False, le tag n'a pas de partie (texte), comme @dice[1d6]
+        """
+        self.tag_renderers[name] = renderer
+        if with_text:
+            self.bare_tags.discard(name)
+        else:
+            self.bare_tags.add(name)
+        self.tag_pattern = self._compile_tag_pattern()
+    
+    def _compile_tag_pattern(self):
+        """
+        Expression reconnaissant tous les tags en une seule recherche. Le texte
+        peut contenir un niveau de parenthèses (tags imbriqués comme
+        @secret[mj](@dice[1d6])) ; à défaut, il s'arrête à la première
+        parenthèse fermante.
+        """
+        def names(tags):
+            # (?!) ne reconnaît rien : les groupes existent même sans tag de ce genre
+            return "|".join(re.escape(name) for name in sorted(tags, key=len, reverse=True)) or "(?!)"
+        
+        text_tags = set(self.tag_renderers) - self.bare_tags
+        return re.compile(
+            rf'@(?:(?P<bare>{names(self.bare_tags)})\[(?P<bare_argument>.*?)\]'
+            rf'|(?P<name>{names(text_tags)})\[(?P<argument>.*?)\]'
+            rf'\((?:(?P<text>(?:[^()\n]++|\([^()\n]*+\))*+)\)|(?P<loose_text>.*?)\)))'
+        )
+    
+    def _render_tag(self, match, for_gm: bool) -> str:
+        """Rendu d'un tag reconnu par tag_pattern"""
+        bare, bare_argument, name, argument, text, loose_text = match.groups()
+        if bare:
+            return self.tag_renderers[bare](bare_argument, None, for_gm)
+        
+        if text is None:
+            text = loose_text
+        if "@" in text:
+            text = self.render_tags(text, for_gm)
+        return self.tag_renderers[name](argument, text, for_gm)
+    
+    def render_tags(self, content: str, for_gm: bool = False) -> str:
+        """
+        Remplace les tags personnalisés (@color, @dice, @stat, @item, @npc,
+        @monster, @secret...) par leur HTML, en un seul parcours du contenu.
+        
+        Args:
+            content: Contenu markdown
+            for_gm: Si True, inclut le contenu secret pour le MJ
+        
+        Returns:
+            Contenu markdown avec les tags rendus
+        """
+        if "@" not in content:
+            return content
+        return self.tag_pattern.sub(lambda match: self._render_tag(match, for_gm), content)
+    
     def parse_markdown(self, content: str, for_gm: bool = False) -> str:
         """
         Parse le contenu markdown et convertit les codes couleur en HTML.
@@ -40,29 +121,8 @@ class MarkdownParser:
         Returns:
             Contenu HTML parsé
         """
-        # Remplacer les codes couleur
-        content = self.color_pattern.sub(r'<span style="color: \1">\2</span>', content)
-        
-        # Remplacer les codes de dés
-        content = self.dice_pattern.sub(r'<span class="dice">\1</span>', content)
-        
-        # Remplacer les codes de statistiques
-        content = self.stat_pattern.sub(r'<span class="stat" data-stat="\1">\2</span>', content)
-        
-        # Remplacer les codes d'objets
-        content = self.item_pattern.sub(r'<span class="item" data-item="\1">\2</span>', content)
-        
-        # Remplacer les codes de PNJ
-        content = self.npc_pattern.sub(r'<span class="npc" data-npc="\1">\2</span>', content)
-        
-        # Remplacer les codes de monstres
-        content = self.monster_pattern.sub(r'<span class="monster" data-monster="\1">\2</span>', content)
-        
-        # Traiter les contenus secrets (visibles uniquement pour le MJ)
-        if for_gm:
-            content = self.secret_pattern.sub(r'<div class="gm-secret">\2</div>', content)
-        else:
-            content = self.secret_pattern.sub('', content)
+        # Remplacer les tags personnalisés (codes couleur, dés, entités, secrets)
+        content = self.render_tags(content, for_gm)
         
         # Convertir le markdown en HTML
         html_content = markdown.markdown(content, extensions=self.markdown_extensions)
@@ -185,82 +245,95 @@ class MarkdownParser:
             Dictionnaire contenant les données du scénario
         """
         try:
-            metadata, html_content = self.parse_markdown_file(file_path, for_gm=True)
-            
-            # Extraire les sections du scénario
-            sections = self._extract_scenario_sections(file_path)
-            
-            # Construire la structure de données du scénario
-            scenario_data = {
-                "metadata": metadata,
-                "html_content": html_content,
-                "sections": sections
-            }
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
             
-            return scenario_data
+            return self.parse_scenario(content, render_html=True)
         except Exception as e:
             print(f"Erreur lors du parsing du fichier de scénario: {e}")
             return {"error": str(e)}
     
-    def _extract_scenario_sections(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_scenario(self, content: str, render_html: bool = False) -> Dict[str, Any]:
         """
-        Extrait les sections d'un fichier de scénario.
+        Parse un scénario markdown en mémoire : métadonnées, sections (titres de
+        niveau 2) et sous-sections (titres de niveau 3), découpées en un seul
+        parcours du contenu.
         
         Args:
-            file_path: Chemin vers le fichier de scénario
+            content: Contenu markdown du scénario
+            render_html: Si True, ajoute le rendu HTML (vue MJ) du document et de
+                chaque section ; sinon aucun rendu n'est effectué (import)
         
         Returns:
-            Liste des sections du scénario
+            Dictionnaire contenant les données du scénario
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Ignorer les métadonnées YAML
-            if content.startswith('---'):
-                end_index = content.find('---', 3)
-                if end_index != -1:
-                    content = content[end_index + 3:].strip()
-            
-            # Extraire les sections (titres de niveau 2)
-            section_pattern = re.compile(r'^##\s+(.+?)$(.*?)(?=^##\s+|\Z)', re.MULTILINE | re.DOTALL)
-            sections = []
-            
-            for match in section_pattern.finditer(content):
-                title = match.group(1).strip()
-                content = match.group(2).strip()
-                
-                # Parser le contenu de la section
-                html_content = self.parse_markdown(content, for_gm=True)
-                
-                # Extraire les sous-sections (titres de niveau 3)
-                subsection_pattern = re.compile(r'^###\s+(.+?)$(.*?)(?=^###\s+|\Z)', re.MULTILINE | re.DOTALL)
-                subsections = []
-                
-                for submatch in subsection_pattern.finditer(content):
-                    subtitle = submatch.group(1).strip()
-                    subcontent = submatch.group(2).strip()
-                    
-                    # Parser le contenu de la sous-section
-                    sub_html_content = self.parse_markdown(subcontent, for_gm=True)
-                    
-                    subsections.append({
-                        "title": subtitle,
-                        "content": subcontent,
-                        "html_content": sub_html_content
-                    })
-                
-                sections.append({
-                    "title": title,
-                    "content": content,
-                    "html_content": html_content,
-                    "subsections": subsections
-                })
-            
-            return sections
-        except Exception as e:
-            print(f"Erreur lors de l'extraction des sections: {e}")
-            return []
+        metadata, body = self.extract_metadata(content)
+        
+        scenario_data = {
+            "metadata": metadata,
+            "content": body,
+            "sections": self._extract_sections(body)
+        }
+        if render_html:
+            scenario_data["html_content"] = self.parse_markdown(body, for_gm=True)
+            for section in scenario_data["sections"]:
+                section["html_content"] = self.parse_markdown(section["content"], for_gm=True)
+                for subsection in section["subsections"]:
+                    subsection["html_content"] = self.parse_markdown(subsection["content"], for_gm=True)
+        
+        return scenario_data
+    
+    def parse_scenario_bytes(self, data: bytes, render_html: bool = False) -> Dict[str, Any]:
+        """
+        Parse un scénario markdown reçu tel quel (fichier téléversé), sans
+        passer par un fichier temporaire.
+        
+        Raises:
+            UnicodeDecodeError: Si le contenu n'est pas encodé en UTF-8
+        """
+        return self.parse_scenario(data.decode('utf-8-sig'), render_html)
+    
+    @staticmethod
+    def _split_headings(content: str, pattern) -> List[Tuple[str, str]]:
+        """Découpe un contenu en (titre, contenu) selon les titres reconnus par pattern"""
+        matches = list(pattern.finditer(content))
+        return [
+            (
+                match.group(1).strip(),
+                content[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(content)].strip()
+            )
+            for i, match in enumerate(matches)
+        ]
+    
+    def _extract_sections(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Extrait les sections d'un scénario (sans métadonnées).
+        
+        Args:
+            content: Contenu markdown du scénario
+        
+        Returns:
+            Liste des sections du scénario, avec leurs sous-sections
+        """
+        return [
+            {
+                "title": title,
+                "content": section_content,
+                "subsections": [
+                    {"title": subtitle, "content": subcontent}
+                    for subtitle, subcontent in self._split_headings(section_content, SUBSECTION_PATTERN)
+                ]
+            }
+            for title, section_content in self._split_headings(content, SECTION_PATTERN)
+        ]
 
 # Créer une instance du parser
-markdown_parser = MarkdownParser()
\ No newline at end of file
+markdown_parser = MarkdownParser()
+
+def render_markdown_content(content: str, for_gm: bool = True) -> str:
+    """
+    Rend un contenu markdown avec l'instance du module. Fonction de niveau
+    module pour être exécutée dans un pool de processus : seuls les tags
+    enregistrés à l'import du module sont disponibles dans les processus.
+    """
+    return markdown_parser.parse_markdown(content, for_gm)
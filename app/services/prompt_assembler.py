@@ -0,0 +1,125 @@
+"""
+Assemblage des prompts dans un budget de tokens.
+Le message du joueur est composé de sections. Les sections obligatoires sont
+toujours incluses ; les autres sont réduites par ordre de priorité (la plus
+basse d'abord) jusqu'à ce que le prompt tienne dans le budget. Une section
+réductible est une liste d'éléments (actions de l'historique, mots d'un texte,
+personnages) dont on ne conserve que les premiers ou les derniers.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core import tokenizer
+from app.core.tokenizer import MESSAGE_OVERHEAD_TOKENS
+
+SECTION_SEPARATOR = "\n\n"
+
+class PromptSection:
+    """Section du message du joueur"""
+
+    def __init__(
+        self,
+        name: str,
+        render: Callable[[List[str], int], str],
+        items: Sequence[str] = (),
+        priority: Optional[int] = None,
+        keep_last: bool = False
+    ):
+        """
+        Args:
+            name: Nom de la section
+            render: Fonction produisant le texte de la section à partir des éléments
+                conservés et du nombre total d'éléments ("" pour omettre la section)
+            items: Éléments de la section
+            priority: Priorité de conservation (None pour une section obligatoire)
+            keep_last: Si True, conserve les derniers éléments (historique) plutôt que les premiers
+        """
+        self.name = name
+        self.render = render
+        self.items = list(items)
+        self.priority = priority
+        self.keep_last = keep_last
+        self.kept = len(self.items)
+
+    @classmethod
+    def fixed(cls, name: str, text: str) -> "PromptSection":
+        """Crée une section obligatoire au texte fixe"""
+        return cls(name, lambda kept, total: text)
+
+    def kept_items(self, count: Optional[int] = None) -> List[str]:
+        """Retourne les éléments conservés (les `count` premiers ou derniers)"""
+        count = self.kept if count is None else count
+        if self.keep_last:
+            return self.items[len(self.items) - count:]
+        return self.items[:count]
+
+    def text(self, count: Optional[int] = None) -> str:
+        """Texte de la section avec `count` éléments conservés"""
+        return self.render(self.kept_items(count), len(self.items))
+
+    def tokens(self, count: Optional[int] = None) -> int:
+        """Nombre de tokens de la section avec `count` éléments conservés"""
+        return tokenizer.count_tokens(self.text(count))
+
+def fit_section(section: PromptSection, max_tokens: int) -> int:
+    """
+    Réduit une section pour qu'elle tienne dans `max_tokens`.
+    Recherche par dichotomie le plus grand nombre d'éléments conservés.
+
+    Returns:
+        Nombre de tokens de la section réduite
+    """
+    low, high = 0, section.kept
+    while low < high:
+        middle = (low + high + 1) // 2
+        if section.tokens(middle) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+
+    section.kept = low
+    return section.tokens()
+
+def assemble_prompt(
+    system_prompt: str,
+    sections: List[PromptSection],
+    budget: int
+) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """
+    Assemble le prompt en réduisant les sections facultatives pour tenir dans le budget.
+
+    Args:
+        system_prompt: Prompt système
+        sections: Sections du message du joueur, dans l'ordre du prompt
+        budget: Nombre maximum de tokens du prompt
+
+    Returns:
+        Tuple (messages au format OpenAI, tokens par section)
+    """
+    section_tokens = {section.name: section.tokens() for section in sections}
+    fixed_tokens = (
+        tokenizer.count_tokens(system_prompt)
+        + 2 * MESSAGE_OVERHEAD_TOKENS
+        + len(sections) * tokenizer.count_tokens(SECTION_SEPARATOR)
+    )
+    total = fixed_tokens + sum(section_tokens.values())
+
+    trimmable = sorted(
+        (section for section in sections if section.priority is not None),
+        key=lambda section: section.priority
+    )
+    for section in trimmable:
+        if total <= budget:
+            break
+        excess = total - budget
+        current = section_tokens[section.name]
+        section_tokens[section.name] = fit_section(section, max(current - excess, 0))
+        total -= current - section_tokens[section.name]
+
+    texts = [section.text() for section in sections]
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": SECTION_SEPARATOR.join(text for text in texts if text)}
+    ]
+
+    return messages, section_tokens
@@ -0,0 +1,75 @@
+"""
+Cache du rendu HTML du markdown des scènes.
+Le HTML ne dépend que du contenu markdown, de l'audience (MJ ou joueurs, le
+contenu @secret n'étant rendu que pour le MJ) et de la version du parser : il
+est stocké dans Redis sous l'empreinte de ces trois éléments. Une modification
+du contenu produit une nouvelle clé ; les rendus de l'ancien contenu sont
+supprimés à la mise à jour de la scène.
+"""
+
+import hashlib
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.core import redis
+from app.core.config import settings
+from app.services import render_pool
+from app.services.markdown_parser import PARSER_VERSION
+
+CACHE_KEY_PREFIX = "render_cache:"
+
+def content_hash(content: str) -> str:
+    """Empreinte SHA-256 d'un contenu markdown"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def cache_key(content: str, for_gm: bool) -> str:
+    """Clé du rendu d'un contenu pour une audience"""
+    audience = "gm" if for_gm else "player"
+    return f"{CACHE_KEY_PREFIX}v{PARSER_VERSION}:{audience}:{content_hash(content)}"
+
+async def render_markdown(content: Optional[str], for_gm: bool = False) -> str:
+    """
+    Rend un contenu markdown en HTML, depuis le cache si possible.
+    Le rendu est exécuté dans le pool de processus de rendu.
+
+    Args:
+        content: Contenu markdown
+        for_gm: Si True, inclut le contenu secret pour le MJ
+
+    Returns:
+        Contenu HTML
+    """
+    if not content:
+        return ""
+
+    key = cache_key(content, for_gm)
+    try:
+        cached = await redis.redis_client.getex(key, ex=settings.render_cache_ttl)
+        if cached is not None:
+            return cached
+    except RedisError:
+        # Le cache est facultatif : en cas d'erreur, rendre le contenu
+        pass
+
+    html_content = await render_pool.render(content, for_gm)
+    await store(content, for_gm, html_content)
+
+    return html_content
+
+async def store(content: str, for_gm: bool, html_content: str):
+    """Enregistre le rendu d'un contenu (rendus calculés à l'avance, import en masse)"""
+    try:
+        await redis.redis_client.set(cache_key(content, for_gm), html_content, ex=settings.render_cache_ttl)
+    except RedisError:
+        pass
+
+async def invalidate(content: Optional[str]):
+    """Supprime les rendus d'un contenu (toutes audiences)"""
+    if not content:
+        return
+
+    try:
+        await redis.redis_client.delete(cache_key(content, True), cache_key(content, False))
+    except RedisError:
+        pass
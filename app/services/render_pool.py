@@ -0,0 +1,32 @@
+"""
+Pool de processus pour le rendu markdown.
+Le rendu Python-Markdown est coûteux en CPU et retient le GIL : exécuté dans
+la boucle d'événements (ou un simple thread), il bloque les autres requêtes.
+Les rendus sont confiés à un pool de processus borné (markdown_render_workers,
+par défaut le nombre de cœurs), partagé par l'API et l'import en masse des
+scénarios (app.workers.scenario_import).
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+from app.services.markdown_parser import render_markdown_content
+
+# Processus démarrés à la première soumission ; "spawn" évite de dupliquer
+# par fork les threads et connexions du processus de l'API
+render_executor = ProcessPoolExecutor(
+    max_workers=settings.markdown_render_workers or os.cpu_count(),
+    mp_context=multiprocessing.get_context("spawn"),
+)
+
+async def render(content: str, for_gm: bool = False) -> str:
+    """Rend un contenu markdown en HTML dans le pool, sans bloquer la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(render_executor, render_markdown_content, content, for_gm)
+
+def shutdown():
+    """Arrête les processus du pool (arrêt de l'application)"""
+    render_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,263 @@
+"""
+Parser incrémental pour les réponses structurées du LLM (maître de jeu).
+Ce service consomme les fragments de texte au fur et à mesure de leur génération
+et extrait l'objet JSON de réponse en une seule passe : le texte de
+narrative_response est émis dès que le champ commence, et chaque autre champ
+de premier niveau est émis dès qu'il est complet.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Décodeur tolérant les caractères de contrôle bruts (fréquents dans les sorties de LLM)
+_decoder = json.JSONDecoder(strict=False)
+
+# Taille maximale du texte précédant le JSON avant de le considérer comme de la narration brute
+RAW_TEXT_THRESHOLD = 200
+
+# Longueur maximale d'une séquence d'échappement incomplète (paire de substitution \uXXXX\uXXXX)
+MAX_ESCAPE_LENGTH = 12
+
+class ActionResponseStreamParser:
+    """Classe pour extraire incrémentalement la réponse JSON du maître de jeu"""
+
+    STREAMED_FIELD = "narrative_response"
+
+    def __init__(self):
+        """Initialise l'état du parser"""
+        # prelude : avant l'objet JSON, json : dans l'objet, raw : narration hors JSON, done : objet terminé
+        self.mode = "prelude"
+        self.fields: Dict[str, Any] = {}
+        self.narrative = ""
+
+        self._prelude: List[str] = []
+        self._raw_seen = False
+        self._backticks = 0
+
+        # État de l'objet JSON de premier niveau
+        self._state = "key"
+        self._key: List[str] = []
+        self._current_key: Optional[str] = None
+        self._value: List[str] = []
+        self._value_kind: Optional[str] = None
+        self._nesting = 0
+        self._in_string = False
+        self._escape = False
+
+        # Contenu brut (non décodé) du champ diffusé et position déjà émise
+        self._streamed_raw: List[str] = []
+        self._streamed_pos = 0
+
+    @property
+    def complete(self) -> bool:
+        """Indique si l'objet JSON a été entièrement reçu"""
+        return self.mode == "done"
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Consomme un fragment de texte généré.
+
+        Args:
+            text: Fragment de texte
+
+        Returns:
+            Liste d'événements : ("narrative", texte) pour chaque nouveau morceau
+            de narration, ("field", {"name": ..., "value": ...}) pour chaque champ complet
+        """
+        events: List[Tuple[str, Any]] = []
+        raw_output: List[str] = []
+
+        for ch in text:
+            if self.mode == "json":
+                self._feed_json(ch, events)
+            elif self.mode == "prelude":
+                if ch == "{":
+                    self.mode = "json"
+                    self._state = "key"
+                    self._prelude = []
+                else:
+                    self._prelude.append(ch)
+            elif self.mode == "raw":
+                self._feed_raw(ch, raw_output)
+
+        # Texte sans JSON : le considérer comme de la narration brute
+        if (
+            self.mode == "prelude"
+            and not self._raw_seen
+            and len(self._prelude) > RAW_TEXT_THRESHOLD
+            and "`" not in self._prelude
+        ):
+            self.mode = "raw"
+            self._raw_seen = True
+            prelude, self._prelude = self._prelude, []
+            for ch in prelude:
+                self._feed_raw(ch, raw_output)
+
+        if raw_output:
+            delta = "".join(raw_output)
+            self.narrative += delta
+            events.insert(0, ("narrative", delta))
+
+        self._flush_streamed(events)
+        return events
+
+    def _feed_raw(self, ch: str, output: List[str]):
+        """Traite un caractère de narration brute (s'arrête au premier bloc de code)"""
+        if ch == "`":
+            self._backticks += 1
+            if self._backticks == 3:
+                # Début d'un bloc ```json : rechercher l'objet
+                self._backticks = 0
+                self.mode = "prelude"
+            return
+
+        if self._backticks:
+            output.append("`" * self._backticks)
+            self._backticks = 0
+        output.append(ch)
+
+    def _feed_json(self, ch: str, events: List[Tuple[str, Any]]):
+        """Traite un caractère à l'intérieur de l'objet JSON de premier niveau"""
+        state = self._state
+
+        if state == "in_value":
+            self._feed_value(ch, events)
+        elif state == "key":
+            if ch == '"':
+                self._key = []
+                self._escape = False
+                self._state = "key_string"
+            elif ch == "}":
+                self.mode = "done"
+        elif state == "key_string":
+            if self._escape:
+                self._escape = False
+                self._key.append(ch)
+            elif ch == "\\":
+                self._escape = True
+                self._key.append(ch)
+            elif ch == '"':
+                self._current_key = self._decode_string("".join(self._key))
+                self._state = "colon"
+            else:
+                self._key.append(ch)
+        elif state == "colon":
+            if ch == ":":
+                self._state = "value"
+        elif state == "value":
+            if ch.isspace():
+                return
+            self._value = [ch]
+            self._escape = False
+            self._in_string = False
+            if ch == '"':
+                self._value_kind = "string"
+            elif ch in "{[":
+                self._value_kind = "nested"
+                self._nesting = 1
+            else:
+                self._value_kind = "scalar"
+            self._state = "in_value"
+        elif state == "comma":
+            if ch == ",":
+                self._state = "key"
+            elif ch == "}":
+                self.mode = "done"
+
+    def _feed_value(self, ch: str, events: List[Tuple[str, Any]]):
+        """Traite un caractère de la valeur en cours"""
+        kind = self._value_kind
+
+        if kind == "scalar":
+            if ch in ",}" or ch.isspace():
+                self._end_value(events)
+                self._feed_json(ch, events)
+            else:
+                self._value.append(ch)
+            return
+
+        self._value.append(ch)
+
+        if kind == "string":
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._end_value(events)
+                return
+            if self._current_key == self.STREAMED_FIELD and not self._raw_seen:
+                self._streamed_raw.append(ch)
+            return
+
+        # Objet ou tableau imbriqué
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+        elif ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._nesting += 1
+        elif ch in "}]":
+            self._nesting -= 1
+            if self._nesting == 0:
+                self._end_value(events)
+
+    def _end_value(self, events: List[Tuple[str, Any]]):
+        """Termine la valeur en cours et émet le champ correspondant"""
+        name = self._current_key
+        raw_value = "".join(self._value)
+        self._state = "comma"
+        self._value = []
+
+        if name == self.STREAMED_FIELD and self._value_kind == "string":
+            self._flush_streamed(events)
+
+        try:
+            value = _decoder.decode(raw_value)
+        except ValueError:
+            return
+
+        self.fields[name] = value
+        if name != self.STREAMED_FIELD:
+            events.append(("field", {"name": name, "value": value}))
+
+    def _flush_streamed(self, events: List[Tuple[str, Any]]):
+        """Émet la partie décodable du champ narratif reçue depuis le dernier appel"""
+        if self._streamed_pos >= len(self._streamed_raw):
+            return
+
+        segment = "".join(self._streamed_raw[self._streamed_pos:])
+
+        # Ne pas couper une séquence d'échappement en cours de réception
+        end = len(segment)
+        decoded = None
+        while end > 0 and len(segment) - end <= MAX_ESCAPE_LENGTH:
+            try:
+                decoded = self._decode_string(segment[:end])
+                break
+            except ValueError:
+                end -= 1
+
+        if not decoded:
+            return
+
+        # Retenir une moitié de paire de substitution isolée
+        if "\ud800" <= decoded[-1] <= "\udbff":
+            end -= 6
+            decoded = decoded[:-1]
+            if not decoded:
+                return
+
+        self._streamed_pos += end
+        self.narrative += decoded
+        events.append(("narrative", decoded))
+
+    @staticmethod
+    def _decode_string(raw: str) -> str:
+        """Décode le contenu brut d'une chaîne JSON (sans les guillemets)"""
+        return _decoder.decode(f'"{raw}"')
@@ -0,0 +1,76 @@
+"""
+Import des scénarios markdown.
+Crée un scénario et ses scènes (une par section de niveau 2) à partir d'un
+scénario parsé par MarkdownParser.parse_scenario. Utilisé par
+POST /scenarios/import et par l'import en masse (app.workers.scenario_import).
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.scenario import Scenario
+from app.models.scene import Scene, SceneType
+
+async def create_scenario(
+    db: AsyncSession,
+    scenario_data: Dict[str, Any],
+    creator_id: int,
+    default_title: str
+) -> Scenario:
+    """
+    Enregistre un scénario parsé et ses scènes en une transaction : le
+    scénario puis toutes ses scènes en une seule requête d'insertion.
+
+    Args:
+        db: Session de base de données
+        scenario_data: Scénario parsé (métadonnées et sections)
+        creator_id: ID de l'utilisateur créateur
+        default_title: Titre utilisé si les métadonnées n'en fournissent pas
+
+    Returns:
+        Le scénario créé
+    """
+    # Extraire les métadonnées
+    metadata = scenario_data.get("metadata", {})
+
+    # Créer le scénario
+    scenario = Scenario(
+        title=metadata.get("title", default_title),
+        description=metadata.get("description", ""),
+        introduction=metadata.get("introduction", ""),
+        conclusion=metadata.get("conclusion", ""),
+        recommended_level=metadata.get("level", 1),
+        difficulty=metadata.get("difficulty", "standard"),
+        tags=metadata.get("tags", []),
+        is_published=False,
+        creator_id=creator_id,
+        context_data=metadata.get("context", {}),
+        resources=metadata.get("resources", {})
+    )
+
+    # Insérer le scénario sans valider la transaction pour obtenir son ID
+    db.add(scenario)
+    await db.flush()
+
+    # Créer toutes les scènes en une seule requête (executemany), dans la même transaction
+    scenes = []
+    for i, section in enumerate(scenario_data.get("sections", [])):
+        content = section.get("content", "")
+        scenes.append({
+            "title": section.get("title", f"Scène {i+1}"),
+            "description": content[:200] + "..." if len(content) > 200 else content,
+            "scene_type": SceneType.EXPLORATION,  # Type par défaut
+            "order": i,
+            "narrative_content": content,
+            "markdown_content": content,
+            "scenario_id": scenario.id
+        })
+
+    if scenes:
+        await db.execute(insert(Scene), scenes)
+
+    await db.commit()
+
+    return scenario
@@ -0,0 +1,124 @@
+"""
+Instantanés de l'état temps réel des sessions de jeu.
+L'état d'une session (fenêtre de contexte, résumé de l'histoire, état du jeu)
+ne vit que dans Redis, avec un TTL de 24h. Il est enregistré dans PostgreSQL
+à l'arrêt de la session et périodiquement pendant qu'elle est active, puis
+restauré dans Redis au redémarrage de la session ou lorsque l'état a expiré :
+la session reprend avec son historique au lieu d'un prompt vide.
+"""
+
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import session_state
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.session_snapshot import SessionSnapshot
+
+# Version du format de l'état enregistré (à incrémenter si sa structure change)
+SNAPSHOT_FORMAT = 1
+
+def encode_state(state: Dict[str, Any]) -> bytes:
+    """Encode un état en JSON compact compressé"""
+    payload = json.dumps(state, default=str, separators=(",", ":"), sort_keys=True)
+    return zlib.compress(payload.encode("utf-8"), settings.session_snapshot_compression_level)
+
+def decode_state(data: bytes) -> Dict[str, Any]:
+    """Décode un état enregistré"""
+    return json.loads(zlib.decompress(data))
+
+async def save_snapshot(db: AsyncSession, session_id: int, state: Dict[str, Any]) -> Optional[SessionSnapshot]:
+    """
+    Enregistre un instantané de l'état d'une session et supprime les plus anciens
+    au-delà de session_snapshot_keep.
+
+    Returns:
+        L'instantané créé, None si l'état n'a pas changé depuis le précédent
+    """
+    data = encode_state(state)
+    checksum = hashlib.sha256(data).hexdigest()
+
+    result = await db.execute(
+        select(SessionSnapshot.version, SessionSnapshot.checksum)
+        .filter(SessionSnapshot.game_session_id == session_id)
+        .order_by(SessionSnapshot.version.desc())
+        .limit(1)
+    )
+    latest = result.first()
+    if latest and latest.checksum == checksum:
+        return None
+
+    version = latest.version + 1 if latest else 1
+    snapshot = SessionSnapshot(
+        game_session_id=session_id,
+        version=version,
+        format_version=SNAPSHOT_FORMAT,
+        last_action_id=state.get("last_action_id"),
+        checksum=checksum,
+        state=data
+    )
+    db.add(snapshot)
+
+    await db.execute(
+        delete(SessionSnapshot)
+        .where(
+            SessionSnapshot.game_session_id == session_id,
+            SessionSnapshot.version <= version - settings.session_snapshot_keep
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+    return snapshot
+
+async def load_snapshot(db: AsyncSession, session_id: int) -> Optional[Dict[str, Any]]:
+    """Retourne l'état du dernier instantané lisible d'une session (None si aucun)"""
+    result = await db.execute(
+        select(SessionSnapshot.state)
+        .filter(
+            SessionSnapshot.game_session_id == session_id,
+            SessionSnapshot.format_version <= SNAPSHOT_FORMAT
+        )
+        .order_by(SessionSnapshot.version.desc())
+        .limit(1)
+    )
+    data = result.scalar()
+    return decode_state(data) if data is not None else None
+
+async def restore_session_state(db: AsyncSession, session) -> bool:
+    """
+    Restaure dans Redis l'état d'une session depuis son dernier instantané.
+
+    Returns:
+        True si l'état a été restauré
+    """
+    state = await load_snapshot(db, session.id)
+    if state is None:
+        return False
+    return await session_state.restore(session.id, session, state)
+
+async def checkpoint(session_id: int) -> Optional[SessionSnapshot]:
+    """Enregistre l'état actuel d'une session depuis Redis (session de base de données dédiée)"""
+    state = await session_state.get_state(session_id)
+    if state is None:
+        return None
+
+    async with AsyncSessionLocal() as db:
+        return await save_snapshot(db, session_id, state)
+
+async def checkpoint_if_due(session_id: int):
+    """
+    Prend un instantané de l'état si le précédent date de plus de
+    session_snapshot_interval secondes. Exécuté après chaque action.
+    """
+    try:
+        if await session_state.checkpoint_due(session_id, settings.session_snapshot_interval):
+            await checkpoint(session_id)
+    except Exception as e:
+        print(f"Erreur lors de l'instantané de la session {session_id}: {e}")
@@ -1,5 +1,5 @@
 from app.utils.ose.dice import roll_dice
-from app.utils.ose.thac0 import THAC0_TABLE
+from app.utils.ose.thac0 import THAC0_TABLE, MONSTER_THAC0_TABLE, MONSTER_THAC0_MIN
 
 def get_thac0(character_class: str, level: int) -> int:
     character_class = character_class.upper()
@@ -8,6 +8,12 @@ def get_thac0(character_class: str, level: int) -> int:
     level = max(1, min(level, max(THAC0_TABLE[character_class].keys())))
     return THAC0_TABLE[character_class][level]
 
+def get_monster_thac0(hit_dice: float) -> int:
+    for max_hit_dice, thac0 in MONSTER_THAC0_TABLE:
+        if hit_dice <= max_hit_dice:
+            return thac0
+    return MONSTER_THAC0_MIN
+
 def jet_attaque(character_class: str, level: int, classe_armure: int, modificateur: int = 0) -> dict:
     thac0 = get_thac0(character_class, level)
     cible = thac0 - classe_armure
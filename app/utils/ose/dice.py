@@ -1,4 +1,8 @@
 import random
+import re
+
+DICE_EXPRESSION = re.compile(r"(?:(\d*)d(\d+)([+-]\d+)?|(-?\d+))")
+DICE_NOTATION = re.compile(r"\d*d\d+(?:[+-]\d+)?")
 
 def roll_dice(nb_dés: int, faces: int, modificateur: int = 0) -> dict:
     jets = [random.randint(1, faces) for _ in range(nb_dés)]
@@ -8,3 +12,30 @@ def roll_dice(nb_dés: int, faces: int, modificateur: int = 0) -> dict:
         "modificateur": modificateur,
         "total": total
     }
+
+def roll_dice_expression(expression: str) -> dict:
+    """
+    Lance des dés à partir d'une notation "XdY+Z" (ex. "1d8", "2d4+1", "1d6-1").
+    Un nombre seul correspond à des dégâts fixes.
+    """
+    match = DICE_EXPRESSION.fullmatch(str(expression).replace(" ", "").lower())
+    if not match:
+        raise ValueError(f"Notation de dés invalide : {expression}")
+
+    nb_dés, faces, modificateur, fixe = match.groups()
+    if fixe is not None:
+        return {"jets": [], "modificateur": int(fixe), "total": int(fixe)}
+
+    return roll_dice(int(nb_dés or 1), int(faces), int(modificateur or 0))
+
+def find_dice_expression(text, default: str = "1d6") -> str:
+    """
+    Extrait une notation de dés d'un texte libre (ex. "1d6 ou arme" -> "1d6").
+    Retourne `default` si le texte n'en contient pas.
+    """
+    expression = str(text).replace(" ", "").lower()
+    if DICE_EXPRESSION.fullmatch(expression):
+        return expression
+
+    match = DICE_NOTATION.search(expression)
+    return match.group(0) if match else default
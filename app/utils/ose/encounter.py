@@ -0,0 +1,342 @@
+"""
+Résolution des combats selon les règles Old-School Essentials (OSE).
+Initiative par camp (1d6), jets d'attaque contre la CA (THAC0), dégâts selon
+l'arme, jets de sauvegarde contre les effets spéciaux et tests de moral des
+monstres. Toute la résolution est faite côté serveur ; le LLM ne fait que
+narrer le résultat.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.ose.combat import get_monster_thac0, jet_attaque
+from app.utils.ose.dice import find_dice_expression, roll_dice, roll_dice_expression
+from app.utils.ose_rules import get_ability_modifier, jet_sauvegarde
+
+PARTY = "party"
+ENEMIES = "enemies"
+
+# Effets spéciaux mortels en cas d'échec au jet de sauvegarde
+LETHAL_EFFECTS = {"poison", "mort", "pétrification"}
+# Effets empêchant d'agir
+DISABLING_EFFECTS = {"paralysie", "sommeil"}
+
+# Notation OSE des dés de vie : "2", "1+1", "4-1", "1/2" ; les astérisques
+# (capacités spéciales) sont ignorés
+HIT_DICE_PATTERN = re.compile(r"(\d+)(?:/([1-9]\d*))?([+-]\d+)?")
+
+def parse_hit_dice(value: Any) -> Tuple[float, int]:
+    """
+    Interprète les dés de vie d'un monstre.
+
+    Returns:
+        Les dés de vie utilisés pour le THAC0 et les sauvegardes (1.5 pour
+        "1+1") et le modificateur des points de vie
+    """
+    if isinstance(value, (int, float)):
+        return float(value), 0
+
+    match = HIT_DICE_PATTERN.fullmatch(str(value).replace(" ", "").strip("*"))
+    if not match:
+        return 1.0, 0
+
+    number, divisor, modifier = match.groups()
+    hit_dice = int(number) / int(divisor) if divisor else float(number)
+    modifier = int(modifier or 0)
+    if modifier > 0:
+        hit_dice += 0.5
+    return hit_dice, modifier
+
+class Combatant:
+    """Participant à un combat (personnage ou monstre)"""
+
+    def __init__(
+        self,
+        name: str,
+        side: str,
+        hp: int,
+        armor_class: int = 9,
+        damage: str = "1d6",
+        attack_bonus: int = 0,
+        damage_bonus: int = 0,
+        character_class: Optional[str] = None,
+        level: int = 1,
+        hit_dice: float = 1,
+        attacks: int = 1,
+        morale: Optional[int] = None,
+        effect: Optional[Dict[str, str]] = None,
+        target: Optional[str] = None
+    ):
+        """
+        Args:
+            name: Nom du participant
+            side: Camp (PARTY ou ENEMIES)
+            hp: Points de vie actuels
+            armor_class: Classe d'armure
+            damage: Dégâts par attaque en notation de dés (ex. "1d8")
+            attack_bonus: Modificateur des jets d'attaque
+            damage_bonus: Modificateur des dégâts
+            character_class: Classe OSE (None pour un monstre)
+            level: Niveau du personnage
+            hit_dice: Dés de vie du monstre (1.5 pour "1+")
+            attacks: Nombre d'attaques par round
+            morale: Score de moral (2 à 12, None si le participant ne fuit jamais)
+            effect: Effet spécial d'une attaque réussie ({"name": "poison", "save": "PP"})
+            target: Nom de la cible à attaquer en priorité
+        """
+        self.name = name
+        self.side = side
+        self.hp = hp
+        self.armor_class = armor_class
+        self.damage = damage
+        self.attack_bonus = attack_bonus
+        self.damage_bonus = damage_bonus
+        self.character_class = character_class.upper() if character_class else None
+        self.level = level
+        self.hit_dice = hit_dice
+        self.attacks = attacks
+        self.morale = morale
+        self.effect = effect
+        self.target = target
+        self.conditions: List[str] = []
+        self.fled = False
+
+    @classmethod
+    def from_character(cls, character: Dict[str, Any], combat_data: Dict[str, Any]) -> "Combatant":
+        """Crée un participant à partir des données d'un personnage et de son action de combat"""
+        character_class = character.get("class") or "GUERRIER"
+        character_class = getattr(character_class, "value", character_class)
+        strength_mod = get_ability_modifier(character.get("strength", 10))
+
+        return cls(
+            name=character.get("name", "Inconnu"),
+            side=PARTY,
+            hp=character.get("current_hp", 1),
+            armor_class=character.get("armor_class", 9),
+            damage=find_dice_expression(combat_data.get("damage") or weapon_damage(character, combat_data.get("weapon"))),
+            attack_bonus=combat_data.get("attack_bonus", strength_mod),
+            damage_bonus=combat_data.get("damage_bonus", strength_mod),
+            character_class=character_class,
+            level=character.get("level", 1),
+            target=combat_data.get("target")
+        )
+
+    @classmethod
+    def from_monster(cls, monster: Dict[str, Any]) -> "Combatant":
+        """Crée un participant à partir des statistiques d'un monstre"""
+        hit_dice, hp_modifier = parse_hit_dice(monster.get("hit_dice", 1))
+        hp = monster.get("hp")
+        if hp is None:
+            # Moins d'un dé de vie : 1d4 points de vie
+            hp_roll = roll_dice(int(hit_dice), 8, hp_modifier) if hit_dice >= 1 else roll_dice(1, 4)
+            hp = max(1, hp_roll["total"])
+
+        return cls(
+            name=monster.get("name", "Monstre"),
+            side=ENEMIES,
+            hp=int(hp),
+            armor_class=monster.get("armor_class", 9),
+            damage=find_dice_expression(monster.get("damage", "1d6")),
+            attack_bonus=monster.get("attack_bonus", 0),
+            hit_dice=hit_dice,
+            attacks=monster.get("attacks", 1),
+            morale=monster.get("morale"),
+            effect=monster.get("effect"),
+            target=monster.get("target")
+        )
+
+    @property
+    def active(self) -> bool:
+        """Indique si le participant est encore en combat"""
+        return self.hp > 0 and not self.fled
+
+    @property
+    def can_act(self) -> bool:
+        """Indique si le participant peut agir ce round"""
+        return self.active and not DISABLING_EFFECTS.intersection(self.conditions)
+
+    def attack_roll(self, target: "Combatant") -> Dict[str, Any]:
+        """Effectue un jet d'attaque contre une cible (20 naturel touche, 1 naturel rate)"""
+        if self.character_class:
+            jet = jet_attaque(self.character_class, self.level, target.armor_class, self.attack_bonus)
+        else:
+            thac0 = get_monster_thac0(self.hit_dice)
+            resultat = roll_dice(1, 20, self.attack_bonus)
+            jet = {
+                **resultat,
+                "thac0": thac0,
+                "classe_armure": target.armor_class,
+                "cible": thac0 - target.armor_class,
+                "réussi": resultat["total"] >= thac0 - target.armor_class
+            }
+
+        naturel = jet["jets"][0]
+        if naturel == 20:
+            jet["réussi"] = True
+        elif naturel == 1:
+            jet["réussi"] = False
+
+        return jet
+
+    def saving_throw(self, save_type: str) -> Dict[str, Any]:
+        """Effectue un jet de sauvegarde (les monstres sauvegardent comme des guerriers de niveau DV)"""
+        if self.character_class:
+            return jet_sauvegarde(self.character_class, self.level, save_type)
+        return jet_sauvegarde("GUERRIER", max(1, math.ceil(self.hit_dice)), save_type)
+
+    def state(self) -> Dict[str, Any]:
+        """État du participant à la fin du combat"""
+        return {
+            "name": self.name,
+            "side": self.side,
+            "hp": self.hp,
+            "status": "fui" if self.fled else "hors de combat" if self.hp <= 0 else "actif",
+            "conditions": list(self.conditions)
+        }
+
+def weapon_damage(character: Dict[str, Any], weapon: Optional[str]) -> str:
+    """Retourne les dégâts de l'arme d'un personnage (1d6 par défaut selon OSE)"""
+    weapons = [
+        item for item in (character.get("equipment") or [])
+        if isinstance(item, dict) and item.get("type") == "weapon" and item.get("damage")
+    ]
+    for item in weapons:
+        if weapon and item.get("name", "").lower() == weapon.lower():
+            return item["damage"]
+    if weapons and not weapon:
+        return weapons[0]["damage"]
+    return "1d6"
+
+def choose_target(attacker: Combatant, combatants: List[Combatant]) -> Optional[Combatant]:
+    """Choisit la cible d'un attaquant : sa cible désignée si elle est active, sinon le premier adversaire actif"""
+    opponents = [c for c in combatants if c.side != attacker.side and c.active]
+    for opponent in opponents:
+        if opponent.name == attacker.target:
+            return opponent
+    return opponents[0] if opponents else None
+
+def resolve_attack(attacker: Combatant, target: Combatant) -> Dict[str, Any]:
+    """Résout une attaque : jet d'attaque, dégâts et effet spécial éventuel"""
+    jet = attacker.attack_roll(target)
+    attack = {
+        "attacker": attacker.name,
+        "target": target.name,
+        "roll": jet["jets"][0],
+        "total": jet["total"],
+        "needed": jet["cible"],
+        "hit": jet["réussi"],
+        "damage": 0
+    }
+
+    if jet["réussi"]:
+        damage = roll_dice_expression(attacker.damage)["total"] + attacker.damage_bonus
+        attack["damage"] = max(1, damage)
+        target.hp = max(0, target.hp - attack["damage"])
+
+        if attacker.effect and target.active:
+            save = target.saving_throw(attacker.effect.get("save", "PP"))
+            attack["save"] = {"type": attacker.effect.get("save", "PP"), "roll": save["total"], "success": save["réussi"]}
+            if not save["réussi"]:
+                effect = attacker.effect.get("name", "poison")
+                target.conditions.append(effect)
+                if effect in LETHAL_EFFECTS:
+                    target.hp = 0
+
+    attack["target_hp"] = target.hp
+    return attack
+
+def check_morale(side: str, combatants: List[Combatant], morale_state: Dict[str, set]) -> Optional[Dict[str, Any]]:
+    """
+    Test de moral d'un camp à la première perte puis quand la moitié du camp est hors de combat.
+    En cas d'échec (2d6 supérieur au moral), les survivants fuient.
+    """
+    members = [c for c in combatants if c.side == side]
+    scores = [c.morale for c in members if c.morale is not None]
+    if not scores:
+        return None
+
+    down = sum(1 for c in members if c.hp <= 0)
+    triggers = []
+    if down >= 1:
+        triggers.append("first_loss")
+    if down * 2 >= len(members):
+        triggers.append("half_down")
+
+    pending = [trigger for trigger in triggers if trigger not in morale_state[side]]
+    if not pending or not any(c.active for c in members):
+        return None
+
+    morale_state[side].update(pending)
+    morale = min(scores)
+    if morale >= 12:
+        return {"side": side, "trigger": pending[-1], "roll": None, "morale": morale, "fled": False}
+
+    roll = roll_dice(2, 6)["total"]
+    fled = morale <= 2 or roll > morale
+    if fled:
+        for member in members:
+            if member.active:
+                member.fled = True
+
+    return {"side": side, "trigger": pending[-1], "roll": roll, "morale": morale, "fled": fled}
+
+def resolve_round(combatants: List[Combatant], round_number: int = 1, morale_state: Optional[Dict[str, set]] = None) -> Dict[str, Any]:
+    """
+    Résout un round de combat.
+    Chaque camp lance 1d6 d'initiative ; en cas d'égalité, les camps agissent
+    simultanément (un participant mis hors de combat pendant l'échange agit quand même).
+    """
+    if morale_state is None:
+        morale_state = {PARTY: set(), ENEMIES: set()}
+
+    initiative = {side: roll_dice(1, 6)["total"] for side in (PARTY, ENEMIES)}
+    attacks = []
+
+    for score in sorted(set(initiative.values()), reverse=True):
+        sides = [side for side, value in initiative.items() if value == score]
+        actors = [c for c in combatants if c.side in sides and c.can_act]
+        for actor in actors:
+            for _ in range(actor.attacks):
+                target = choose_target(actor, combatants)
+                if target is None:
+                    break
+                attacks.append(resolve_attack(actor, target))
+
+    morale = [
+        check
+        for check in (check_morale(side, combatants, morale_state) for side in (ENEMIES, PARTY))
+        if check
+    ]
+
+    return {"round": round_number, "initiative": initiative, "attacks": attacks, "morale": morale}
+
+def active_sides(combatants: List[Combatant]) -> set:
+    """Camps ayant encore au moins un participant en combat"""
+    return {c.side for c in combatants if c.active}
+
+def resolve_combat(combatants: List[Combatant], max_rounds: int = 1) -> Dict[str, Any]:
+    """
+    Résout un combat sur un ou plusieurs rounds.
+
+    Args:
+        combatants: Participants des deux camps
+        max_rounds: Nombre maximum de rounds à résoudre (1 pour un seul round)
+
+    Returns:
+        Déroulement du combat (rounds, fin du combat, camp vainqueur, état final des participants)
+    """
+    morale_state = {PARTY: set(), ENEMIES: set()}
+    rounds = []
+
+    while len(active_sides(combatants)) == 2 and len(rounds) < max_rounds:
+        rounds.append(resolve_round(combatants, len(rounds) + 1, morale_state))
+
+    sides = active_sides(combatants)
+
+    return {
+        "rounds": rounds,
+        "finished": len(sides) < 2,
+        "winner": sides.pop() if len(sides) == 1 else None,
+        "combatants": [c.state() for c in combatants]
+    }
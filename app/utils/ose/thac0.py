@@ -38,3 +38,10 @@ THAC0_TABLE = {
         5: 17, 6: 17, 7: 16, 8: 16
     }
 }
+
+# THAC0 des monstres selon leurs dés de vie (borne supérieure de DV incluse)
+MONSTER_THAC0_TABLE = [
+    (1, 19), (2, 18), (3, 17), (4, 16), (5, 15), (6, 14), (7, 13),
+    (9, 12), (11, 11), (13, 10), (15, 9), (17, 8), (19, 7), (21, 6)
+]
+MONSTER_THAC0_MIN = 5
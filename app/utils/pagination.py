@@ -0,0 +1,89 @@
+"""
+Pagination par clé (keyset) des listes de l'API.
+Au lieu d'un OFFSET, dont le coût croît avec le numéro de page, chaque page
+reprend après la clé de tri de la dernière ligne de la page précédente. Cette
+clé est transmise au client sous forme d'un curseur opaque (en-tête X-Next-Cursor).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def page_size(limit: int) -> int:
+    """Taille de page demandée, plafonnée à api_max_page_size"""
+    return max(1, min(limit, settings.api_max_page_size))
+
+def encode_cursor(*values: Any) -> str:
+    """Encode la clé de tri d'une ligne en curseur opaque"""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """
+    Décode un curseur en valeurs de la clé de tri.
+
+    Args:
+        cursor: Curseur reçu du client
+        *types: Type de chaque valeur de la clé (datetime, int, str)
+
+    Raises:
+        HTTPException: 400 si le curseur est invalide
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value, value_type in zip(values, types)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
+
+def keyset_after(columns: Sequence, values: Sequence[Any], descending: bool = True):
+    """
+    Condition SQL sélectionnant les lignes situées après la clé (columns) = (values)
+    dans l'ordre de tri. La comparaison de lignes (a, b) < (x, y) sert de borne
+    au parcours d'un index composite sur la clé ; la forme équivalente
+    a < x OR (a = x AND b < y) ne peut filtrer qu'après lecture des lignes.
+    """
+    key, cursor = tuple_(*columns), tuple_(*values)
+    return key < cursor if descending else key > cursor
+
+def keyset_page(query, sort_key: Sequence, cursor: Optional[str], limit: int, descending: bool = True):
+    """
+    Applique à une requête le tri sur la clé, la reprise après le curseur et la taille de page.
+
+    Args:
+        query: Requête SELECT
+        sort_key: Colonnes de la clé de tri, la dernière devant être unique (id)
+        cursor: Curseur de la page précédente (None pour la première page)
+        limit: Taille de la page
+        descending: Ordre décroissant (plus récent d'abord)
+    """
+    if cursor:
+        values = decode_cursor(cursor, *(column.type.python_type for column in sort_key))
+        query = query.filter(keyset_after(sort_key, values, descending))
+
+    return query.order_by(*(column.desc() if descending else column.asc() for column in sort_key)).limit(limit)
+
+def next_cursor(rows: Sequence, limit: int, key: Callable[[Any], Sequence[Any]]) -> Optional[str]:
+    """Curseur de la page suivante (None si la page n'est pas complète)"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
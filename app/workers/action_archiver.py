@@ -0,0 +1,58 @@
+"""
+Archivage des logs d'action.
+Écrit les actions anciennes et celles des sessions arrêtées dans des fichiers
+JSONL compressés (un par session et par date) puis les supprime de la base.
+À lancer chaque jour (cron, tâche planifiée) ; une interruption ne perd
+aucune action, les groupes non terminés étant repris au passage suivant.
+
+Usage :
+    python -m app.workers.action_archiver [--older-than-days N] [--stopped-after-days N] [--compression zstd|gzip]
+"""
+
+import argparse
+import asyncio
+
+from app.core.archive_storage import COMPRESSION_EXTENSIONS
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.services import action_archive
+
+async def run_archiver(older_than_days: int, stopped_after_days: int, compression: str):
+    """
+    Archive les actions éligibles, groupe par groupe.
+
+    Args:
+        older_than_days: Âge à partir duquel une action est archivée
+        stopped_after_days: Délai après l'arrêt d'une session avant d'archiver ses actions
+        compression: Format de compression des fichiers (zstd ou gzip)
+    """
+    condition = action_archive.archivable_condition(older_than_days, stopped_after_days)
+
+    async with AsyncSessionLocal() as db:
+        groups = await action_archive.find_archive_groups(db, condition)
+
+        total = 0
+        for session_id, action_date in groups:
+            try:
+                count = await action_archive.archive_group(db, session_id, action_date, condition, compression)
+            except Exception as e:
+                await db.rollback()
+                print(f"Erreur lors de l'archivage de la session {session_id} ({action_date}): {e}")
+                continue
+            total += count
+            print(f"Session {session_id}, {action_date} : {count} actions archivées")
+
+    print(f"{total} actions archivées")
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivage des logs d'action")
+    parser.add_argument("--older-than-days", type=int, default=settings.action_archive_after_days)
+    parser.add_argument("--stopped-after-days", type=int, default=settings.action_archive_stopped_after_days)
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_EXTENSIONS), default=settings.action_archive_compression)
+    args = parser.parse_args()
+
+    asyncio.run(run_archiver(args.older_than_days, args.stopped_after_days, args.compression))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Worker de génération des actions.
+Consomme les tâches publiées par POST /actions/jobs dans le stream Redis,
+génère la réponse via le LLM, enregistre le résultat et met à jour l'état du
+jeu. Plusieurs workers (processus ou machines) peuvent tourner en parallèle
+dans le même groupe de consommateurs, indépendamment des réplicas de l'API.
+
+Usage :
+    python -m app.workers.action_worker [--name NOM] [--concurrency N]
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from app.api.actions import build_action_response, save_action_result, update_game_state
+from app.core import job_queue, llm_client, session_events
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.action_log import ActionLog
+from app.services import context_summarizer
+from app.services.llm_service import generate_action_response
+
+async def process_job(job_id: str, payload: Dict[str, Any]):
+    """
+    Traite une tâche de génération d'action.
+
+    Args:
+        job_id: Identifiant de la tâche
+        payload: Données publiées par l'API (action, contexte LLM, etc.)
+    """
+    job = await job_queue.get_job(job_id)
+    if job and job["status"] in (job_queue.JobStatus.DONE, job_queue.JobStatus.FAILED):
+        # Tâche reprise après un arrêt de worker mais déjà terminée
+        return
+
+    try:
+        await job_queue.update_job(job_id, job_queue.JobStatus.RUNNING)
+
+        start_time = time.time()
+
+        response_data = await generate_action_response(
+            payload["action_type"],
+            payload["description"],
+            payload["game_data"],
+            payload["llm_context"]
+        )
+
+        processing_time = time.time() - start_time
+
+        # La session n'est ouverte que pour l'enregistrement, pas pendant l'appel au LLM
+        async with AsyncSessionLocal() as db:
+            action_timestamp = payload.get("action_timestamp")
+            await save_action_result(
+                db, payload["action_id"], payload["session_id"], payload["user_id"],
+                response_data, processing_time,
+                datetime.fromisoformat(action_timestamp) if action_timestamp else None
+            )
+            action_log = await db.get(ActionLog, payload["action_id"])
+
+        action_response = build_action_response(action_log, response_data, processing_time)
+        result = action_response.model_dump(mode="json")
+        await job_queue.update_job(job_id, job_queue.JobStatus.DONE, result=result)
+    except Exception as e:
+        print(f"Erreur lors du traitement de la tâche {job_id}: {e}")
+        await job_queue.update_job(job_id, job_queue.JobStatus.FAILED, error=str(e))
+        return
+
+    # Une tâche DONE n'est pas retraitée : chaque étape suivante est isolée
+    # pour qu'une erreur n'empêche pas les autres
+    try:
+        await session_events.publish_event(payload["session_id"], "result", result)
+    except Exception as e:
+        print(f"Erreur lors de la publication du résultat de la tâche {job_id}: {e}")
+
+    try:
+        await update_game_state(
+            payload["session_id"], payload["character_id"], payload["action_id"], response_data
+        )
+    except Exception as e:
+        print(f"Erreur lors de la mise à jour de l'état du jeu (tâche {job_id}): {e}")
+
+    try:
+        if context_summarizer.needs_summary(payload["llm_context"].get("context_window", [])):
+            await context_summarizer.summarize_session_context(payload["session_id"])
+    except Exception as e:
+        print(f"Erreur lors du résumé du contexte (tâche {job_id}): {e}")
+
+async def consume(consumer: str):
+    """Boucle de consommation des tâches pour un consommateur du groupe"""
+    while True:
+        try:
+            jobs = await job_queue.claim_stale_jobs(consumer, settings.action_job_claim_idle_ms)
+            if not jobs:
+                jobs = await job_queue.read_jobs(consumer)
+        except Exception as e:
+            print(f"Erreur de lecture du stream des tâches ({consumer}): {e}")
+            await asyncio.sleep(1)
+            continue
+
+        for message_id, job_id, payload in jobs:
+            try:
+                await process_job(job_id, payload)
+            except Exception as e:
+                print(f"Erreur lors du traitement de la tâche {job_id}: {e}")
+            finally:
+                try:
+                    await job_queue.ack_job(message_id)
+                except Exception as e:
+                    print(f"Erreur lors de l'acquittement de la tâche {job_id}: {e}")
+
+async def run_worker(name: str, concurrency: int):
+    """
+    Lance un worker composé de `concurrency` consommateurs.
+
+    Args:
+        name: Nom du worker (préfixe des consommateurs du groupe)
+        concurrency: Nombre de tâches traitées simultanément
+    """
+    await job_queue.ensure_consumer_group()
+    await llm_client.init_llm_client()
+
+    try:
+        await asyncio.gather(*(consume(f"{name}-{i}") for i in range(concurrency)))
+    finally:
+        await llm_client.close_llm_client()
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de génération des actions")
+    parser.add_argument("--name", default=f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}")
+    parser.add_argument("--concurrency", type=int, default=settings.action_worker_concurrency)
+    args = parser.parse_args()
+
+    asyncio.run(run_worker(args.name, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Maintenance des partitions de la table action_logs.
+Crée à l'avance les partitions des mois à venir et détache les partitions
+sorties de la période de rétention. À lancer chaque jour (cron, tâche
+planifiée) ; l'opération est idempotente.
+
+Usage :
+    python -m app.workers.partition_maintenance [--convert] [--retention-months N] [--drop]
+"""
+
+import argparse
+import asyncio
+
+from app.core import partitions
+from app.core.config import settings
+from app.core.database import engine
+
+async def run_maintenance(convert: bool, retention_months: int, drop: bool):
+    """
+    Exécute la maintenance des partitions.
+
+    Args:
+        convert: Convertir au préalable une table action_logs non partitionnée
+        retention_months: Nombre de mois conservés dans la table
+        drop: Supprimer les partitions détachées au lieu de les conserver pour archivage
+    """
+    if convert:
+        async with engine.begin() as conn:
+            if await partitions.convert_to_partitioned(conn):
+                print("Table action_logs convertie en table partitionnée")
+
+    async with engine.begin() as conn:
+        created = await partitions.ensure_partitions(conn)
+    for name in created:
+        print(f"Partition créée : {name}")
+
+    async with engine.begin() as conn:
+        detached = await partitions.detach_expired_partitions(conn, retention_months, drop=drop)
+    for name, _ in detached:
+        print(f"Partition {'supprimée' if drop else 'détachée'} : {name}")
+
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance des partitions de action_logs")
+    parser.add_argument("--convert", action="store_true", help="Convertir une table action_logs existante non partitionnée")
+    parser.add_argument("--retention-months", type=int, default=settings.action_logs_retention_months)
+    parser.add_argument("--drop", action="store_true", help="Supprimer les partitions expirées au lieu de les détacher")
+    args = parser.parse_args()
+
+    asyncio.run(run_maintenance(args.convert, args.retention_months, args.drop))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Import en masse de scénarios markdown.
+Parse tous les fichiers .md et .markdown d'un répertoire en parallèle sur
+tous les cœurs (pool de processus), crée les scénarios et leurs scènes dans
+l'ordre des fichiers et, avec --render, calcule à l'avance les rendus HTML
+(vues MJ et joueurs) des scènes dans le cache de rendu.
+
+Usage :
+    python -m app.workers.scenario_import REPERTOIRE --creator-id ID [--workers N] [--render]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.core.database import AsyncSessionLocal, engine
+from app.services import render_cache, scenario_import
+from app.services.markdown_parser import markdown_parser, render_markdown_content
+
+SCENARIO_EXTENSIONS = (".md", ".markdown")
+
+def find_scenario_files(directory: str) -> List[Path]:
+    """Fichiers de scénario d'un répertoire (et de ses sous-répertoires), triés par chemin"""
+    return sorted(
+        path for path in Path(directory).rglob("*")
+        if path.is_file() and path.suffix.lower() in SCENARIO_EXTENSIONS
+    )
+
+def load_scenario(path: Path) -> Dict[str, Any]:
+    """Lit et parse un fichier de scénario (exécuté dans un processus du pool)"""
+    return markdown_parser.parse_scenario_bytes(path.read_bytes())
+
+async def render_scenes(executor: ProcessPoolExecutor, scenario_data: Dict[str, Any]):
+    """Rend les scènes d'un scénario (vues MJ et joueurs) dans le pool et les met en cache"""
+    loop = asyncio.get_running_loop()
+    renders = [
+        (section["content"], for_gm)
+        for section in scenario_data["sections"] if section["content"]
+        for for_gm in (True, False)
+    ]
+    html_contents = await asyncio.gather(*(
+        loop.run_in_executor(executor, render_markdown_content, content, for_gm)
+        for content, for_gm in renders
+    ))
+    for (content, for_gm), html_content in zip(renders, html_contents):
+        await render_cache.store(content, for_gm, html_content)
+
+async def run_import(directory: str, creator_id: int, workers: int, render: bool):
+    """
+    Importe les scénarios d'un répertoire.
+
+    Args:
+        directory: Répertoire contenant les fichiers markdown
+        creator_id: ID de l'utilisateur créateur des scénarios
+        workers: Nombre de processus de parsing et de rendu
+        render: Calculer à l'avance les rendus HTML des scènes
+    """
+    paths = find_scenario_files(directory)
+    loop = asyncio.get_running_loop()
+    imported = 0
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        # Tous les fichiers sont parsés en parallèle ; les scénarios sont créés dans l'ordre
+        futures = [loop.run_in_executor(executor, load_scenario, path) for path in paths]
+
+        async with AsyncSessionLocal() as db:
+            for path, future in zip(paths, futures):
+                try:
+                    scenario_data = await future
+                    scenario = await scenario_import.create_scenario(db, scenario_data, creator_id, path.stem)
+                    if render:
+                        await render_scenes(executor, scenario_data)
+                except Exception as e:
+                    await db.rollback()
+                    print(f"Erreur lors de l'import de {path}: {e}")
+                    continue
+
+                imported += 1
+                print(f"{path} : scénario {scenario.id}, {len(scenario_data['sections'])} scènes")
+
+    print(f"{imported}/{len(paths)} scénarios importés")
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse de scénarios markdown")
+    parser.add_argument("directory", help="Répertoire contenant les fichiers .md et .markdown")
+    parser.add_argument("--creator-id", type=int, required=True, help="ID de l'utilisateur créateur des scénarios")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus (par défaut : nombre de cœurs)")
+    parser.add_argument("--render", action="store_true", help="Calculer à l'avance les rendus HTML des scènes")
+    args = parser.parse_args()
+
+    asyncio.run(run_import(args.directory, args.creator_id, args.workers, args.render))
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import logging
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.sql import text
 
+from app.core import partitions
 from app.core.config import settings
 from app.models.base import Base
 from app.core.security import get_password_hash
@@ -16,6 +17,8 @@ from app.models.user import User
 from app.models.game_session import GameSession
 from app.models.character import Character, CharacterClass
 from app.models.action_log import ActionLog
+from app.models.action_archive import ActionArchive
+from app.models.session_snapshot import SessionSnapshot
 from app.models.scenario import Scenario
 from app.models.scene import Scene, SceneType
 
@@ -40,6 +43,8 @@ async def reset_database():
     async with engine.begin() as conn:
         # Supprimer toutes les tables existantes avec CASCADE
         logger.info("Suppression de toutes les tables existantes avec CASCADE...")
+        await conn.execute(text("DROP TABLE IF EXISTS action_archives CASCADE"))
+        await conn.execute(text("DROP TABLE IF EXISTS session_snapshots CASCADE"))
         await conn.execute(text("DROP TABLE IF EXISTS action_logs CASCADE"))
         await conn.execute(text("DROP TABLE IF EXISTS characters CASCADE"))
         await conn.execute(text("DROP TABLE IF EXISTS game_sessions CASCADE"))
@@ -51,6 +56,9 @@ async def reset_database():
         # Créer toutes les tables
         logger.info("Création de nouvelles tables...")
         await conn.run_sync(Base.metadata.create_all)
+        
+        # Créer les partitions de action_logs (mois courant et mois à venir)
+        await partitions.ensure_partitions(conn)
     
     logger.info("Tables réinitialisées avec succès")
 
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from jose import jwt
 
 from app.main import app
+from app.core import auth_cache, permissions
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.base import Base
@@ -31,6 +32,16 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    """Vider les caches de l'authentification et des permissions (les IDs sont réutilisés entre les tests)"""
+    auth_cache.clear()
+    permissions.membership_cache.clear()
+    yield
+    auth_cache.clear()
+    permissions.membership_cache.clear()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     """Créer une session de base de données de test"""
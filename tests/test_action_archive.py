@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import archive_storage
+from app.core.config import settings
+from app.models.action_archive import ActionArchive
+from app.models.action_log import ActionLog, ActionType
+from app.models.character import Character, CharacterClass
+from app.models.game_session import GameSession
+from app.models.user import User
+from app.services import action_archive
+
+
+@pytest.mark.asyncio
+async def test_archive_actions_and_read_history(client: TestClient, db_session: AsyncSession, test_user: User, test_token: str, tmp_path, monkeypatch):
+    """Test de l'archivage des anciennes actions et de leur lecture transparente par l'API"""
+    monkeypatch.setattr(archive_storage, "_storage", archive_storage.LocalArchiveStorage(str(tmp_path)))
+    monkeypatch.setattr(settings, "api_max_page_size", 2)
+    action_archive.archive_cache.clear()
+
+    game_session = GameSession(name="Session", game_master_id=test_user.id)
+    db_session.add(game_session)
+    await db_session.commit()
+    character = Character(
+        name="Aldric", character_class=CharacterClass.GUERRIER,
+        strength=12, intelligence=10, wisdom=8, dexterity=14, constitution=13, charisma=9,
+        max_hp=10, current_hp=10, armor_class=12,
+        user_id=test_user.id, game_session_id=game_session.id
+    )
+    db_session.add(character)
+    await db_session.commit()
+    now = datetime.now().replace(microsecond=0)
+    timestamps = [datetime(2024, 1, 1, 12, 0), datetime(2024, 1, 1, 12, 5), datetime(2024, 1, 2, 9, 0), now, now + timedelta(minutes=1)]
+    db_session.add_all([
+        ActionLog(
+            action_type=ActionType.AUTRE, description=f"Action {i}",
+            action_timestamp=timestamp, action_date=timestamp.strftime("%Y-%m-%d"),
+            game_session_id=game_session.id, character_id=character.id
+        )
+        for i, timestamp in enumerate(timestamps)
+    ])
+    await db_session.commit()
+
+    condition = action_archive.archivable_condition(older_than_days=90, stopped_after_days=7)
+    groups = await action_archive.find_archive_groups(db_session, condition)
+    assert groups == [(game_session.id, "2024-01-01"), (game_session.id, "2024-01-02")]
+    for session_id, action_date in groups:
+        await action_archive.archive_group(db_session, session_id, action_date, condition, "gzip")
+
+    assert await db_session.scalar(select(func.count(ActionLog.id))) == 2
+    archives = (await db_session.execute(select(ActionArchive).order_by(ActionArchive.first_timestamp))).scalars().all()
+    assert [archive.row_count for archive in archives] == [2, 1]
+    assert archives[0].path.startswith(f"action_logs/action_date=2024-01-01/session={game_session.id}/")
+    assert (tmp_path / archives[0].path).exists()
+
+    headers = {"Authorization": f"Bearer {test_token}"}
+    descriptions, cursor = [], None
+    for _ in range(5):
+        params = {"cursor": cursor} if cursor else {}
+        response = client.get(f"/api/game-sessions/{game_session.id}/actions", params=params, headers=headers)
+        assert response.status_code == 200
+        descriptions += [action["description"] for action in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert descriptions == [f"Action {i}" for i in range(5)]
+
+    response = client.get("/api/actions/", params={"character_id": character.id, "limit": 3}, headers=headers)
+    assert [action["description"] for action in response.json()] == ["Action 4", "Action 3"]
+    response = client.get("/api/actions/", params={"character_id": character.id, "cursor": response.headers["X-Next-Cursor"]}, headers=headers)
+    assert [action["description"] for action in response.json()] == ["Action 2", "Action 1"]
+
+    archived_id = archives[0].min_action_id
+    response = client.get(f"/api/actions/{archived_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["description"] == "Action 0"
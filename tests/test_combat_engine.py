@@ -0,0 +1,120 @@
+import json
+import random
+
+import httpx
+import pytest
+
+from app.core import llm_client
+from app.core.config import settings
+from app.services.llm_service import combat_rounds, generate_combat_results
+from app.utils.ose.combat import get_monster_thac0
+from app.utils.ose.dice import roll_dice_expression
+from app.utils.ose.encounter import Combatant, ENEMIES, PARTY, parse_hit_dice, resolve_combat
+
+
+def test_roll_dice_expression():
+    """Test de la notation de dés des armes et monstres"""
+    for _ in range(50):
+        assert 3 <= roll_dice_expression("2d4+1")["total"] <= 9
+        assert 1 <= roll_dice_expression("d6")["total"] <= 6
+    assert roll_dice_expression("3")["total"] == 3
+
+    with pytest.raises(ValueError):
+        roll_dice_expression("épée")
+
+
+def test_monster_thac0():
+    """Test du THAC0 des monstres selon leurs dés de vie"""
+    assert get_monster_thac0(0.5) == 19
+    assert get_monster_thac0(1) == 19
+    assert get_monster_thac0(1.5) == 18
+    assert get_monster_thac0(8) == 12
+    assert get_monster_thac0(30) == 5
+
+
+def test_monster_from_scene_notation():
+    """Test des dés de vie et dégâts des monstres écrits en notation OSE libre"""
+    assert parse_hit_dice("1/2") == (0.5, 0)
+    assert parse_hit_dice("2*") == (2.0, 0)
+    assert parse_hit_dice("4-1") == (4.0, -1)
+    assert parse_hit_dice("beaucoup") == (1.0, 0)
+
+    for _ in range(50):
+        gnoll = Combatant.from_monster({"name": "Gnoll", "hit_dice": "1+1", "damage": "1d6 ou arme"})
+        assert gnoll.hit_dice == 1.5
+        assert 2 <= gnoll.hp <= 9
+        assert gnoll.damage == "1d6"
+        assert gnoll.attack_roll(gnoll)["thac0"] == 18
+
+    assert Combatant.from_monster({"damage": "arme"}).damage == "1d6"
+
+
+def test_combat_rounds_is_bounded():
+    """Test du nombre de rounds demandé : valeur invalide ou excessive bornée"""
+    assert combat_rounds({}) == 1
+    assert combat_rounds({"rounds": "3"}) == 3
+    assert combat_rounds({"rounds": "trois"}) == 1
+    assert combat_rounds({"rounds": 0}) == 1
+    assert combat_rounds({"rounds": 10 ** 9}) == settings.combat_max_rounds
+    assert combat_rounds({"until_end": True}) == settings.combat_max_rounds
+
+
+def test_resolve_combat_until_end():
+    """Test de la résolution complète d'une rencontre"""
+    random.seed(42)
+    hero = Combatant("Aldric", PARTY, hp=30, armor_class=2, damage="1d8", character_class="guerrier", level=5)
+    goblins = [Combatant.from_monster({"name": f"Gobelin {i}", "hp": 4, "armor_class": 6, "hit_dice": 0.5, "morale": 7}) for i in range(3)]
+
+    combat = resolve_combat([hero] + goblins, max_rounds=20)
+
+    assert combat["finished"]
+    assert combat["winner"] in (PARTY, ENEMIES)
+    for combat_round in combat["rounds"]:
+        assert set(combat_round["initiative"]) == {PARTY, ENEMIES}
+        for attack in combat_round["attacks"]:
+            assert attack["damage"] == 0 or attack["hit"]
+            assert attack["target_hp"] >= 0
+    assert combat["combatants"][0]["hp"] == hero.hp
+
+
+def test_resolve_combat_single_round():
+    """Test qu'un seul round est résolu par défaut"""
+    hero = Combatant("Aldric", PARTY, hp=100, character_class="guerrier")
+    ogre = Combatant.from_monster({"name": "Ogre", "hp": 100, "hit_dice": 4.5, "damage": "1d10"})
+
+    combat = resolve_combat([hero, ogre])
+
+    assert len(combat["rounds"]) == 1
+    assert not combat["finished"]
+    assert len(combat["rounds"][0]["attacks"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_combat_results_narrates_computed_outcome(monkeypatch):
+    """Test que le LLM ne fait que narrer un combat déjà résolu"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "Le gobelin s'effondre."}}],
+            "usage": {"total_tokens": 120}
+        })
+
+    client = httpx.AsyncClient(base_url="http://llm.test/v1", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_client", client)
+
+    results = await generate_combat_results(
+        {"weapon": "Épée longue", "target": "Gobelin", "target_hp": 3, "target_ac": 6, "until_end": True},
+        {"character": {
+            "name": "Aldric", "class": "guerrier", "level": 3, "current_hp": 20, "armor_class": 4,
+            "equipment": [{"name": "Épée longue", "type": "weapon", "damage": "1d8"}]
+        }}
+    )
+
+    assert results["narrative"] == "Le gobelin s'effondre."
+    assert results["tokens_used"] == 120
+    assert results["final_state"]["combat_finished"]
+    assert results["technical_results"]["attacks"]
+    assert requests[0]["max_tokens"] <= 250
+    assert "Gobelin" in requests[0]["messages"][1]["content"]
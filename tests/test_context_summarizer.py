@@ -0,0 +1,75 @@
+import pytest
+
+from app.core import redis, session_state
+from app.core.config import settings
+from app.services import context_summarizer
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Remplace le client Redis par une instance fakeredis (avec Lua)"""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis, "redis_client", client)
+    return client
+
+
+def make_window(count, start=1):
+    """Construit une fenêtre de contexte de `count` actions"""
+    return [
+        {"action_id": i, "character_name": "Aldric", "description": "J'explore la crypte. " * 20}
+        for i in range(start, start + count)
+    ]
+
+
+def test_needs_summary_respects_budget():
+    """Test du déclenchement du résumé selon le budget de tokens"""
+    assert not context_summarizer.needs_summary(make_window(settings.context_window_keep_recent))
+    assert not context_summarizer.needs_summary([{"action_id": i, "description": "Je regarde"} for i in range(20)])
+    assert context_summarizer.needs_summary(make_window(40))
+
+
+@pytest.mark.asyncio
+async def test_summarize_session_context(monkeypatch, fake_redis):
+    """Test du résumé des actions anciennes en conservant les actions récentes"""
+
+    async def fake_get_context(session_id):
+        return make_window(40), "Début"
+
+    compacted = []
+
+    async def fake_compact_context(session_id, summarized_ids, summary):
+        compacted.append((session_id, summarized_ids, summary))
+        return len(summarized_ids)
+
+    calls = []
+
+    async def fake_summarize(summary, entries, session_id=None):
+        calls.append((summary, [entry["action_id"] for entry in entries]))
+        return "Aldric a exploré la crypte."
+
+    monkeypatch.setattr(session_state, "get_context", fake_get_context)
+    monkeypatch.setattr(session_state, "compact_context", fake_compact_context)
+    monkeypatch.setattr(context_summarizer, "summarize_entries", fake_summarize)
+
+    await context_summarizer.summarize_session_context(1)
+
+    summarized_ids = list(range(1, 41 - settings.context_window_keep_recent))
+    assert calls == [("Début", summarized_ids)]
+    assert compacted == [(1, summarized_ids, "Aldric a exploré la crypte.")]
+    assert await fake_redis.get("session:1:summary_lock") is None
+
+
+@pytest.mark.asyncio
+async def test_summary_keeps_lock_taken_by_another_worker(monkeypatch, fake_redis):
+    """Test qu'un résumé dont le verrou a expiré ne libère pas le verrou d'un autre worker"""
+    async def fake_get_context(session_id):
+        # Le verrou expire pendant le résumé et un autre worker le prend
+        await fake_redis.set("session:1:summary_lock", "autre-worker")
+        return [], None
+
+    monkeypatch.setattr(session_state, "get_context", fake_get_context)
+
+    await context_summarizer.summarize_session_context(1)
+
+    assert await fake_redis.get("session:1:summary_lock") == "autre-worker"
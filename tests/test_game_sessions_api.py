@@ -0,0 +1,101 @@
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.action_log import ActionLog, ActionType
+from app.models.character import Character, CharacterClass
+from app.models.game_session import GameSession
+from app.models.user import User
+
+
+@pytest.mark.asyncio
+async def test_read_game_sessions_pagination(client: TestClient, db_session: AsyncSession, test_user: User, test_token: str):
+    """Test de la liste des sessions avec pagination par curseur et sélection des champs"""
+    # Deux sessions modifiées au même instant : l'ID départage l'ordre
+    updated_at = [datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 2)]
+    db_session.add_all([
+        GameSession(name=f"Session {i}", game_master_id=test_user.id, context_data={"notes": "x" * 100}, updated_at=updated_at[i])
+        for i in range(3)
+    ])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {test_token}"}
+    
+    response = client.get("/api/game-sessions/?limit=2&fields=name", headers=headers)
+    
+    assert response.status_code == 200
+    first_page = response.json()
+    assert first_page == [{"id": 3, "name": "Session 2"}, {"id": 2, "name": "Session 1"}]
+    
+    response = client.get(
+        "/api/game-sessions/",
+        params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]},
+        headers=headers
+    )
+    
+    assert response.status_code == 200
+    second_page = response.json()
+    assert [session["name"] for session in second_page] == ["Session 0"]
+    assert second_page[0]["context_data"] == {"notes": "x" * 100}
+    assert "X-Next-Cursor" not in response.headers
+    
+    response = client.get("/api/game-sessions/?fields=secret", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_read_session_actions_pagination(client: TestClient, db_session: AsyncSession, test_user: User, test_token: str, monkeypatch):
+    """Test de la pagination par curseur des actions d'une session et du plafond de taille de page"""
+    monkeypatch.setattr(settings, "api_max_page_size", 3)
+    game_session = GameSession(name="Session", game_master_id=test_user.id)
+    db_session.add(game_session)
+    await db_session.commit()
+    character = Character(
+        name="Aldric", character_class=CharacterClass.GUERRIER,
+        strength=12, intelligence=10, wisdom=8, dexterity=14, constitution=13, charisma=9,
+        max_hp=10, current_hp=10, armor_class=12,
+        user_id=test_user.id, game_session_id=game_session.id
+    )
+    db_session.add(character)
+    await db_session.commit()
+    db_session.add_all([
+        ActionLog(
+            action_type=ActionType.AUTRE, description=f"Action {i}",
+            action_timestamp=datetime(2024, 1, 1, 12, i // 2),
+            game_session_id=game_session.id, character_id=character.id
+        )
+        for i in range(5)
+    ])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {test_token}"}
+    
+    descriptions, cursor = [], None
+    for _ in range(3):
+        params = {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/api/game-sessions/{game_session.id}/actions", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 3
+        descriptions += [action["description"] for action in page]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    
+    assert descriptions == [f"Action {i}" for i in range(5)]
+    
+    response = client.get(f"/api/game-sessions/{game_session.id}/actions?cursor=invalide", headers=headers)
+    assert response.status_code == 400
+
+
+def test_keyset_after_is_a_row_comparison():
+    """Test que la reprise après le curseur borne le parcours de l'index composite"""
+    from sqlalchemy.dialects import postgresql
+
+    from app.utils.pagination import keyset_after
+
+    condition = keyset_after([ActionLog.action_timestamp, ActionLog.id], [datetime(2024, 1, 1), 42])
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+
+    assert sql == "(action_logs.action_timestamp, action_logs.id) < (%(param_1)s, %(param_2)s)"
+    assert " > " in str(keyset_after([ActionLog.action_timestamp, ActionLog.id], [datetime(2024, 1, 1), 42], descending=False))
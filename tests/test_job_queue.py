@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+from app.core import job_queue, redis
+
+
+class FakePipeline:
+    """Pipeline Redis minimal : exécute les commandes mises en attente"""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+        return queue
+
+    async def execute(self):
+        return [await getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Client Redis minimal en mémoire (clés, stream et pub/sub)"""
+
+    def __init__(self):
+        self.data = {}
+        self.stream = []
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def xadd(self, name, fields, maxlen=None, approximate=True):
+        self.stream.append((name, fields))
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.mark.asyncio
+async def test_job_lifecycle(monkeypatch):
+    """Test de la publication d'une tâche et du suivi de son état"""
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(redis, "redis_client", fake_redis)
+
+    job_id = await job_queue.enqueue_action_job({"action_id": 7, "description": "J'ouvre la porte"}, user_id=3)
+
+    job = await job_queue.get_job(job_id)
+    assert job["status"] == job_queue.JobStatus.QUEUED
+    assert job["action_id"] == 7
+    assert job["user_id"] == 3
+
+    stream, fields = fake_redis.stream[0]
+    assert stream == job_queue.ACTION_JOBS_STREAM
+    assert fields["job_id"] == job_id
+    assert json.loads(fields["payload"])["description"] == "J'ouvre la porte"
+
+    await job_queue.update_job(job_id, job_queue.JobStatus.DONE, result={"result": "La porte grince"})
+
+    job = await job_queue.get_job(job_id)
+    assert job["status"] == job_queue.JobStatus.DONE
+    assert job["result"] == {"result": "La porte grince"}
+    assert fake_redis.published[-1][0] == job_queue.job_channel(job_id)
+
+    assert await job_queue.get_job("inconnue") is None
+
+
+@pytest.mark.asyncio
+async def test_process_job_isolates_steps_after_done(monkeypatch):
+    """Test qu'une erreur de mise à jour de l'état du jeu n'empêche pas le résumé du contexte"""
+    from app.workers import action_worker
+
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(redis, "redis_client", fake_redis)
+
+    async def generate_action_response(*args):
+        return {"result": "La porte grince", "game_data": ["invalide"]}
+
+    async def save_action_result(*args):
+        pass
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+        async def get(self, model, action_id):
+            return None
+
+    class FakeResponse:
+        def model_dump(self, mode=None):
+            return {"result": "La porte grince"}
+
+    async def update_game_state(*args):
+        raise ValueError("game_data invalide")
+
+    summaries = []
+
+    async def summarize_session_context(session_id):
+        summaries.append(session_id)
+
+    monkeypatch.setattr(action_worker, "generate_action_response", generate_action_response)
+    monkeypatch.setattr(action_worker, "save_action_result", save_action_result)
+    monkeypatch.setattr(action_worker, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(action_worker, "build_action_response", lambda *args: FakeResponse())
+    monkeypatch.setattr(action_worker, "update_game_state", update_game_state)
+    monkeypatch.setattr(action_worker.context_summarizer, "needs_summary", lambda window: True)
+    monkeypatch.setattr(action_worker.context_summarizer, "summarize_session_context", summarize_session_context)
+
+    job_id = await job_queue.enqueue_action_job({"action_id": 7}, user_id=3)
+    payload = {
+        "action_id": 7, "session_id": 5, "user_id": 3, "character_id": 2,
+        "action_type": "EXPLORATION", "description": "J'ouvre la porte",
+        "game_data": {}, "llm_context": {"context_window": []}
+    }
+
+    await action_worker.process_job(job_id, payload)
+
+    assert (await job_queue.get_job(job_id))["status"] == job_queue.JobStatus.DONE
+    assert summaries == [5]
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from app.core import llm_cache, redis
+from app.core.config import settings
+from app.core.llm_cache import cache_key, CACHE_INDEX_KEY, CACHE_KEY_PREFIX
+
+
+def test_cache_key_is_canonical():
+    """Test que la clé de cache ne dépend que du contenu de la requête"""
+    messages = [
+        {"role": "system", "content": "Tu es un MJ"},
+        {"role": "user", "content": "Décris la crypte"}
+    ]
+    reordered = [{"content": m["content"], "role": m["role"]} for m in messages]
+
+    key = cache_key(messages, max_tokens=500, temperature=0.7)
+
+    assert key.startswith(CACHE_KEY_PREFIX)
+    assert key == cache_key(reordered, temperature=0.7, max_tokens=500)
+
+
+def test_cache_key_depends_on_prompt_and_parameters():
+    """Test que la clé de cache change avec le prompt ou les paramètres du modèle"""
+    messages = [{"role": "user", "content": "Décris la crypte"}]
+
+    key = cache_key(messages, max_tokens=500, temperature=0.7)
+
+    assert key != cache_key(messages, max_tokens=300, temperature=0.7)
+    assert key != cache_key(messages, max_tokens=500, temperature=0.2)
+    assert key != cache_key([{"role": "user", "content": "Décris la taverne"}], max_tokens=500, temperature=0.7)
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_leave_the_index(monkeypatch):
+    """Test que les entrées expirées ne comptent plus dans le nombre maximal d'entrées"""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis, "redis_client", client)
+    monkeypatch.setattr(settings, "llm_cache_max_entries", 2)
+
+    # Entrée dont la clé a expiré mais qui est restée dans l'index
+    await client.zadd(CACHE_INDEX_KEY, {CACHE_KEY_PREFIX + "expiree": time.time() - settings.llm_cache_ttl - 1})
+
+    await llm_cache.set_cached_response(CACHE_KEY_PREFIX + "a", {"result": "a"})
+    await llm_cache.set_cached_response(CACHE_KEY_PREFIX + "b", {"result": "b"})
+
+    assert await llm_cache.get_cached_response(CACHE_KEY_PREFIX + "a") == {"result": "a"}
+    assert await llm_cache.get_cached_response(CACHE_KEY_PREFIX + "b") == {"result": "b"}
+    assert await client.zcard(CACHE_INDEX_KEY) == 2
+
+    await client.zadd(CACHE_INDEX_KEY, {CACHE_KEY_PREFIX + "absente": time.time()})
+    assert await llm_cache.get_cached_response(CACHE_KEY_PREFIX + "absente") is None
+    assert await client.zscore(CACHE_INDEX_KEY, CACHE_KEY_PREFIX + "absente") is None
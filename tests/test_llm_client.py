@@ -0,0 +1,157 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import llm_client
+
+
+@pytest.fixture
+def mock_llm(monkeypatch):
+    """Remplace le client partagé par un client utilisant un transport simulé"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "pong"}}],
+            "usage": {"total_tokens": 3}
+        })
+
+    client = httpx.AsyncClient(base_url="http://llm.test/v1", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_client", client)
+    yield requests
+
+
+@pytest.mark.asyncio
+async def test_call_llm_reuses_shared_client(mock_llm):
+    """Test que call_llm utilise le client partagé pour tous les appels"""
+    client = llm_client.get_llm_client()
+
+    await llm_client.call_llm([{"role": "user", "content": "ping"}], max_tokens=10)
+    response = await llm_client.call_llm([{"role": "user", "content": "ping"}], timeout=2.0)
+
+    assert llm_client.get_llm_client() is client
+    assert response["choices"][0]["message"]["content"] == "pong"
+    assert len(mock_llm) == 2
+    assert str(mock_llm[0].url) == "http://llm.test/v1/chat/completions"
+
+
+@pytest.mark.asyncio
+async def test_pool_stats(mock_llm):
+    """Test des métriques d'utilisation du pool"""
+    before = llm_client.get_pool_stats()["requests_total"]
+
+    await llm_client.call_llm([{"role": "user", "content": "ping"}])
+
+    stats = llm_client.get_pool_stats()
+    assert stats["client_open"] is True
+    assert stats["requests_total"] == before + 1
+    assert stats["requests_in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_close_llm_client(mock_llm):
+    """Test de la fermeture du client partagé"""
+    await llm_client.close_llm_client()
+
+    assert llm_client._client is None
+    assert llm_client.get_pool_stats()["client_open"] is False
+
+
+@pytest.mark.asyncio
+async def test_stream_llm(monkeypatch):
+    """Test de la lecture des fragments en mode streaming"""
+    body = (
+        'data: {"choices": [{"delta": {"content": "Bon"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "jour"}}]}\n\n'
+        'data: {"choices": [], "usage": {"total_tokens": 12}}\n\n'
+        'data: [DONE]\n\n'
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+    client = httpx.AsyncClient(base_url="http://llm.test/v1", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_client", client)
+
+    chunks = [chunk async for chunk in llm_client.stream_llm([{"role": "user", "content": "ping"}])]
+
+    assert len(chunks) == 3
+    assert chunks[0]["choices"][0]["delta"]["content"] == "Bon"
+    assert chunks[-1]["usage"]["total_tokens"] == 12
+
+
+@pytest.mark.asyncio
+async def test_stream_llm_releases_slot_before_slow_consumer(monkeypatch):
+    """Test que la place est libérée à la fin de la réponse du LLM, pas à la fin de la consommation"""
+    body = "".join(f'data: {{"choices": [{{"delta": {{"content": "{i}"}}}}]}}\n\n' for i in range(5)) + "data: [DONE]\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+    client = httpx.AsyncClient(base_url="http://llm.test/v1", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_client", client)
+    scheduler = llm_client.LLMScheduler(max_concurrency=1)
+    monkeypatch.setattr(llm_client, "scheduler", scheduler)
+
+    stream = llm_client.stream_llm([{"role": "user", "content": "ping"}])
+    first = await stream.__anext__()
+
+    # L'appelant n'a lu qu'un fragment : la réponse amont se termine sans lui
+    for _ in range(20):
+        if scheduler.active == 0:
+            break
+        await asyncio.sleep(0.01)
+
+    assert scheduler.active == 0
+    rest = [chunk async for chunk in stream]
+    assert [chunk["choices"][0]["delta"]["content"] for chunk in [first] + rest] == ["0", "1", "2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_priority_and_fairness():
+    """Test de l'ordre de service : priorité, puis tourniquet entre sessions"""
+    scheduler = llm_client.LLMScheduler(max_concurrency=1)
+    order = []
+
+    async def call(name, priority, session_id):
+        async with scheduler.slot(priority, session_id=session_id):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire()
+    tasks = [
+        asyncio.create_task(call("batch", llm_client.LLMPriority.BATCH, 3)),
+        asyncio.create_task(call("s1-a", llm_client.LLMPriority.INTERACTIVE, 1)),
+        asyncio.create_task(call("s1-b", llm_client.LLMPriority.INTERACTIVE, 1)),
+        asyncio.create_task(call("s2-a", llm_client.LLMPriority.INTERACTIVE, 2)),
+    ]
+    await asyncio.sleep(0)
+
+    assert scheduler.stats()["queue_depth"] == 4
+
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["s1-a", "s2-a", "s1-b", "batch"]
+    assert scheduler.active == 0
+    assert scheduler.stats()["priorities"]["batch"]["acquired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancelled_waiter():
+    """Test qu'un appel annulé en attente libère sa place dans la file"""
+    scheduler = llm_client.LLMScheduler(max_concurrency=1)
+
+    await scheduler.acquire()
+    task = asyncio.create_task(scheduler.acquire(session_id=1))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert scheduler.stats()["queue_depth"] == 0
+
+    scheduler.release()
+    assert scheduler.active == 0
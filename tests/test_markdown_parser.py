@@ -0,0 +1,50 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app.benchmarks.markdown_tags import generate_scenario, legacy_render_tags
+from app.services.markdown_parser import MarkdownParser, render_markdown_content
+
+
+def test_render_tags_matches_legacy_implementation():
+    """Test que le rendu en une passe produit le même HTML que les substitutions successives"""
+    parser = MarkdownParser()
+    content = generate_scenario(5) + "\n@dice[1d6](x) @color[red](rouge) @npc[a](b (c) fin"
+
+    for for_gm in (True, False):
+        assert parser.render_tags(content, for_gm) == legacy_render_tags(content, for_gm)
+
+
+def test_render_tags_nested_and_secret():
+    """Test des tags imbriqués et du contenu secret"""
+    parser = MarkdownParser()
+    content = "Coffre @secret[mj](@dice[2d8] po et @item[anneau](un anneau maudit))"
+
+    assert parser.render_tags(content, for_gm=True) == (
+        'Coffre <div class="gm-secret"><span class="dice">2d8</span> po et '
+        '<span class="item" data-item="anneau">un anneau maudit</span></div>'
+    )
+    assert parser.render_tags(content, for_gm=False) == "Coffre "
+
+
+def test_register_tag():
+    """Test de l'ajout d'un tag personnalisé"""
+    parser = MarkdownParser()
+    parser.register_tag("spell", lambda argument, text, for_gm: f'<span class="spell" data-level="{argument}">{text}</span>')
+
+    html = parser.parse_markdown("Il lance @spell[3](Boule de feu) pour @dice[8d6] dégâts.")
+
+    assert '<span class="spell" data-level="3">Boule de feu</span>' in html
+    assert '<span class="dice">8d6</span>' in html
+
+
+def test_render_markdown_content_in_process_pool():
+    """Test que le rendu d'une scène dans un pool de processus est identique au rendu local"""
+    parser = MarkdownParser()
+    sections = parser.parse_scenario(generate_scenario(4))["sections"]
+    contents = [section["content"] for section in sections]
+
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        html_contents = list(executor.map(render_markdown_content, contents))
+
+    assert html_contents == [parser.parse_markdown(content, for_gm=True) for content in contents]
+    assert html_contents[3].startswith("<p>La porte s'ouvre")
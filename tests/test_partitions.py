@@ -0,0 +1,34 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.core import partitions
+from app.models.action_log import ActionLog
+
+
+def test_partition_months():
+    """Test du calcul des mois et des noms de partitions"""
+    assert partitions.add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert partitions.add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partitions.partition_name(date(2024, 3, 1)) == "action_logs_2024_03"
+    assert partitions.partition_month("action_logs_2024_03") == date(2024, 3, 1)
+    assert partitions.partition_month(partitions.DEFAULT_PARTITION) is None
+
+
+def test_action_logs_ddl_is_partitioned():
+    """Test que la table action_logs est créée partitionnée sur PostgreSQL"""
+    ddl = str(CreateTable(ActionLog.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "PRIMARY KEY (id, action_timestamp)" in ddl
+    assert "PARTITION BY RANGE (action_timestamp)" in ddl
+
+
+@pytest.mark.asyncio
+async def test_partition_maintenance_ignores_other_databases(db_session):
+    """Test que la maintenance des partitions ne fait rien hors de PostgreSQL"""
+    conn = await db_session.connection()
+
+    assert await partitions.ensure_partitions(conn) == []
+    assert await partitions.detach_expired_partitions(conn) == []
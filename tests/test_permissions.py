@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import permissions
+from app.core.permissions import SessionRole
+from app.core.security import get_password_hash
+from app.models.character import Character, CharacterClass
+from app.models.game_session import GameSession
+from app.models.user import User
+
+
+async def create_player_and_session(db_session: AsyncSession, game_master: User):
+    """Crée une session de jeu et un joueur y ayant un personnage"""
+    player = User(username="player", email="player@example.com", hashed_password=get_password_hash("password123"))
+    game_session = GameSession(name="Test Session", game_master_id=game_master.id)
+    db_session.add_all([player, game_session])
+    await db_session.commit()
+
+    character = Character(
+        name="Aldric",
+        character_class=CharacterClass.GUERRIER,
+        strength=12, intelligence=10, wisdom=8, dexterity=14, constitution=13, charisma=9,
+        max_hp=10, current_hp=10, armor_class=12,
+        user_id=player.id,
+        game_session_id=game_session.id
+    )
+    db_session.add(character)
+    await db_session.commit()
+
+    return player, game_session, character
+
+
+@pytest.mark.asyncio
+async def test_resolve_session_access_roles(db_session: AsyncSession, test_user: User, test_superuser: User):
+    """Test du rôle de chaque utilisateur dans une session"""
+    player, game_session, _ = await create_player_and_session(db_session, test_user)
+    stranger = User(username="stranger", email="stranger@example.com", hashed_password="x")
+    db_session.add(stranger)
+    await db_session.commit()
+
+    for user, expected_role in (
+        (test_user, SessionRole.GAME_MASTER),
+        (player, SessionRole.PLAYER),
+        (test_superuser, SessionRole.ADMIN),
+        (stranger, None)
+    ):
+        session, role = await permissions.resolve_session_access(db_session, game_session.id, user)
+        assert session.id == game_session.id
+        assert role == expected_role
+
+    assert await permissions.resolve_session_access(db_session, 9999, player) == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_membership_index(db_session: AsyncSession, test_user: User):
+    """Test de l'index des joueurs et de son invalidation"""
+    player, game_session, character = await create_player_and_session(db_session, test_user)
+
+    await permissions.resolve_session_access(db_session, game_session.id, player)
+    assert permissions.membership_cache.get((game_session.id, player.id))
+
+    # Après suppression du personnage, l'appartenance est de nouveau vérifiée en base
+    await db_session.delete(character)
+    await db_session.commit()
+    permissions.forget_player(game_session.id, player.id)
+
+    _, role = await permissions.resolve_session_access(db_session, game_session.id, player)
+    assert role is None
+
+
+@pytest.mark.asyncio
+async def test_resolve_character_access(db_session: AsyncSession, test_user: User, test_superuser: User):
+    """Test de l'accès à un personnage par son propriétaire et le maître de jeu"""
+    player, _, character = await create_player_and_session(db_session, test_user)
+
+    assert await permissions.resolve_character_access(db_session, character.id, player) == (character, True, False)
+    assert await permissions.resolve_character_access(db_session, character.id, test_user) == (character, True, True)
+    assert await permissions.resolve_character_access(db_session, 9999, player) == (None, False, False)
@@ -0,0 +1,65 @@
+from app.core import tokenizer
+from app.services.llm_service import build_prompt
+from app.services.prompt_assembler import PromptSection, assemble_prompt
+
+
+class WordTokenizer:
+    """Tokenizer de test : un token par mot"""
+
+    name = "words"
+
+    def count(self, text):
+        return len(text.split())
+
+
+def test_load_tokenizer_falls_back_to_heuristic():
+    """Test du repli sur l'estimation rapide pour un tokenizer inconnu ou absent"""
+    assert isinstance(tokenizer.load_tokenizer(None), tokenizer.HeuristicTokenizer)
+    assert isinstance(tokenizer.load_tokenizer("inconnu:modele"), tokenizer.HeuristicTokenizer)
+    assert tokenizer.HeuristicTokenizer().count("") == 0
+
+
+def test_assemble_prompt_trims_by_priority(monkeypatch):
+    """Test que les sections de plus basse priorité sont réduites en premier"""
+    monkeypatch.setattr(tokenizer, "_tokenizer", WordTokenizer())
+
+    history = PromptSection(
+        "history", lambda kept, total: " ".join(kept),
+        items=[f"action{i}" for i in range(10)], priority=2, keep_last=True
+    )
+    notes = PromptSection(
+        "notes", lambda kept, total: " ".join(kept),
+        items=[f"note{i}" for i in range(10)], priority=1
+    )
+    sections = [PromptSection.fixed("action", "j'attaque le gobelin"), notes, history]
+
+    # Prompt système et en-têtes des messages, plus la section obligatoire
+    fixed = 2 * tokenizer.MESSAGE_OVERHEAD_TOKENS + 1 + 3
+    messages, tokens = assemble_prompt("système", sections, budget=fixed + 14)
+
+    assert tokens == {"action": 3, "notes": 4, "history": 10}
+    assert messages[1]["content"].endswith("note3\n\naction0 action1 action2 action3 action4 action5 action6 action7 action8 action9")
+
+    messages, tokens = assemble_prompt("système", sections, budget=fixed + 3)
+
+    assert tokens == {"action": 3, "notes": 0, "history": 3}
+    assert messages[1]["content"] == "j'attaque le gobelin\n\naction7 action8 action9"
+
+
+def test_build_prompt_respects_budget(monkeypatch):
+    """Test que le prompt des actions tient dans le budget configuré"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "llm_prompt_token_budget", 1000)
+    context = {
+        "session": {"name": "La crypte"},
+        "character": {"name": "Gandalf"},
+        "scene": {"title": "Crypte", "narrative_content": "Des ossements jonchent le sol. " * 500},
+        "context_window": [{"character_name": "Gandalf", "description": "J'avance prudemment"}]
+    }
+
+    prompt = build_prompt("mouvement", "J'ouvre le sarcophage", {}, context)
+
+    assert tokenizer.count_message_tokens(prompt) <= 1000
+    assert "[…]" in prompt[1]["content"]
+    assert "J'avance prudemment" in prompt[1]["content"]
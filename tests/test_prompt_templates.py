@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.llm_service import build_prompt
+from app.services.prompt_templates import PromptTemplate, GAME_MASTER_SYSTEM_PROMPT
+
+
+def test_prompt_template_render():
+    """Test du rendu d'un gabarit compilé"""
+    template = PromptTemplate("- Nom: {name}\n- Niveau: {level}")
+
+    assert template.fields == {"name", "level"}
+    assert template.render(name="Gandalf", level=3) == "- Nom: Gandalf\n- Niveau: 3"
+
+
+def test_prompt_template_rejects_format_spec():
+    """Test qu'un gabarit avec spécification de format est refusé"""
+    with pytest.raises(ValueError):
+        PromptTemplate("PV: {hp:>3}")
+
+
+def test_build_prompt_system_prefix_is_invariant():
+    """Test que le prompt système ne dépend pas du contexte de jeu"""
+    first = build_prompt("combat", "J'attaque le gobelin", {}, {
+        "session": {"id": 1, "name": "La crypte", "difficulty_level": "hard"},
+        "character": {"name": "Gandalf", "current_hp": 4, "max_hp": 6},
+        "context_window": [{"character_name": "Gandalf", "description": "J'entre"}]
+    })
+    second = build_prompt("dialogue", "Bonjour", {"langue": "elfique"}, {
+        "session": {"id": 2, "name": "La taverne"},
+        "character": {"name": "Bilbo"}
+    })
+
+    assert first[0] == second[0] == {"role": "system", "content": GAME_MASTER_SYSTEM_PROMPT}
+    assert "Gandalf" in first[1]["content"]
+    assert "La crypte" in first[1]["content"]
+    assert first[1]["content"].index("HISTORIQUE RÉCENT") < first[1]["content"].index("ACTION DU JOUEUR")
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.core import redis
+from app.services import render_cache, render_pool
+from app.services.markdown_parser import markdown_parser
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Remplace le client Redis par une instance fakeredis"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis, "redis_client", client)
+    return client
+
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    """Compte les rendus effectués par le parser (pool de threads au lieu du pool de processus)"""
+    monkeypatch.setattr(render_pool, "render_executor", ThreadPoolExecutor(max_workers=1))
+    calls = []
+    parse_markdown = markdown_parser.parse_markdown
+
+    def counting_parse_markdown(content, for_gm=False):
+        calls.append(for_gm)
+        return parse_markdown(content, for_gm)
+
+    monkeypatch.setattr(markdown_parser, "parse_markdown", counting_parse_markdown)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_render_markdown_is_cached_per_audience(fake_redis, render_calls):
+    """Test que les vues MJ et joueurs sont rendues une fois puis servies depuis le cache"""
+    content = "La salle est vide. @secret[mj](Un passage secret mène à la crypte.)"
+
+    for _ in range(3):
+        gm_html = await render_cache.render_markdown(content, for_gm=True)
+        player_html = await render_cache.render_markdown(content, for_gm=False)
+
+    assert render_calls == [True, False]
+    assert "gm-secret" in gm_html
+    assert "passage secret" not in player_html
+
+
+@pytest.mark.asyncio
+async def test_invalidate_removes_renders(fake_redis, render_calls):
+    """Test de la suppression des rendus d'un contenu modifié"""
+    content = "# Entrée de la crypte"
+    await render_cache.render_markdown(content, for_gm=True)
+    await render_cache.render_markdown(content, for_gm=False)
+
+    await render_cache.invalidate(content)
+
+    assert await fake_redis.keys(f"{render_cache.CACHE_KEY_PREFIX}*") == []
+    await render_cache.render_markdown(content, for_gm=True)
+    assert render_calls == [True, False, True]
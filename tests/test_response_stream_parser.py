@@ -0,0 +1,71 @@
+import json
+
+from app.services.response_stream_parser import ActionResponseStreamParser
+
+
+RESPONSE = {
+    "narrative_response": "L'aubergiste répond : \"Des étrangers ?\"\nIl baisse la voix. 🍺",
+    "game_data": {"dice_rolls": [{"type": "d20", "result": 14}], "other_data": {"note": "a}b"}},
+    "character_updates": {"current_hp": 7},
+    "scene_updates": None,
+    "next_possible_actions": [{"type": "DIALOGUE", "description": "Insister..."}],
+    "narrative_context": "L'aubergiste se méfie"
+}
+
+
+def feed_in_chunks(parser, text, size):
+    """Alimente le parser par fragments de taille fixe"""
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+def test_stream_parser_extracts_fields():
+    """Test de l'extraction des champs d'une réponse au format ```json"""
+    text = "```json\n" + json.dumps(RESPONSE, ensure_ascii=False, indent=2) + "\n```"
+
+    for size in (1, 3, 7, 50):
+        parser = ActionResponseStreamParser()
+        events = feed_in_chunks(parser, text, size)
+
+        narrative = "".join(data for event, data in events if event == "narrative")
+        fields = [data["name"] for event, data in events if event == "field"]
+
+        assert narrative == RESPONSE["narrative_response"]
+        assert fields == [name for name in RESPONSE if name != "narrative_response"]
+        assert parser.complete
+        assert parser.fields == RESPONSE
+
+
+def test_stream_parser_emits_narrative_before_end():
+    """Test que la narration est émise avant la fin de la génération"""
+    parser = ActionResponseStreamParser()
+
+    events = parser.feed('```json\n{"narrative_response": "Tu ouvres la por')
+
+    assert events == [("narrative", "Tu ouvres la por")]
+    assert not parser.complete
+
+
+def test_stream_parser_escaped_unicode_split():
+    """Test d'une séquence d'échappement coupée entre deux fragments"""
+    parser = ActionResponseStreamParser()
+
+    events = parser.feed('{"narrative_response": "caf\\u00')
+    events += parser.feed('e9 \\ud83d')
+    events += parser.feed('\\ude00"}')
+
+    assert "".join(data for event, data in events if event == "narrative") == "café 😀"
+    assert parser.complete
+
+
+def test_stream_parser_raw_text():
+    """Test d'une réponse sans JSON considérée comme narration brute"""
+    text = "Tu entres dans une taverne enfumée. " * 10
+    parser = ActionResponseStreamParser()
+
+    events = feed_in_chunks(parser, text, 5)
+
+    assert "".join(data for event, data in events if event == "narrative") == text
+    assert not parser.complete
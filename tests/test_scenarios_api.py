@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.markdown_parser import markdown_parser
+
+SCENARIO = """---
+title: La crypte oubliée
+level: 2
+---
+Introduction ignorée.
+
+## Entrée
+La porte grince. @secret[mj](Un piège @dice[1d6].)
+
+### Le couloir
+Des torches éteintes.
+
+## Crypte
+Un sarcophage @color[gold](doré).
+"""
+
+
+@pytest.mark.asyncio
+async def test_import_scenario_from_markdown(client: TestClient, test_token: str, monkeypatch):
+    """Test de l'import d'un scénario en mémoire, sans rendu HTML"""
+    def fail_render(*args, **kwargs):
+        raise AssertionError("L'import ne doit pas rendre le HTML")
+
+    monkeypatch.setattr(markdown_parser, "parse_markdown", fail_render)
+    headers = {"Authorization": f"Bearer {test_token}"}
+
+    response = client.post(
+        "/api/scenarios/import",
+        files={"file": ("crypte.md", SCENARIO.encode("utf-8"), "text/markdown")},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    scenario = response.json()
+    assert scenario["title"] == "La crypte oubliée"
+    assert scenario["recommended_level"] == 2
+
+    response = client.get("/api/scenes/", params={"scenario_id": scenario["id"]}, headers=headers)
+    scenes = response.json()
+    assert [scene["title"] for scene in scenes] == ["Entrée", "Crypte"]
+    assert [scene["order"] for scene in scenes] == [0, 1]
+    assert scenes[0]["markdown_content"].startswith("La porte grince. @secret[mj](Un piège @dice[1d6].)")
+    assert "### Le couloir" in scenes[0]["markdown_content"]
+
+    response = client.post(
+        "/api/scenarios/import",
+        files={"file": ("crypte.md", "é".encode("latin-1"), "text/markdown")},
+        headers=headers
+    )
+    assert response.status_code == 400
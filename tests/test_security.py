@@ -13,6 +13,7 @@ from app.core.security import (
     get_current_active_user,
     get_current_superuser
 )
+from app.core import auth_cache
 from app.core.config import settings
 from app.models.user import User
 
@@ -53,6 +54,22 @@ async def test_authenticate_user(db_session, test_user):
     assert user is None
 
 
+@pytest.mark.asyncio
+async def test_authenticate_user_rehashes_password(db_session, test_user):
+    """Test du recalcul du hash quand le coût bcrypt a changé"""
+    from passlib.context import CryptContext
+    
+    old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=settings.password_hash_rounds - 1)
+    test_user.hashed_password = old_context.hash("password123")
+    await db_session.commit()
+    
+    user = await authenticate_user(db_session, "testuser", "password123")
+    
+    assert user is not None
+    assert user.hashed_password.startswith(f"$2b${settings.password_hash_rounds:02d}$")
+    assert verify_password("password123", user.hashed_password)
+
+
 def test_create_access_token():
     """Test de la fonction create_access_token"""
     data = {"sub": "testuser", "user_id": 1}
@@ -133,4 +150,49 @@ async def test_get_current_superuser(test_user, test_superuser):
         await get_current_superuser(test_user)
     
     assert excinfo.value.status_code == 403
-    assert excinfo.value.detail == "Permissions insuffisantes"
\ No newline at end of file
+    assert excinfo.value.detail == "Permissions insuffisantes"
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_cache(db_session, test_user, test_token):
+    """Test que l'utilisateur et les claims du token sont servis depuis le cache"""
+    security_scopes = SecurityScopes(scopes=["user"])
+    await get_current_user(security_scopes, test_token, db_session)
+    
+    assert auth_cache.claims_cache.get(test_token)["user_id"] == test_user.id
+    assert auth_cache.user_cache.get(test_user.id)["username"] == "testuser"
+    
+    # Une seconde requête n'interroge plus la base
+    async def fail_execute(*args, **kwargs):
+        raise AssertionError("Requête SQL inattendue")
+    
+    original_execute = db_session.execute
+    db_session.execute = fail_execute
+    try:
+        user = await get_current_user(security_scopes, test_token, db_session)
+    finally:
+        db_session.execute = original_execute
+    
+    assert user.id == test_user.id
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected(db_session, test_user, test_token):
+    """Test qu'un token émis avant l'incrémentation de la version est refusé"""
+    security_scopes = SecurityScopes(scopes=["user"])
+    await get_current_user(security_scopes, test_token, db_session)
+    
+    test_user.token_version += 1
+    await db_session.commit()
+    auth_cache.invalidate_user(test_user.id)
+    
+    with pytest.raises(HTTPException) as excinfo:
+        await get_current_user(security_scopes, test_token, db_session)
+    
+    assert excinfo.value.status_code == 401
+    
+    new_token = create_access_token(
+        {"sub": test_user.username, "user_id": test_user.id, "ver": test_user.token_version}
+    )
+    user = await get_current_user(security_scopes, new_token, db_session)
+    assert user.id == test_user.id
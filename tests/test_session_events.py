@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from app.core import redis, session_events
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Remplace le client Redis par une instance fakeredis (scripts Lua et pub/sub compris)"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis, "redis_client", client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_events_are_pushed_to_subscribers(fake_redis):
+    """Test de la distribution d'un événement publié aux connexions abonnées"""
+    hub = session_events.SessionEventHub(queue_size=10)
+    first = await hub.subscribe(1)
+    second = await hub.subscribe(1)
+    other_session = await hub.subscribe(2)
+
+    event_id = await session_events.publish_event(1, "action", {"description": "J'ouvre la porte"})
+
+    for subscription in (first, second):
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=2)
+        assert event == {"id": event_id, "type": "action", "data": {"description": "J'ouvre la porte"}}
+    assert other_session.queue.empty()
+
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_read_events_since(fake_redis):
+    """Test de la reprise après le dernier événement reçu"""
+    ids = [await session_events.publish_event(1, "result", {"n": i}) for i in range(3)]
+
+    events = await session_events.read_events_since(1, ids[0])
+
+    assert [event["id"] for event in events] == ids[1:]
+    assert [event["data"]["n"] for event in events] == [1, 2]
+    assert session_events.event_id_key(ids[0]) < session_events.event_id_key(ids[1])
+
+
+def test_slow_subscriber_overflows():
+    """Test qu'une connexion trop lente est marquée en débordement sans bloquer les autres"""
+    hub = session_events.SessionEventHub(queue_size=2)
+    slow = session_events.Subscription(1, queue_size=2)
+    fast = session_events.Subscription(1, queue_size=10)
+    hub._subscriptions[1] = {slow, fast}
+
+    for i in range(3):
+        hub.dispatch(1, {"id": f"{i}-0", "type": "action", "data": {}})
+
+    assert slow.overflowed
+    assert fast.queue.qsize() == 3
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from app.core import redis, session_state
+from app.core.config import settings
+from app.models.game_session import GameSession
+from app.models.session_snapshot import SessionSnapshot
+from app.models.user import User
+from app.services import session_snapshots
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Remplace le client Redis par une instance fakeredis (scripts Lua compris)"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis, "redis_client", client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_snapshot_and_restore_session_state(fake_redis, db_session: AsyncSession, test_user: User):
+    """Test de l'enregistrement de l'état d'une session et de sa restauration dans Redis"""
+    session = GameSession(name="La crypte", game_master_id=test_user.id)
+    db_session.add(session)
+    await db_session.commit()
+
+    await session_state.initialize(session.id, session)
+    for action_id in (1, 2):
+        await session_state.append_action(session, {"action_id": action_id, "description": f"Action {action_id}"})
+    await session_state.merge_game_state(session.id, {"torche": "allumée"})
+    await session_state.compact_context(session.id, [1], "Aldric est entré dans la crypte.")
+    state = await session_state.get_state(session.id)
+
+    snapshot = await session_snapshots.save_snapshot(db_session, session.id, state)
+    assert snapshot.version == 1
+    assert await session_snapshots.save_snapshot(db_session, session.id, state) is None
+
+    await session_state.delete(session.id)
+    session.name = "La crypte oubliée"
+    assert await session_snapshots.restore_session_state(db_session, session)
+
+    restored = await session_state.get_state(session.id)
+    assert restored["name"] == "La crypte oubliée"
+    assert restored["context_window"] == [{"action_id": 2, "description": "Action 2"}]
+    assert restored["story_summary"] == "Aldric est entré dans la crypte."
+    assert restored["game_state"] == {"torche": "allumée"}
+    assert restored["last_action_id"] == 2
+
+    # Un état recréé entre-temps n'est pas écrasé
+    assert not await session_snapshots.restore_session_state(db_session, session)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_keeps_recent_versions(db_session: AsyncSession, test_user: User, monkeypatch):
+    """Test que seuls les derniers instantanés d'une session sont conservés"""
+    monkeypatch.setattr(settings, "session_snapshot_keep", 2)
+    session = GameSession(name="La crypte", game_master_id=test_user.id)
+    db_session.add(session)
+    await db_session.commit()
+
+    for action_id in range(1, 5):
+        await session_snapshots.save_snapshot(db_session, session.id, {"last_action_id": action_id})
+
+    result = await db_session.execute(select(SessionSnapshot.version).order_by(SessionSnapshot.version))
+    assert result.scalars().all() == [3, 4]
+    assert (await session_snapshots.load_snapshot(db_session, session.id))["last_action_id"] == 4
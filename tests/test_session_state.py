@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from app.core import redis, session_state
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Remplace le client Redis par une instance fakeredis (scripts Lua compris)"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis, "redis_client", client)
+    return client
+
+
+def make_session(session_id=1):
+    return SimpleNamespace(id=session_id, name="La crypte", current_scenario_id=2, current_scene_id=3)
+
+
+def make_entry(action_id):
+    return {"action_id": action_id, "character_name": "Aldric", "description": f"Action {action_id}"}
+
+
+@pytest.mark.asyncio
+async def test_append_action_creates_state(fake_redis):
+    """Test de l'ajout d'une action à une session sans état"""
+    context_window, story_summary = await session_state.append_action(make_session(), make_entry(1))
+
+    assert context_window == [make_entry(1)]
+    assert story_summary is None
+
+    state = await session_state.get_state(1)
+    assert state["name"] == "La crypte"
+    assert state["last_action_id"] == 1
+    assert state["context_window"] == [make_entry(1)]
+    assert await fake_redis.ttl(session_state.context_key(1)) > 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_are_not_lost(fake_redis):
+    """Test que des ajouts et fusions concurrents ne s'écrasent pas"""
+    session = make_session()
+    await session_state.initialize(1, session)
+
+    await asyncio.gather(*(session_state.append_action(session, make_entry(i)) for i in range(1, 11)))
+    await asyncio.gather(
+        session_state.merge_game_state(1, {"torche": "allumée"}),
+        session_state.merge_game_state(1, {"porte": "ouverte"})
+    )
+
+    state = await session_state.get_state(1)
+    assert sorted(entry["action_id"] for entry in state["context_window"]) == list(range(1, 11))
+    assert state["game_state"] == {"torche": "allumée", "porte": "ouverte"}
+
+
+@pytest.mark.asyncio
+async def test_merge_game_state_requires_session(fake_redis):
+    """Test que l'état du jeu d'une session expirée n'est pas recréé"""
+    assert not await session_state.merge_game_state(9, {"torche": "allumée"})
+    assert not await fake_redis.exists(session_state.game_state_key(9))
+
+
+@pytest.mark.asyncio
+async def test_compact_context_keeps_new_actions(fake_redis):
+    """Test du compactage de la fenêtre après un résumé"""
+    session = make_session()
+    for i in range(1, 6):
+        await session_state.append_action(session, make_entry(i))
+
+    removed = await session_state.compact_context(1, [1, 2, 3], "Aldric est entré dans la crypte.")
+
+    context_window, story_summary = await session_state.get_context(1)
+    assert removed == 3
+    assert [entry["action_id"] for entry in context_window] == [4, 5]
+    assert story_summary == "Aldric est entré dans la crypte."